@@ -89,7 +89,10 @@ ASGI_APPLICATION = "main.asgi.application"
 
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+        "BACKEND": "visits.layers.DatabaseChannelLayer",
+        "CONFIG": {
+            "poll_interval": float(os.getenv("CHANNEL_LAYER_POLL_INTERVAL") or 0.1),
+        },
     }
 }
 
@@ -161,6 +164,41 @@ STATIC_ROOT = "static"
 MEDIA_URL = "/api/media/"
 MEDIA_ROOT = "media"
 
+# Side of the square avatar thumbnails, in pixels.
+
+AVATAR_THUMBNAIL_SIZE = int(os.getenv("AVATAR_THUMBNAIL_SIZE") or 128)
+
+# Bulk report exports
+# Archives are written under MEDIA_ROOT/reports and handed to nginx with
+# X-Accel-Redirect after the permission check.
+
+REPORT_EXPORT_WORKERS = int(os.getenv("REPORT_EXPORT_WORKERS") or 2)
+# Running jobs without a heartbeat for this many seconds are considered
+# abandoned by a crashed worker, they are retried up to
+# REPORT_EXPORT_MAX_ATTEMPTS times and failed after that.
+REPORT_EXPORT_STALE_AFTER = float(os.getenv("REPORT_EXPORT_STALE_AFTER") or 300)
+REPORT_EXPORT_MAX_ATTEMPTS = int(os.getenv("REPORT_EXPORT_MAX_ATTEMPTS") or 3)
+USE_X_ACCEL_REDIRECT = (os.getenv("USE_X_ACCEL_REDIRECT") or "1") == "1"
+
+# Presence board
+# Seconds a process serves its board snapshot before rebuilding it, changes
+# written by the process itself are applied immediately.
+
+BOARD_CACHE_TTL = float(os.getenv("BOARD_CACHE_TTL") or 5)
+
+# Statistics extra
+# Plugin callbacks run concurrently on a pool of STATISTICS_EXTRA_WORKERS
+# threads, a plugin missing its deadline is left out of the response.
+
+STATISTICS_EXTRA_WORKERS = int(os.getenv("STATISTICS_EXTRA_WORKERS") or 8)
+STATISTICS_EXTRA_TIMEOUT = float(os.getenv("STATISTICS_EXTRA_TIMEOUT") or 3)
+
+# Redmine mirror
+# Seconds the mirrored hours of the current day are served before they are
+# queried from redmine again, unless `sync_redmine_time_entries` ran since.
+
+REDMINE_TODAY_MAX_AGE = float(os.getenv("REDMINE_TODAY_MAX_AGE") or 300)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from datetime import date
+from os import getenv
+
+from django.core.cache import cache
+from django.db import connection
+
+from .helpers import get_stored_holidays_year, load_holidays_year
+
+logger = logging.getLogger(__name__)
+
+
+class HolidayCalendar:
+    """
+    In-process holiday calendar backed by the `Holiday` table.
+
+    Years are served from memory and re-read from the table after
+    `memory_ttl` seconds, so years loaded by other processes show up. Years
+    fetched more than `max_age` seconds ago are served as they are while a
+    background thread fetches them again. Years never loaded are fetched in
+    the calling thread.
+
+    Failed fetches are remembered in the shared cache for `failure_ttl`
+    seconds, so an unreachable service is not retried on every request.
+    """
+
+    def __init__(self, memory_ttl: float, max_age: float, failure_ttl: float):
+        self.memory_ttl = memory_ttl
+        self.max_age = max_age
+        self.failure_ttl = failure_ttl
+        self._lock = threading.Lock()
+        self._years: dict[int, tuple[dict[date, str], float]] = {}
+        self._refreshing: set[int] = set()
+
+    def get(self, start: date, end: date) -> dict[date, str]:
+        """
+        Holiday types from `start` to `end` inclusive, keyed by date.
+        """
+        result = {}
+        for year in range(start.year, end.year + 1):
+            for day, type in self.get_year(year).items():
+                if start <= day <= end:
+                    result[day] = type
+
+        return result
+
+    def get_year(self, year: int) -> dict[date, str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._years.get(year)
+        if entry and entry[1] > now:
+            return entry[0]
+
+        ttl = self.memory_ttl
+        stored = get_stored_holidays_year(year)
+        if stored is not None:
+            holidays, age = stored
+            if age > self.max_age:
+                self._revalidate(year)
+        elif (holidays := self._load(year)) is None:
+            holidays = {}
+            ttl = min(ttl, self.failure_ttl)
+
+        with self._lock:
+            self._years[year] = (holidays, now + ttl)
+
+        return holidays
+
+    def clear(self):
+        with self._lock:
+            self._years.clear()
+
+    def _load(self, year: int) -> dict[date, str] | None:
+        cache_key = f"holidays_failed_{year}"
+        if cache.get(cache_key):
+            return None
+
+        try:
+            return load_holidays_year(year)
+        except Exception as e:
+            logger.warning(f"Failed to load holidays of {year}: {e}")
+            cache.set(cache_key, True, self.failure_ttl)
+            return None
+
+    def _revalidate(self, year: int):
+        with self._lock:
+            if year in self._refreshing:
+                return
+            self._refreshing.add(year)
+
+        threading.Thread(target=self._refresh, args=(year,), daemon=True).start()
+
+    def _refresh(self, year: int):
+        try:
+            holidays = self._load(year)
+            if holidays is not None:
+                with self._lock:
+                    self._years[year] = (holidays, time.monotonic() + self.memory_ttl)
+        finally:
+            with self._lock:
+                self._refreshing.discard(year)
+            connection.close()
+
+
+holiday_calendar = HolidayCalendar(
+    memory_ttl=300,
+    max_age=float(getenv("HOLIDAYS_MAX_AGE") or 7 * 24 * 60 * 60),
+    failure_ttl=float(getenv("HOLIDAYS_FAILURE_TTL") or 60),
+)
@@ -0,0 +1,71 @@
+from datetime import date
+from os import getenv
+
+import requests
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Holiday, HolidayYear
+
+
+def fetch_holidays(start: date, end: date) -> dict[date, str]:
+    """
+    Holidays from `start` to `end` from the HOLIDAYS_URL service.
+
+    Raises when the service is not configured, unreachable or answers with
+    an unexpected payload.
+    """
+    if not (url := getenv("HOLIDAYS_URL")):
+        raise ValueError("HOLIDAYS_URL is not set")
+
+    response = requests.get(
+        url,
+        {"start_date": start.isoformat(), "end_date": end.isoformat()},
+        timeout=5,
+    )
+    response.raise_for_status()
+
+    data = response.json()
+    if not isinstance(data, dict):
+        raise ValueError("Unexpected holidays payload")
+
+    holidays = {
+        date.fromisoformat(h["date"]): h["type"]
+        for h in data.get("holidays", [])
+        if isinstance(h, dict) and "date" in h and h.get("type") in Holiday.Type.values
+    }
+
+    return {day: type for day, type in holidays.items() if start <= day <= end}
+
+
+@transaction.atomic
+def load_holidays_year(year: int) -> dict[date, str]:
+    """
+    Fetch the holidays of `year` and replace the stored ones.
+    """
+    holidays = fetch_holidays(date(year, 1, 1), date(year, 12, 31))
+
+    Holiday.objects.filter(date__year=year).delete()
+    Holiday.objects.bulk_create(
+        Holiday(date=day, type=type) for day, type in holidays.items()
+    )
+    HolidayYear.objects.update_or_create(
+        year=year, defaults={"fetched_at": timezone.now()}
+    )
+
+    return holidays
+
+
+def get_stored_holidays_year(year: int) -> tuple[dict[date, str], float] | None:
+    """
+    Stored holidays of `year` and their age in seconds, None if the year was
+    never loaded.
+    """
+    year_row = HolidayYear.objects.filter(year=year).first()
+    if year_row is None:
+        return None
+
+    holidays = dict(Holiday.objects.filter(date__year=year).values_list("date", "type"))
+    age = (timezone.now() - year_row.fetched_at).total_seconds()
+
+    return holidays, age
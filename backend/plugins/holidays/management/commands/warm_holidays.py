@@ -0,0 +1,36 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from plugins.holidays.helpers import load_holidays_year
+
+
+class Command(BaseCommand):
+    help = "Load holidays into the local calendar, a year at a time"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--years",
+            type=int,
+            nargs="+",
+            help="Years to load, the current and the next one by default.",
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        current_year = timezone.localdate().year
+        years = options["years"] or [current_year, current_year + 1]
+
+        failed = []
+        for year in years:
+            try:
+                holidays = load_holidays_year(year)
+            except Exception as e:
+                self.stderr.write(f"Failed to load holidays of {year}: {e}")
+                failed.append(year)
+                continue
+
+            self.stdout.write(f"Loaded {len(holidays)} holidays of {year}")
+
+        if failed:
+            raise CommandError(f"Failed years: {', '.join(map(str, failed))}")
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2025-08-28 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('type', models.CharField(choices=[('holiday', 'Holiday'), ('weekend', 'Weekend')], max_length=16)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HolidayYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(unique=True)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class Holiday(models.Model):
+    class Type(models.TextChoices):
+        HOLIDAY = "holiday"
+        WEEKEND = "weekend"
+
+    date = models.DateField(unique=True)
+    type = models.CharField(max_length=16, choices=Type.choices)
+
+
+class HolidayYear(models.Model):
+    """
+    Year whose holidays were loaded into `Holiday`, empty years included.
+    """
+
+    year = models.PositiveSmallIntegerField(unique=True)
+    fetched_at = models.DateTimeField()
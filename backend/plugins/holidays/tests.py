@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from io import StringIO
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .cache import HolidayCalendar
+from .models import Holiday, HolidayYear
+
+
+class HolidaysServer(ThreadingHTTPServer):
+    """
+    Local stand-in for the HOLIDAYS_URL service.
+    """
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), HolidaysRequestHandler)
+        self.status = 200
+        self.holidays: list[dict] = []
+        self.requests = 0
+        # Cleared to hold the answers back.
+        self.gate = threading.Event()
+        self.gate.set()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/"
+
+
+class HolidaysRequestHandler(BaseHTTPRequestHandler):
+    server: HolidaysServer
+
+    def do_GET(self):
+        self.server.requests += 1
+        self.server.gate.wait(5)
+
+        body = json.dumps({"holidays": self.server.holidays}).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class HolidaysServerMixin:
+    def start_server(self) -> HolidaysServer:
+        server = HolidaysServer()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)  # type: ignore
+        self.addCleanup(server.shutdown)  # type: ignore
+        self.addCleanup(server.gate.set)  # type: ignore
+
+        previous_url = os.environ.get("HOLIDAYS_URL")
+        os.environ["HOLIDAYS_URL"] = server.url
+        if previous_url is None:
+            self.addCleanup(os.environ.pop, "HOLIDAYS_URL", None)  # type: ignore
+        else:
+            self.addCleanup(os.environ.__setitem__, "HOLIDAYS_URL", previous_url)  # type: ignore
+
+        cache.clear()
+        return server
+
+
+class HolidayCalendarTestCase(HolidaysServerMixin, TestCase):
+    def setUp(self) -> None:
+        self.server = self.start_server()
+
+    def test_failed_fetch_is_cached(self):
+        calendar = HolidayCalendar(memory_ttl=0, max_age=3600, failure_ttl=60)
+        self.server.status = 500
+
+        self.assertEqual(calendar.get_year(2030), {})
+        self.assertEqual(calendar.get_year(2030), {})
+        # The service is not asked again until the failure expires.
+        self.assertEqual(self.server.requests, 1)
+
+        cache.delete("holidays_failed_2030")
+        self.server.status = 200
+        self.server.holidays = [{"date": "2030-01-01", "type": "holiday"}]
+        self.assertEqual(calendar.get_year(2030), {date(2030, 1, 1): "holiday"})
+        self.assertEqual(self.server.requests, 2)
+
+    def test_warm_holidays(self):
+        self.server.holidays = [
+            {"date": "2030-01-01", "type": "holiday"},
+            {"date": "2030-01-05", "type": "weekend"},
+            {"date": "2030-01-06", "type": "unknown"},
+        ]
+
+        call_command("warm_holidays", "--years", "2030", "2031", stdout=StringIO())
+
+        self.assertEqual(
+            dict(Holiday.objects.values_list("date", "type")),
+            {date(2030, 1, 1): "holiday", date(2030, 1, 5): "weekend"},
+        )
+        # Years without holidays are stored too, they are not fetched again.
+        self.assertEqual(
+            sorted(HolidayYear.objects.values_list("year", flat=True)), [2030, 2031]
+        )
+
+        self.server.status = 500
+        with self.assertRaises(CommandError):
+            call_command("warm_holidays", "--years", "2032", stderr=StringIO())
+        self.assertFalse(HolidayYear.objects.filter(year=2032).exists())
+
+
+class HolidayCalendarRefreshTestCase(HolidaysServerMixin, TransactionTestCase):
+    def test_stale_year_is_served_while_refreshing(self):
+        server = self.start_server()
+        calendar = HolidayCalendar(memory_ttl=300, max_age=3600, failure_ttl=60)
+        Holiday.objects.create(date=date(2030, 1, 1), type=Holiday.Type.HOLIDAY)
+        HolidayYear.objects.create(
+            year=2030, fetched_at=timezone.now() - timedelta(seconds=7200)
+        )
+        server.holidays = [{"date": "2030-01-02", "type": "holiday"}]
+        server.gate.clear()
+
+        # Served from the table without waiting for the service.
+        self.assertEqual(calendar.get_year(2030), {date(2030, 1, 1): "holiday"})
+
+        server.gate.set()
+        deadline = time.monotonic() + 5
+        while calendar._refreshing and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(calendar.get_year(2030), {date(2030, 1, 2): "holiday"})
+        self.assertEqual(
+            list(Holiday.objects.values_list("date", flat=True)), [date(2030, 1, 2)]
+        )
+        self.assertEqual(server.requests, 1)
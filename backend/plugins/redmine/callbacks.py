@@ -1,20 +1,20 @@
 from datetime import date
 from django.contrib.auth.models import AbstractUser
 
-from visits.registry.decorators import register_statistics_extra
+from visits.registry.decorators import register_statistics_extra_range
 
 from .serializers import RedmineExtraFieldPayloadSerializer
-from .helpers import get_redmine_user_by_username, get_redmine_user_time_entries_sum
+from .helpers import get_redmine_user_by_username, get_redmine_user_time_entries_sums
 
 
-@register_statistics_extra(
+@register_statistics_extra_range(
     type="redmine", serializer_class=RedmineExtraFieldPayloadSerializer
 )
-def redmine_statisitcs_extra(user: AbstractUser, date: date):
+def redmine_statisitcs_extra(user: AbstractUser, start: date, end: date):
     redmine_user = get_redmine_user_by_username(getattr(user, "username"))
     if not redmine_user:
-        return None
+        return {}
 
-    hours = get_redmine_user_time_entries_sum(redmine_user, date)
+    hours = get_redmine_user_time_entries_sums(redmine_user, start, end)
 
-    return {"hours": hours}
+    return {day: {"hours": day_hours} for day, day_hours in hours.items()}
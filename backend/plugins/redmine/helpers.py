@@ -1,24 +1,129 @@
-from datetime import date
-from functools import reduce
+from datetime import date, datetime, timedelta
+from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
+from django.db.models import Sum
 from django.utils import timezone
 
-from .models import RedmineUser, RedmineTimeEntry
+from .models import RedmineDailyHours, RedmineSyncState, RedmineUser, RedmineTimeEntry
 
 
-def get_redmine_user_time_entries_sum(user: RedmineUser, date: date):
-    cache_key = f"redmine_stats_{user.login}_{date.isoformat()}"
-    today = timezone.localdate()
-    if today != date:
-        cached_result = cache.get(cache_key)
-        if cached_result is not None:
-            return cached_result
+def query_redmine_time_entries_sums(
+    pairs: set[tuple[int, date]],
+) -> dict[tuple[int, date], float]:
+    """
+    Hours spent per (redmine user id, day) pair, computed with a single grouped
+    query on the redmine database. Pairs without time entries are 0.
+    """
+    if not pairs:
+        return {}
 
-    entries = RedmineTimeEntry.objects.filter(user_id=user.id, spent_on=date)
-    hours = reduce(lambda acc, el: acc + el.hours, entries, 0)
-    cache.set(cache_key, hours, timeout=8600)
+    sums = (
+        RedmineTimeEntry.objects.filter(
+            user_id__in={user_id for user_id, _ in pairs},
+            spent_on__range=(
+                min(day for _, day in pairs),
+                max(day for _, day in pairs),
+            ),
+        )
+        .values("user_id", "spent_on")
+        .annotate(total=Sum("hours"))
+        .order_by()
+    )
 
-    return hours
+    result = dict.fromkeys(pairs, 0.0)
+    for row in sums:
+        pair = (row["user_id"], row["spent_on"])
+        if pair in result:
+            result[pair] = float(row["total"])
+
+    return result
+
+
+def save_redmine_daily_hours(hours: dict[tuple[int, date], float], synced_at: datetime):
+    """
+    Upsert per day hours into the local mirror.
+    """
+    objs = [
+        RedmineDailyHours(
+            redmine_user_id=user_id,
+            spent_on=day,
+            hours=day_hours,
+            synced_at=synced_at,
+        )
+        for (user_id, day), day_hours in hours.items()
+    ]
+    unique_fields = (
+        ["redmine_user_id", "spent_on"]
+        if connection.features.supports_update_conflicts_with_target
+        else None
+    )
+
+    RedmineDailyHours.objects.bulk_create(
+        objs,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=["hours", "synced_at"],
+    )
+
+
+def get_redmine_users_time_entries_sums(
+    users: list[RedmineUser], start: date, end: date
+) -> dict[int, dict[date, float]]:
+    """
+    Hours spent per day from `start` to `end` inclusive, keyed by redmine
+    user id, then by date. Days without time entries are 0.
+
+    Hours are read from the local mirror. Days the mirror does not cover yet,
+    and the current day once it is older than `REDMINE_TODAY_MAX_AGE`, are
+    queried from redmine and written back to the mirror.
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+    max_age = timedelta(seconds=settings.REDMINE_TODAY_MAX_AGE)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    state = RedmineSyncState.objects.first()
+    state_synced_at = state.synced_at if state else None
+
+    mirrored = {
+        (user_id, day): (hours, synced_at)
+        for user_id, day, hours, synced_at in RedmineDailyHours.objects.filter(
+            redmine_user_id__in=[user.id for user in users],
+            spent_on__range=(start, end),
+        ).values_list("redmine_user_id", "spent_on", "hours", "synced_at")
+    }
+
+    result = {user.id: {} for user in users}
+    stale = set()
+    for user in users:
+        for day in days:
+            hours, synced_at = mirrored.get((user.id, day), (0.0, None))
+            synced_at = max(filter(None, (synced_at, state_synced_at)), default=None)
+
+            if synced_at is None or (day >= today and synced_at < now - max_age):
+                stale.add((user.id, day))
+            else:
+                result[user.id][day] = hours
+
+    if stale:
+        fetched = query_redmine_time_entries_sums(stale)
+        save_redmine_daily_hours(fetched, now)
+        for (user_id, day), hours in fetched.items():
+            result[user_id][day] = hours
+
+    return result
+
+
+def get_redmine_user_time_entries_sums(
+    user: RedmineUser, start: date, end: date
+) -> dict[date, float]:
+    return get_redmine_users_time_entries_sums([user], start, end)[user.id]
+
+
+def get_redmine_user_time_entries_sum(user: RedmineUser, date: date) -> float:
+    return get_redmine_user_time_entries_sums(user, date, date)[date]
 
 
 def get_redmine_user_by_username(username: str) -> RedmineUser | None:
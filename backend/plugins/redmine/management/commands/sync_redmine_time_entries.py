@@ -0,0 +1,124 @@
+import logging
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Q
+from django.utils import timezone
+
+from plugins.redmine.helpers import (
+    query_redmine_time_entries_sums,
+    save_redmine_daily_hours,
+)
+from plugins.redmine.models import (
+    RedmineDailyHours,
+    RedmineSyncState,
+    RedmineTimeEntry,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Pull changed redmine time entries into the local daily hours mirror"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Time entries read from redmine per query.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=7,
+            help=(
+                "Recent days recomputed in full on every run, so deleted entries "
+                "and entries moved to another day or user are picked up. Days "
+                "older than that keep their hours when an entry is deleted or "
+                "moved away from them, until it is re-run with a larger --days."
+            ),
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Seconds between two runs, run once when 0.",
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        while True:
+            synced_at = timezone.now()
+            pulled = self.sync_changed(options["batch_size"])
+            refreshed = self.sync_recent(options["days"])
+
+            RedmineSyncState.objects.update_or_create(
+                pk=1, defaults={"synced_at": synced_at}
+            )
+            self.stdout.write(
+                f"Pulled {pulled} time entries, refreshed {refreshed} recent days"
+            )
+
+            if not options["interval"]:
+                return
+
+            time.sleep(options["interval"])
+
+    def sync_changed(self, batch_size: int) -> int:
+        """
+        Recompute the days of time entries changed after the watermark.
+
+        Entries are read in (updated_on, id) order and the watermark is saved
+        after every batch, so an interrupted run resumes where it stopped.
+        """
+        state, _ = RedmineSyncState.objects.get_or_create(pk=1)
+        pulled = 0
+
+        while True:
+            entries = RedmineTimeEntry.objects.order_by("updated_on", "id")
+            if state.last_updated_on is not None:
+                entries = entries.filter(
+                    Q(updated_on__gt=state.last_updated_on)
+                    | Q(updated_on=state.last_updated_on, id__gt=state.last_id)
+                )
+
+            batch = list(
+                entries.values_list("id", "user_id", "spent_on", "updated_on")[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                return pulled
+
+            pairs = {(user_id, spent_on) for _, user_id, spent_on, _ in batch}
+            save_redmine_daily_hours(
+                query_redmine_time_entries_sums(pairs), timezone.now()
+            )
+
+            state.last_id, _, _, state.last_updated_on = batch[-1]
+            state.save(update_fields=["last_id", "last_updated_on"])
+            pulled += len(batch)
+
+    def sync_recent(self, days: int) -> int:
+        if days <= 0:
+            return 0
+
+        end = timezone.localdate()
+        start = end - timedelta(days=days - 1)
+
+        pairs = set(
+            RedmineTimeEntry.objects.filter(spent_on__range=(start, end))
+            .values_list("user_id", "spent_on")
+            .distinct()
+        )
+        pairs |= set(
+            RedmineDailyHours.objects.filter(
+                spent_on__range=(start, end), hours__gt=0
+            ).values_list("redmine_user_id", "spent_on")
+        )
+
+        save_redmine_daily_hours(query_redmine_time_entries_sums(pairs), timezone.now())
+
+        return days
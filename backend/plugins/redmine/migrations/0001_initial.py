@@ -0,0 +1,64 @@
+# Generated by Django 5.2.4 on 2025-08-27 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RedmineDailyHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('redmine_user_id', models.IntegerField()),
+                ('spent_on', models.DateField()),
+                ('hours', models.FloatField(default=0.0)),
+                ('synced_at', models.DateTimeField()),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('redmine_user_id', 'spent_on'), name='unique_redmine_daily_hours_user_spent_on')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RedmineSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_updated_on', models.DateTimeField(blank=True, null=True)),
+                ('last_id', models.IntegerField(default=0)),
+                ('synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RedmineTimeEntry',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('user_id', models.IntegerField()),
+                ('project_id', models.IntegerField()),
+                ('issue_id', models.IntegerField(blank=True, null=True)),
+                ('hours', models.DecimalField(decimal_places=7, max_digits=10)),
+                ('spent_on', models.DateField()),
+                ('updated_on', models.DateTimeField()),
+                ('comments', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'time_entries',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RedmineUser',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('login', models.CharField(max_length=255)),
+            ],
+            options={
+                'db_table': 'users',
+                'managed': False,
+            },
+        ),
+    ]
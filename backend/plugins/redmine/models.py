@@ -3,6 +3,7 @@ from django.db import models
 
 T = TypeVar("T", bound=models.Model)
 
+
 class RedmineManager(models.Manager[T]):
     def get_queryset(self):
         return super().get_queryset().using("redmine")
@@ -15,6 +16,7 @@ class RedmineTimeEntry(models.Model):
     issue_id = models.IntegerField(null=True, blank=True)
     hours = models.DecimalField(max_digits=10, decimal_places=7)
     spent_on = models.DateField()
+    updated_on = models.DateTimeField()
     comments = models.TextField(blank=True, null=True)
 
     objects: RedmineManager["RedmineTimeEntry"] = RedmineManager()
@@ -35,3 +37,32 @@ class RedmineUser(models.Model):
         managed = False
         db_table = "users"
         app_label = "redmine"
+
+
+class RedmineDailyHours(models.Model):
+    """
+    Local mirror of redmine hours spent per user and day.
+    """
+
+    redmine_user_id = models.IntegerField()
+    spent_on = models.DateField()
+    hours = models.FloatField(default=0.0)
+    synced_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["redmine_user_id", "spent_on"],
+                name="unique_redmine_daily_hours_user_spent_on",
+            )
+        ]
+
+
+class RedmineSyncState(models.Model):
+    """
+    Watermark of the last time entry pulled into the mirror.
+    """
+
+    last_updated_on = models.DateTimeField(null=True, blank=True)
+    last_id = models.IntegerField(default=0)
+    synced_at = models.DateTimeField(null=True, blank=True)
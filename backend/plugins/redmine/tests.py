@@ -0,0 +1,115 @@
+from datetime import timedelta
+from unittest import SkipTest
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase
+from django.utils import timezone
+
+if not apps.is_installed("plugins.redmine"):
+    raise SkipTest("The redmine plugin is not installed")
+
+from .helpers import get_redmine_users_time_entries_sums
+from .management.commands.sync_redmine_time_entries import Command
+from .models import RedmineDailyHours, RedmineSyncState, RedmineTimeEntry, RedmineUser
+
+
+class RedmineSyncTestCase(TestCase):
+    databases = {"default", "redmine"}
+
+    @classmethod
+    def setUpClass(cls):
+        # Time entries are not managed, the test database has no table for them.
+        with connections["redmine"].schema_editor() as editor:
+            editor.create_model(RedmineTimeEntry)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connections["redmine"].schema_editor() as editor:
+            editor.delete_model(RedmineTimeEntry)
+
+    def setUp(self) -> None:
+        self.today = timezone.localdate()
+        self.user = RedmineUser(id=7, login="test_user")
+
+    def create_entry(self, spent_on, hours, updated_on=None) -> RedmineTimeEntry:
+        return RedmineTimeEntry.objects.create(
+            user_id=self.user.id,
+            project_id=1,
+            hours=hours,
+            spent_on=spent_on,
+            updated_on=updated_on or timezone.now(),
+        )
+
+    def get_mirrored_hours(self, day) -> float:
+        return RedmineDailyHours.objects.get(
+            redmine_user_id=self.user.id, spent_on=day
+        ).hours
+
+    def test_sync_resumes_after_partial_batch(self):
+        updated_on = timezone.now().replace(microsecond=0) - timedelta(hours=1)
+        days = [self.today - timedelta(days=i) for i in range(20, 25)]
+        # Two entries share the timestamp the previous run stopped at.
+        entries = [
+            self.create_entry(days[0], 1, updated_on),
+            self.create_entry(days[1], 2, updated_on),
+            self.create_entry(days[2], 3, updated_on),
+            self.create_entry(days[3], 4, updated_on + timedelta(minutes=1)),
+            self.create_entry(days[4], 5, updated_on + timedelta(minutes=2)),
+        ]
+        RedmineSyncState.objects.create(
+            pk=1, last_updated_on=updated_on, last_id=entries[1].id
+        )
+
+        self.assertEqual(Command().sync_changed(batch_size=2), 3)
+        self.assertFalse(
+            RedmineDailyHours.objects.filter(spent_on__in=days[:2]).exists()
+        )
+        for day, hours in zip(days[2:], (3, 4, 5)):
+            self.assertEqual(self.get_mirrored_hours(day), hours)
+
+        state = RedmineSyncState.objects.get(pk=1)
+        self.assertEqual(state.last_id, entries[-1].id)
+        self.assertEqual(state.last_updated_on, entries[-1].updated_on)
+        self.assertEqual(Command().sync_changed(batch_size=2), 0)
+
+    def test_today_is_refetched_once_stale(self):
+        yesterday = self.today - timedelta(days=1)
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.REDMINE_TODAY_MAX_AGE + 60)
+        RedmineSyncState.objects.create(pk=1, synced_at=stale)
+        RedmineDailyHours.objects.create(
+            redmine_user_id=self.user.id, spent_on=yesterday, hours=2, synced_at=stale
+        )
+        RedmineDailyHours.objects.create(
+            redmine_user_id=self.user.id, spent_on=self.today, hours=1, synced_at=stale
+        )
+        self.create_entry(yesterday, 5)
+        self.create_entry(self.today, 3)
+
+        hours = get_redmine_users_time_entries_sums([self.user], yesterday, self.today)
+
+        # Past days are served from the mirror, the current day from redmine.
+        self.assertEqual(hours[self.user.id], {yesterday: 2.0, self.today: 3.0})
+        self.assertEqual(self.get_mirrored_hours(self.today), 3.0)
+
+        RedmineTimeEntry.objects.all().delete()
+        hours = get_redmine_users_time_entries_sums([self.user], self.today, self.today)
+        self.assertEqual(hours[self.user.id], {self.today: 3.0})
+
+    def test_sync_recent_picks_up_deletions(self):
+        recent = self.today - timedelta(days=2)
+        old = self.today - timedelta(days=10)
+        for day in (recent, old):
+            self.create_entry(day, 4)
+        Command().sync_changed(batch_size=100)
+        self.assertEqual(self.get_mirrored_hours(recent), 4.0)
+
+        RedmineTimeEntry.objects.all().delete()
+        Command().sync_recent(days=7)
+
+        self.assertEqual(self.get_mirrored_hours(recent), 0.0)
+        # Days older than --days are left as they are.
+        self.assertEqual(self.get_mirrored_hours(old), 4.0)
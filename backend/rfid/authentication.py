@@ -1,14 +1,21 @@
-import os
+import hmac
+from django.contrib.auth.models import AnonymousUser
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from .models import RFIDSettings
+from .cache import token_cache
 from .settings import settings
 
 
-class RFIDAuthentication(BaseAuthentication):
+class RFIDServiceAuthentication(BaseAuthentication):
+    """
+    Authenticates the RFID service itself by its service key.
+    """
 
     def authenticate(self, request):
-        rfid_token = request.headers.get(settings.RFID_TOKEN_HEADER_NAME)
+        self.check_service_key(request)
+        return (AnonymousUser(), settings.RFID_SERVICE_TOKEN)
+
+    def check_service_key(self, request):
         service_key = request.headers.get(settings.RFID_SERVICE_TOKEN_HEADER_NAME)
 
         if not service_key:
@@ -16,17 +23,28 @@ class RFIDAuthentication(BaseAuthentication):
                 f"Missing {settings.RFID_SERVICE_TOKEN_HEADER_NAME}"
             )
 
-        if service_key != settings.RFID_SERVICE_TOKEN:
+        if not hmac.compare_digest(
+            service_key.encode(), settings.RFID_SERVICE_TOKEN.encode()
+        ):
             raise AuthenticationFailed(
                 f"Invalid {settings.RFID_SERVICE_TOKEN_HEADER_NAME}"
             )
 
+
+class RFIDAuthentication(RFIDServiceAuthentication):
+    """
+    Authenticates the badge owner of a single RFID service request.
+    """
+
+    def authenticate(self, request):
+        rfid_token = request.headers.get(settings.RFID_TOKEN_HEADER_NAME)
+        self.check_service_key(request)
+
         if not rfid_token:
-            return AuthenticationFailed(f"Missing {settings.RFID_TOKEN_HEADER_NAME}")
+            raise AuthenticationFailed(f"Missing {settings.RFID_TOKEN_HEADER_NAME}")
 
-        try:
-            rfid_settings = RFIDSettings.objects.get(rfid_token=rfid_token)
-        except RFIDSettings.DoesNotExist:
+        user = token_cache.get_user(rfid_token)
+        if user is None:
             raise AuthenticationFailed(f"Invalid {settings.RFID_TOKEN_HEADER_NAME}")
 
-        return (rfid_settings.user, None)
+        return (user, None)
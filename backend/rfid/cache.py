@@ -0,0 +1,74 @@
+import threading
+import time
+
+from django.contrib.auth.models import User
+
+from .models import RFIDSettings
+from .settings import settings
+
+
+class TokenCache:
+    """
+    In-process cache of RFID token to user, unknown tokens included.
+
+    Entries expire after `RFID_TOKEN_CACHE_TTL` seconds. Saves of RFID settings
+    and users made by this process invalidate them immediately, the TTL bounds
+    how long changes made by other processes take to show up.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[User | None, float]] = {}
+
+    def get_user(self, token: str) -> User | None:
+        return self.get_users([token])[token]
+
+    def get_users(self, tokens: list[str]) -> dict[str, User | None]:
+        now = time.monotonic()
+        users: dict[str, User | None] = {}
+        missing = []
+
+        with self._lock:
+            for token in tokens:
+                entry = self._entries.get(token)
+                if entry and entry[1] > now:
+                    users[token] = entry[0]
+                else:
+                    missing.append(token)
+
+        if not missing:
+            return users
+
+        loaded = {
+            rfid_settings.rfid_token: rfid_settings.user
+            for rfid_settings in RFIDSettings.objects.filter(
+                rfid_token__in=missing
+            ).select_related("user")
+        }
+
+        expires_at = now + float(settings.RFID_TOKEN_CACHE_TTL)
+        with self._lock:
+            if len(self._entries) + len(missing) > self.max_size:
+                self._entries.clear()
+
+            for token in missing:
+                users[token] = loaded.get(token)
+                self._entries[token] = (users[token], expires_at)
+
+        return users
+
+    def discard_user(self, user_id: int):
+        with self._lock:
+            self._entries = {
+                token: entry
+                for token, entry in self._entries.items()
+                if entry[0] is None or entry[0].pk != user_id
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.4 on 2025-08-26 10:00
+
+from django.db import migrations, models
+
+
+def normalize_rfid_tokens(apps, schema_editor):
+    """
+    Store blank tokens as NULL and keep a duplicated token only for its
+    first owner, so the unique index can be created.
+    """
+    RFIDSettings = apps.get_model('rfid', 'RFIDSettings')
+
+    RFIDSettings.objects.filter(rfid_token='').update(rfid_token=None)
+
+    seen = set()
+    duplicates = []
+    for id, token in (
+        RFIDSettings.objects.exclude(rfid_token=None)
+        .order_by('id')
+        .values_list('id', 'rfid_token')
+    ):
+        if token in seen:
+            duplicates.append(id)
+        seen.add(token)
+
+    RFIDSettings.objects.filter(id__in=duplicates).update(rfid_token=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rfid', '0003_alter_rfidsettings_rfid_token'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_rfid_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='rfidsettings',
+            name='rfid_token',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+    ]
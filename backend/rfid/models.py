@@ -3,5 +3,11 @@ from django.contrib.auth.models import User
 
 
 class RFIDSettings(models.Model):
-    rfid_token = models.CharField(max_length=255, blank=True, null=True)
+    rfid_token = models.CharField(max_length=255, blank=True, null=True, unique=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE)
+
+    def save(self, *args, **kwargs):
+        # Blank tokens are stored as NULL, which the unique index allows
+        # for any number of users.
+        self.rfid_token = self.rfid_token or None
+        super().save(*args, **kwargs)
@@ -0,0 +1,11 @@
+from rest_framework.permissions import BasePermission
+from .settings import settings
+
+
+class IsRFIDService(BasePermission):
+    """
+    Allows requests authenticated by RFIDServiceAuthentication.
+    """
+
+    def has_permission(self, request, view):
+        return request.auth == settings.RFID_SERVICE_TOKEN
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import RFIDSettings
+from .services import RFIDEvent
 
 
 class RFIDSettingsModelSerializer(serializers.ModelSerializer):
@@ -7,3 +8,23 @@ class RFIDSettingsModelSerializer(serializers.ModelSerializer):
     class Meta:
         model = RFIDSettings
         fields = ["rfid_token"]
+
+
+class RFIDEventSerializer(serializers.Serializer):
+    code = serializers.CharField()
+    event = serializers.ChoiceField(choices=RFIDEvent.choices)
+    timestamp = serializers.DateTimeField()
+
+
+class RFIDBatchRequestSerializer(serializers.Serializer):
+    records = RFIDEventSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class RFIDBatchResponseSerializer(serializers.Serializer):
+
+    class RFIDEventResultSerializer(serializers.Serializer):
+        index = serializers.IntegerField()
+        status_code = serializers.IntegerField()
+        detail = serializers.CharField()
+
+    results = RFIDEventResultSerializer(many=True)
@@ -0,0 +1,84 @@
+from datetime import datetime
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from visits.models import Session, SessionEntry
+from visits.services import SessionService
+
+from .cache import token_cache
+
+
+class RFIDEvent:
+    ENTER = "enter"
+    EXIT = "exit"
+
+    choices = [ENTER, EXIT]
+
+
+class RFIDService:
+    """
+    Service applying badge events to user sessions.
+    Every event locks the user and the session it changes, so concurrent or
+    redelivered taps of one user are applied one after another.
+    """
+
+    def __init__(self):
+        self.session_service = SessionService()
+
+    def enter(self, user: User, time: datetime):
+        self.session_service.enter(
+            user, type=SessionEntry.SessionEntryType.WORK, time=time
+        )
+
+    @transaction.atomic
+    def exit(self, user: User, time: datetime):
+        self.session_service.lock_user(user)
+        session = self.session_service.get_current_session(user)
+        if not session:
+            raise Session.DoesNotExist()
+
+        session = self.session_service.lock_session(session)
+
+        last_entry = session.get_last_entry()
+        if not last_entry:
+            raise SessionEntry.DoesNotExist()
+
+        if last_entry.type == SessionEntry.SessionEntryType.WORK:
+            last_entry.close(time=time)
+
+    def process(self, user: User, event: str, time: datetime):
+        if event == RFIDEvent.ENTER:
+            self.enter(user, time)
+        else:
+            self.exit(user, time)
+
+    def process_batch(self, records: list[dict]) -> list[dict]:
+        """
+        Apply `records` of `code`, `event` and `timestamp` in order within one
+        transaction. Every record runs in its own savepoint, so a failing
+        record is rolled back alone. Returns a result per record.
+        """
+        users = token_cache.get_users(list({record["code"] for record in records}))
+
+        results = []
+        with transaction.atomic():
+            for index, record in enumerate(records):
+                results.append({"index": index, **self._process_record(users, record)})
+
+        return results
+
+    def _process_record(self, users: dict[str, User | None], record: dict) -> dict:
+        user = users.get(record["code"])
+        if user is None:
+            return {"status_code": 401, "detail": "Invalid code"}
+
+        try:
+            with transaction.atomic():
+                self.process(user, record["event"], record["timestamp"])
+        except (Session.DoesNotExist, SessionEntry.DoesNotExist):
+            return {"status_code": 404, "detail": "No session to exit"}
+        except ValueError as e:
+            return {"status_code": 400, "detail": str(e)}
+
+        return {"status_code": 200, "detail": f"RFID {record['event']} processed"}
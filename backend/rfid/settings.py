@@ -7,6 +7,7 @@ class RFIDSettings:
     RFID_SERVICE_TOKEN: str
     RFID_TOKEN_HEADER_NAME: str
     RFID_SERVICE_TOKEN_HEADER_NAME: str
+    RFID_TOKEN_CACHE_TTL: float
 
     DEFAULTS = {
         "RFID_SERVICE_TOKEN": os.getenv(
@@ -14,6 +15,7 @@ class RFIDSettings:
         ),
         "RFID_TOKEN_HEADER_NAME": "X-RFID-Key",
         "RFID_SERVICE_TOKEN_HEADER_NAME": "X-Service-Key",
+        "RFID_TOKEN_CACHE_TTL": float(os.getenv("RFID_TOKEN_CACHE_TTL") or 60),
     }
 
     def __getattr__(self, name):
@@ -1,9 +1,23 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
+from .cache import token_cache
 from .models import RFIDSettings
 
 @receiver(post_save, sender=User)
 def user_created_or_updated(sender, instance: User, created: bool, **kwargs):
     if created:
-        RFIDSettings.objects.get_or_create(user=instance)
\ No newline at end of file
+        RFIDSettings.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance: User, **kwargs):
+    token_cache.discard_user(instance.pk)
+
+
+@receiver(post_save, sender=RFIDSettings)
+@receiver(post_delete, sender=RFIDSettings)
+def rfid_settings_changed(sender, instance: RFIDSettings, **kwargs):
+    # The previous token of the user is unknown here, drop everything.
+    token_cache.clear()
@@ -1,8 +1,13 @@
+import threading
+from datetime import timedelta
 from django.contrib.auth.models import User
-from django.test import TestCase
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
 from django.utils import timezone
 
 from .models import RFIDSettings
+from .services import RFIDEvent, RFIDService
 from .settings import settings
 from visits.models import Session, SessionEntry
 
@@ -63,3 +68,104 @@ class RFIDSessionTestCase(TestCase):
         last_entry = session.get_last_entry()
         self.assertIsNotNone(last_entry)
         self.assertIsNotNone(last_entry.end)  # type: ignore
+
+    def test_batch(self):
+        start = timezone.localtime().replace(microsecond=0)
+        records = [
+            {"code": "test", "event": "enter", "timestamp": start.isoformat()},
+            {"code": "unknown", "event": "enter", "timestamp": start.isoformat()},
+            {"code": "test", "event": "enter", "timestamp": start.isoformat()},
+            {
+                "code": "test",
+                "event": "exit",
+                "timestamp": (start + timedelta(hours=1)).isoformat(),
+            },
+        ]
+
+        response = self.client.post(
+            "/api/v1/rfid/batch",
+            {"records": records},
+            content_type="application/json",
+            headers={settings.RFID_SERVICE_TOKEN_HEADER_NAME: "invalid"},
+        )
+        self.assertEqual(response.status_code, 403)
+
+        response = self.client.post(
+            "/api/v1/rfid/batch",
+            {"records": records},
+            content_type="application/json",
+            headers={
+                settings.RFID_SERVICE_TOKEN_HEADER_NAME: settings.RFID_SERVICE_TOKEN
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [r["status_code"] for r in response.data["results"]], [200, 401, 400, 200]  # type: ignore
+        )
+
+        session = Session.objects.get(user=self.user)
+        last_entry = session.get_last_entry()
+        self.assertEqual(session.entries.count(), 1)  # type: ignore
+        self.assertEqual(last_entry.end, start + timedelta(hours=1))  # type: ignore
+
+    def test_token_change(self):
+        headers = {
+            settings.RFID_TOKEN_HEADER_NAME: "test",
+            settings.RFID_SERVICE_TOKEN_HEADER_NAME: settings.RFID_SERVICE_TOKEN,
+        }
+        response = self.client.post("/api/v1/rfid/enter", headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+        self.rfid.rfid_token = "changed"
+        self.rfid.save()
+
+        response = self.client.post("/api/v1/rfid/exit", headers=headers)
+        self.assertEqual(response.status_code, 403)
+
+        headers[settings.RFID_TOKEN_HEADER_NAME] = "changed"
+        response = self.client.post("/api/v1/rfid/exit", headers=headers)
+        self.assertEqual(response.status_code, 200)
+
+        self.rfid.rfid_token = ""
+        self.rfid.save()
+        self.rfid.refresh_from_db()
+        self.assertIsNone(self.rfid.rfid_token)
+
+
+class RFIDConcurrencyTestCase(TransactionTestCase):
+    # SQLite locks the whole table instead of the tapped rows.
+    @skipUnlessDBFeature("has_select_for_update")
+    def test_parallel_taps(self):
+        users = [User.objects.create_user(username=f"user_{i}") for i in range(4)]
+        errors = []
+
+        def tap(thread: int):
+            rfid_service = RFIDService()
+            try:
+                for i in range(25):
+                    user = users[(thread + i) % len(users)]
+                    event = RFIDEvent.ENTER if i % 3 else RFIDEvent.EXIT
+                    try:
+                        rfid_service.process(user, event, timezone.localtime())
+                    except (ValueError, ObjectDoesNotExist):
+                        pass  # Enter over an open entry or exit without one.
+                    except Exception as e:
+                        errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=tap, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+        for user in users:
+            sessions = Session.objects.filter(user=user)
+            self.assertEqual(sessions.count(), 1)
+
+            entries = list(sessions[0].entries.order_by("start"))  # type: ignore
+            self.assertTrue(entries)
+            self.assertTrue(all(entry.end for entry in entries[:-1]))
@@ -1,8 +1,9 @@
 from django.urls import path
-from .views import EnterView, ExitView, SettingsView
+from .views import BatchView, EnterView, ExitView, SettingsView
 
 urlpatterns = [
     path('enter', EnterView.as_view()),
     path('exit', ExitView.as_view()),
+    path('batch', BatchView.as_view()),
     path("rfid", SettingsView.as_view()),
 ]
\ No newline at end of file
@@ -9,12 +9,17 @@ from rest_framework import status
 from rest_framework.exceptions import APIException, ValidationError, NotFound
 from drf_spectacular.utils import extend_schema
 
-from visits.models import SessionEntry
-from visits.services import SessionService
-
-from .authentication import RFIDAuthentication
-from .serializers import RFIDSettingsModelSerializer
+from visits.models import Session, SessionEntry
+
+from .authentication import RFIDAuthentication, RFIDServiceAuthentication
+from .permissions import IsRFIDService
+from .serializers import (
+    RFIDBatchRequestSerializer,
+    RFIDBatchResponseSerializer,
+    RFIDSettingsModelSerializer,
+)
 from .models import RFIDSettings
+from .services import RFIDService
 
 
 @extend_schema(tags=["rfid"])
@@ -32,14 +37,10 @@ class EnterView(views.APIView):
     authentication_classes = [RFIDAuthentication]
 
     def post(self, request):
-        session_service = SessionService()
+        rfid_service = RFIDService()
 
         try:
-            session_service.enter(
-                request.user,
-                type=SessionEntry.SessionEntryType.WORK,
-                time=timezone.localtime(),
-            )
+            rfid_service.enter(request.user, time=timezone.localtime())
         except ValueError as e:
             raise ValidationError(detail=e)
         except Exception as e:
@@ -54,23 +55,31 @@ class ExitView(views.APIView):
     authentication_classes = [RFIDAuthentication]
 
     def post(self, request):
-        session_service = SessionService()
-        session = session_service.get_current_session(request.user)
-        if not session:
-            raise NotFound()
+        rfid_service = RFIDService()
 
-        last_entry = session.get_last_entry()
-        if not last_entry:
+        try:
+            rfid_service.exit(request.user, time=timezone.now())
+        except (Session.DoesNotExist, SessionEntry.DoesNotExist):
             raise NotFound()
-
-        if last_entry.type == SessionEntry.SessionEntryType.WORK:
-            try:
-                last_entry.close(time=timezone.now())
-            except SessionEntry.DoesNotExist as e:
-                raise NotFound(detail=e)
-            except ValueError as e:
-                raise ValidationError(detail=e)
-            except Exception as e:
-                raise APIException(detail=e)
+        except ValueError as e:
+            raise ValidationError(detail=e)
+        except Exception as e:
+            raise APIException(detail=e)
 
         return Response({"message": "RFID exit processed"}, status=status.HTTP_200_OK)
+
+
+@extend_schema(exclude=True)
+class BatchView(views.APIView):
+    permission_classes = [IsRFIDService]
+    authentication_classes = [RFIDServiceAuthentication]
+
+    def post(self, request):
+        serializer = RFIDBatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        rfid_service = RFIDService()
+        results = rfid_service.process_batch(serializer.validated_data["records"])  # type: ignore
+
+        response = RFIDBatchResponseSerializer({"results": results})
+        return Response(response.data, status=status.HTTP_200_OK)
@@ -0,0 +1,71 @@
+import hashlib
+
+from django.contrib.auth.models import User
+
+from .models import Avatar, UserCard
+
+
+def get_full_name(user: User) -> str:
+    return (
+        f"{(user.first_name or '').capitalize()} {(user.last_name or '').capitalize()}"
+        if user.first_name and user.last_name
+        else f"{user.username.capitalize()}"
+    )
+
+
+def get_search_name(text: str) -> str:
+    """
+    Normalized form of names and search queries, for prefix matching.
+    """
+    return " ".join(text.split()).lower()
+
+
+def get_gravatar_url(email: str | None) -> str:
+    email = (email or "").strip().lower()
+    if not email:
+        return ""
+
+    email_hash = hashlib.md5(email.encode("utf-8")).hexdigest()
+    return f"https://www.gravatar.com/avatar/{email_hash}"
+
+
+def get_avatar_urls(user: User, avatar: Avatar | None) -> tuple[str, str]:
+    """
+    Avatar URL and JPEG fallback URL: the thumbnails once generated, the
+    uploaded image until then and the gravatar without an upload.
+    """
+    if avatar is not None and avatar.has_thumbnails:
+        fallback = avatar.thumbnail_jpeg.url if avatar.thumbnail_jpeg else ""
+        return avatar.thumbnail.url, fallback
+
+    if avatar is not None and avatar.avatar:
+        return avatar.avatar.url, ""
+
+    return get_gravatar_url(user.email), ""
+
+
+def refresh_user_card(user: User) -> UserCard:
+    """
+    Recompute the card of `user`, it is written only when it changed.
+    """
+    avatar = Avatar.objects.filter(user=user).first()
+    avatar_url, avatar_fallback_url = get_avatar_urls(user, avatar)
+    full_name = get_full_name(user)
+    values = {
+        "full_name": full_name,
+        "search_name": get_search_name(full_name),
+        "avatar_url": avatar_url,
+        "avatar_fallback_url": avatar_fallback_url,
+    }
+
+    card, created = UserCard.objects.get_or_create(user=user, defaults=values)
+    if not created and any(
+        getattr(card, name) != value for name, value in values.items()
+    ):
+        for name, value in values.items():
+            setattr(card, name, value)
+        card.save()
+
+    # Keeps `user.card` current for the caller.
+    user.card = card  # type: ignore
+    return card
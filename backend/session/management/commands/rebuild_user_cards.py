@@ -0,0 +1,39 @@
+from typing import Any
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+
+from session.cards import refresh_user_card
+from session.models import Avatar
+from session.thumbnails import generate_avatar_thumbnails
+
+
+class Command(BaseCommand):
+    help = "Recompute user cards, generating missing avatar thumbnails"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate thumbnails that are up to date too.",
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        thumbnails = 0
+        for avatar in Avatar.objects.exclude(avatar="").exclude(avatar__isnull=True):
+            if avatar.has_thumbnails and not options["force"]:
+                continue
+
+            try:
+                generate_avatar_thumbnails(avatar)
+                thumbnails += 1
+            except Exception as e:
+                self.stderr.write(f"Failed to generate thumbnails of {avatar.pk}: {e}")
+
+        users = User.objects.all()
+        for user in users.iterator():
+            refresh_user_card(user)
+
+        self.stdout.write(
+            f"Generated {thumbnails} thumbnails, refreshed {users.count()} cards"
+        )
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.4 on 2025-08-29 11:20
+
+import django.db.models.deletion
+import hashlib
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_user_cards(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    Avatar = apps.get_model("session", "Avatar")
+    UserCard = apps.get_model("session", "UserCard")
+
+    avatars = {avatar.user_id: avatar for avatar in Avatar.objects.all()}
+    cards = []
+    for user in User.objects.all():
+        if user.first_name and user.last_name:
+            full_name = f"{user.first_name.capitalize()} {user.last_name.capitalize()}"
+        else:
+            full_name = user.username.capitalize()
+
+        avatar = avatars.get(user.id)
+        email = (user.email or "").strip().lower()
+        if avatar is not None and avatar.avatar:
+            avatar_url = avatar.avatar.url
+        elif email:
+            avatar_url = f"https://www.gravatar.com/avatar/{hashlib.md5(email.encode('utf-8')).hexdigest()}"
+        else:
+            avatar_url = ""
+
+        cards.append(UserCard(user_id=user.id, full_name=full_name, avatar_url=avatar_url))
+
+    UserCard.objects.bulk_create(cards, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0002_alter_avatar_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='avatar',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='avatars/thumbnails'),
+        ),
+        migrations.AddField(
+            model_name='avatar',
+            name='thumbnail_jpeg',
+            field=models.ImageField(blank=True, null=True, upload_to='avatars/thumbnails'),
+        ),
+        migrations.AddField(
+            model_name='avatar',
+            name='thumbnail_source',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.CreateModel(
+            name='UserCard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('full_name', models.CharField(max_length=320)),
+                ('avatar_url', models.CharField(blank=True, max_length=500)),
+                ('avatar_fallback_url', models.CharField(blank=True, max_length=500)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='card', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(create_user_cards, migrations.RunPython.noop),
+    ]
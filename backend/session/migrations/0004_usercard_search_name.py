@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2025-08-30 10:05
+
+from django.db import migrations, models
+
+
+def fill_search_names(apps, schema_editor):
+    UserCard = apps.get_model("session", "UserCard")
+
+    cards = list(UserCard.objects.only("id", "full_name"))
+    for card in cards:
+        card.search_name = " ".join(card.full_name.split()).lower()
+
+    UserCard.objects.bulk_update(cards, ["search_name"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('session', '0003_avatar_thumbnails_usercard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercard',
+            name='search_name',
+            field=models.CharField(blank=True, db_index=True, max_length=320),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+    ]
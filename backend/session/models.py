@@ -5,3 +5,32 @@ from django.contrib.auth.models import User
 class Avatar(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="avatar")
     avatar = models.ImageField(upload_to="avatars", blank=True, null=True)
+    thumbnail = models.ImageField(upload_to="avatars/thumbnails", blank=True, null=True)
+    thumbnail_jpeg = models.ImageField(
+        upload_to="avatars/thumbnails", blank=True, null=True
+    )
+    # Name of the avatar file the thumbnails were generated from.
+    thumbnail_source = models.CharField(max_length=255, blank=True)
+
+    @property
+    def has_thumbnails(self) -> bool:
+        return bool(
+            self.avatar and self.thumbnail and self.thumbnail_source == self.avatar.name
+        )
+
+
+class UserCard(models.Model):
+    """
+    Display data of a user precomputed for user lists and the presence board.
+
+    Avatar URLs are media relative for uploaded avatars and absolute for
+    gravatars.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="card")
+    full_name = models.CharField(max_length=320)
+    # Lower cased full name, indexed for prefix searches.
+    search_name = models.CharField(max_length=320, blank=True, db_index=True)
+    avatar_url = models.CharField(max_length=500, blank=True)
+    avatar_fallback_url = models.CharField(max_length=500, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
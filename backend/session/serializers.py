@@ -1,11 +1,11 @@
-import hashlib
 from rest_framework import serializers
 from rest_framework.request import Request
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 
-from .models import Avatar
+from .cards import get_avatar_urls, get_full_name
+from .models import Avatar, UserCard
 
 
 class LoginSerializer(serializers.Serializer):
@@ -40,30 +40,62 @@ class AvatarModelSerializer(serializers.ModelSerializer):
 
 
 class UserModelSerializer(serializers.ModelSerializer):
+    """
+    Reads names and avatars from the precomputed user card, select `card`
+    along with the users. `avatar_fallback` is a JPEG of the WebP avatar
+    thumbnail for clients without WebP support, null until it is generated.
+
+    `fields` limits the output to a subset of the fields.
+    """
+
     avatar = serializers.SerializerMethodField()
+    avatar_fallback = serializers.SerializerMethodField()
     full_name = serializers.SerializerMethodField()
 
     class Meta:
         model = User
-        fields = ["id", "full_name", "avatar", "email", "is_superuser"]
+        fields = [
+            "id",
+            "full_name",
+            "avatar",
+            "avatar_fallback",
+            "email",
+            "is_superuser",
+        ]
+
+    def __init__(self, *args, fields: list[str] | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     def get_full_name(self, obj: User):
-        return (
-            f"{(obj.first_name or "").capitalize()} {(obj.last_name or "").capitalize()}"
-            if obj.first_name and obj.last_name
-            else f"{obj.username.capitalize()}"
-        )
+        card: UserCard | None = getattr(obj, "card", None)
+        return card.full_name if card else get_full_name(obj)
 
     def get_avatar(self, obj: User):
+        url, _ = self.get_avatar_urls(obj)
+        return self.get_absolute_url(url) if url else None
+
+    def get_avatar_fallback(self, obj: User):
+        _, url = self.get_avatar_urls(obj)
+        return self.get_absolute_url(url) if url else None
+
+    def get_avatar_urls(self, obj: User) -> tuple[str, str]:
+        card: UserCard | None = getattr(obj, "card", None)
+        if card:
+            return card.avatar_url, card.avatar_fallback_url
+
+        return get_avatar_urls(obj, getattr(obj, "avatar", None))
 
-        if hasattr(obj, "avatar") and obj.avatar and obj.avatar.avatar:
-            request: Request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(obj.avatar.avatar.url)
+    def get_absolute_url(self, url: str) -> str:
+        request: Request = self.context.get("request")
+        if not request or not url.startswith("/"):
+            return url
 
-        email = (obj.email or "").strip().lower()
-        if not email:
-            return None
+        # Resolved once per serializer, instead of for every user.
+        if not hasattr(self, "_base_url"):
+            self._base_url = request.build_absolute_uri("/").rstrip("/")
 
-        email_hash = hashlib.md5(email.encode("utf-8")).hexdigest()
-        return f"https://www.gravatar.com/avatar/{email_hash}"
+        return self._base_url + url
@@ -1,34 +1,33 @@
 from django.dispatch import receiver
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.contrib.auth.models import User
-from channels.layers import get_channel_layer, BaseChannelLayer
-from asgiref.sync import async_to_sync
+from visits.board import board_cache
 
+from .cards import refresh_user_card
 from .models import Avatar
+from .thumbnails import generate_thumbnails_on_commit
 
 
 @receiver(post_save, sender=User)
 def user_created_or_updated(sender, instance, created, **kwargs):
     """
-    Create user profile for new registered user
+    Create user profile for new registered user and keep the user card in
+    sync with names and email.
     """
     if created:
         Avatar.objects.get_or_create(user=instance)
 
+    refresh_user_card(instance)
+
 
 @receiver(post_save, sender=Avatar)
 def user_avatar_changed(sender, instance: Avatar, created, *args, **kwargs):
     if created:
         return
 
-    channel_layer: BaseChannelLayer | None = get_channel_layer()
-
-    if channel_layer is None:
-        return
-
-    message = {
-        "type": "user_avatar_changed",
-        "payload": {"user_id": instance.user.id, "avatar_url": instance.avatar.url},
-    }
-
-    async_to_sync(channel_layer.group_send)("visits", message)
+    # Serves the uploaded image until the thumbnails are ready, clients are
+    # notified once they are.
+    refresh_user_card(instance.user)
+    transaction.on_commit(board_cache.invalidate)
+    generate_thumbnails_on_commit(instance.pk)
@@ -0,0 +1,142 @@
+import hashlib
+import logging
+import os
+import queue
+import threading
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+from visits.board import board_cache
+from visits.broadcast import broadcast_on_commit
+
+from .cards import refresh_user_card
+from .models import Avatar
+
+logger = logging.getLogger(__name__)
+
+
+def generate_avatar_thumbnails(avatar: Avatar, size: int | None = None):
+    """
+    Write square WebP and JPEG thumbnails of the uploaded avatar and replace
+    the previous ones.
+    """
+    size = size or settings.AVATAR_THUMBNAIL_SIZE
+    previous = [f.name for f in (avatar.thumbnail, avatar.thumbnail_jpeg) if f]
+
+    if avatar.avatar:
+        with avatar.avatar.open("rb") as file:
+            image = ImageOps.exif_transpose(Image.open(file))
+            image = ImageOps.fit(
+                image.convert("RGBA"), (size, size), Image.Resampling.LANCZOS
+            )
+
+        # JPEG has no alpha channel, transparent areas become white.
+        flat = Image.new("RGB", image.size, (255, 255, 255))
+        flat.paste(image, mask=image.getchannel("A"))
+
+        name = f"{avatar.user_id}-{hashlib.md5(avatar.avatar.name.encode()).hexdigest()[:12]}"
+        avatar.thumbnail.save(
+            f"{name}.webp", _encode(image, "WEBP", quality=80), save=False
+        )
+        avatar.thumbnail_jpeg.save(
+            f"{name}.jpg", _encode(flat, "JPEG", quality=85, optimize=True), save=False
+        )
+        avatar.thumbnail_source = avatar.avatar.name
+    else:
+        avatar.thumbnail = None
+        avatar.thumbnail_jpeg = None
+        avatar.thumbnail_source = ""
+
+    # Updated without save(), which would schedule the thumbnails again.
+    Avatar.objects.filter(pk=avatar.pk).update(
+        thumbnail=avatar.thumbnail.name or None,
+        thumbnail_jpeg=avatar.thumbnail_jpeg.name or None,
+        thumbnail_source=avatar.thumbnail_source,
+    )
+
+    for name in previous:
+        if name not in (avatar.thumbnail.name, avatar.thumbnail_jpeg.name):
+            avatar.thumbnail.storage.delete(name)
+
+
+def _encode(image: Image.Image, format: str, **options) -> ContentFile:
+    buffer = BytesIO()
+    image.save(buffer, format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+class ThumbnailWorker:
+    """
+    Generates avatar thumbnails from a background thread, then refreshes the
+    user card and tells board clients about the new avatar.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue[int] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, avatar_id: int):
+        self._ensure_thread()
+        self._queue.put(avatar_id)
+
+    def process(self, avatar_id: int):
+        avatar = Avatar.objects.select_related("user").filter(pk=avatar_id).first()
+        if avatar is None:
+            return
+
+        try:
+            generate_avatar_thumbnails(avatar)
+        except Exception as e:
+            # The card keeps pointing to the uploaded image.
+            logger.error(f"Failed to generate thumbnails of avatar {avatar_id}: {e}")
+
+        card = refresh_user_card(avatar.user)
+        board_cache.invalidate()
+
+        message = {
+            "type": "user_avatar_changed",
+            "payload": {
+                "user_id": avatar.user_id,
+                "avatar_url": card.avatar_url,
+                "avatar_fallback_url": card.avatar_fallback_url,
+            },
+        }
+        broadcast_on_commit(("avatar", avatar.user_id), avatar.user_id, message)
+
+    def _ensure_thread(self):
+        # The thread does not survive a fork of the worker process.
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="avatar-thumbnails", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            avatar_id = self._queue.get()
+            try:
+                self.process(avatar_id)
+            except Exception as e:
+                logger.error(f"Failed to process avatar {avatar_id}: {e}")
+            finally:
+                close_old_connections()
+
+
+thumbnail_worker = ThumbnailWorker()
+
+
+def generate_thumbnails_on_commit(avatar_id: int):
+    transaction.on_commit(lambda: thumbnail_worker.enqueue(avatar_id))
@@ -15,7 +15,8 @@ class SessionAdmin(admin.ModelAdmin):
         extra = 0
         ordering= ("start",)
 
-    list_display = ("session",)
+    list_display = ("session", "status")
+    list_filter = ("status",)
     inlines = [SessionEntryInline]
 
     @admin.display()
@@ -0,0 +1,124 @@
+import hashlib
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Session
+from .services import SessionService
+
+
+class BoardCache:
+    """
+    Process-level snapshot of today's presence board.
+
+    The snapshot is rebuilt after `ttl` seconds, so changes made by other
+    processes show up within it. Changes made by this process are patched
+    into the snapshot as soon as they commit.
+    """
+
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._items: dict[int, dict] | None = None
+        # User id to the date and id of the session shown for the user.
+        self._sessions: dict[int, tuple[date, int]] = {}
+        self._etag = ""
+        self._built_at = 0.0
+
+    def get(self) -> tuple[list[dict], str]:
+        """
+        Board items shaped for UserSessionSerializer and their ETag.
+        """
+        ttl = settings.BOARD_CACHE_TTL if self.ttl is None else self.ttl
+
+        with self._lock:
+            if self._items is None or time.monotonic() - self._built_at > ttl:
+                self._build()
+
+            return list(self._items.values()), self._etag  # type: ignore
+
+    def invalidate(self):
+        with self._lock:
+            self._items = None
+
+    def update_session(self, session: Session):
+        """
+        Patch the board with the stored state of `session`.
+        """
+        last_entry = session.last_entry
+        state = {
+            "status": session.status,
+            "comment": getattr(last_entry, "comment", ""),
+            "time": getattr(last_entry, "start", None),
+        }
+
+        with self._lock:
+            if self._items is None:
+                return
+
+            item = self._items.get(session.user_id)
+            if item is None:
+                self._items = None
+                return
+
+            current = self._sessions.get(session.user_id)
+            if current and current > (session.date, session.pk):
+                return
+
+            self._sessions[session.user_id] = (session.date, session.pk)
+            item["session"] = state
+            self._etag = self._compute_etag()
+
+    def update_session_on_commit(self, session: Session):
+        transaction.on_commit(lambda: self.update_session(session))
+
+    def _build(self):
+        session_service = SessionService()
+        active_users_with_sessions = session_service.get_active_user_with_sessions()
+
+        self._items = {}
+        self._sessions = {}
+        for item in session_service.get_board(active_users_with_sessions):
+            self._items[item["user"].id] = item
+
+        for us in active_users_with_sessions:
+            session: Session | None = us.get("session")
+            if session:
+                self._sessions[session.user_id] = (session.date, session.pk)
+
+        self._etag = self._compute_etag()
+        self._built_at = time.monotonic()
+
+    def _compute_etag(self) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+
+        for user_id, item in sorted(self._items.items()):  # type: ignore
+            user = item["user"]
+            card = getattr(user, "card", None)
+            state = item["session"]
+            digest.update(
+                repr(
+                    (
+                        user_id,
+                        user.username,
+                        user.first_name,
+                        user.last_name,
+                        user.email,
+                        user.is_superuser,
+                        getattr(card, "full_name", ""),
+                        getattr(card, "avatar_url", ""),
+                        getattr(card, "avatar_fallback_url", ""),
+                        state["status"],
+                        state["comment"],
+                        state["time"],
+                    )
+                ).encode()
+            )
+
+        return f'"{digest.hexdigest()}"'
+
+
+board_cache = BoardCache()
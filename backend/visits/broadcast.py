@@ -0,0 +1,112 @@
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Hashable
+
+from asgiref.sync import async_to_sync
+from channels.layers import BaseChannelLayer, get_channel_layer
+from django.db import close_old_connections, transaction
+
+from .stream import BOARD_GROUP, user_topics
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastDispatcher:
+    """
+    Sends board events from a background thread to the board group, tagged
+    with the topics of the user they are about.
+
+    Messages queued with the same key within `window` seconds are coalesced,
+    only the latest one is sent.
+    """
+
+    def __init__(self, window: float = 0.05):
+        self.window = window
+        self._queue: queue.Queue[tuple[Hashable, int, dict]] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def enqueue(self, key: Hashable, user_id: int, message: dict):
+        self._ensure_thread()
+        self._queue.put((key, user_id, message))
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """
+        Wait until the queued messages are sent, for processes that exit
+        right after queueing them. False when `timeout` expired first.
+        """
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+
+        return True
+
+    def _ensure_thread(self):
+        # The thread does not survive a fork of the worker process.
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name="broadcast-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            key, user_id, message = self._queue.get()
+            pending = {key: (user_id, message)}
+            received = 1
+
+            deadline = time.monotonic() + self.window
+            while (timeout := deadline - time.monotonic()) > 0:
+                try:
+                    key, user_id, message = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+
+                received += 1
+                pending.pop(key, None)
+                pending[key] = (user_id, message)
+
+            self._send(pending.values())
+            for _ in range(received):
+                self._queue.task_done()
+
+    def _send(self, messages):
+        channel_layer: BaseChannelLayer | None = get_channel_layer()
+        if channel_layer is None:
+            return
+
+        for user_id, message in messages:
+            try:
+                message = {**message, "topics": user_topics(user_id)}
+                async_to_sync(channel_layer.group_send)(BOARD_GROUP, message)
+            except Exception as e:
+                logger.error(f"Failed to broadcast {message.get('type')}: {e}")
+
+        close_old_connections()
+
+
+dispatcher = BroadcastDispatcher()
+
+
+def broadcast_on_commit(key: Hashable, user_id: int, message: dict):
+    """
+    Queue a board event about `user_id` to be sent once the current
+    transaction commits. Messages of one transaction sharing a key are sent
+    once.
+    """
+    transaction.on_commit(lambda: dispatcher.enqueue(key, user_id, message))
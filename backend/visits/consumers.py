@@ -1,11 +1,128 @@
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
 
+from .board import board_cache
+from .representation import user_session_representation
+from .stream import ALL_TOPIC, board_stream, parse_topics, topic_user_ids
+
+
+class ScopeUriBuilder:
+    """
+    Builds absolute URIs from a websocket scope the way
+    `request.build_absolute_uri` does for serializers.
+    """
+
+    def __init__(self, scope: dict):
+        headers = dict(scope.get("headers", []))
+        self.host = headers.get(b"host", b"").decode()
+        self.scheme = "https" if scope.get("scheme") == "wss" else "http"
+
+    def build_absolute_uri(self, location: str) -> str:
+        if not self.host or "://" in location:
+            return location
+
+        return f"{self.scheme}://{self.host}{location}"
+
 
 class NotificationsConsumer(AsyncJsonWebsocketConsumer):
-    groups = ["visits"]
+    """
+    Sends a board snapshot on connect, followed by board events carrying a
+    cursor. A client reconnecting with `?since=<cursor>` gets only the events
+    it missed, or a new snapshot if they are no longer available.
 
-    async def session_status_updated(self, event: dict[str, dict]):
-        await self.send_json(event)
+    Clients receive events of their topics only: "all", "user.<id>" or
+    "team.<group id>", given as `?topics=` and changed with
+    `{"action": "subscribe" | "unsubscribe", "topics": [...]}` messages.
+    The answer to a subscription carries the board of the added topics.
+    """
+
+    async def connect(self):
+        self.synced = False
+        self.pending: list[dict] = []
+
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        topics = ",".join(query.get("topics", [])).split(",")
+        self.topics = parse_topics(topics) or {ALL_TOPIC}
+
+        await self.accept()
+        await board_stream.subscribe(self)
+
+        events = board_stream.since(query.get("since", [None])[0], self.topics)
+
+        if events is None:
+            seq = board_stream.seq
+            cursor = board_stream.cursor
+            sessions = await database_sync_to_async(self.get_board)(self.topics)
+            await self.send_json(
+                {
+                    "type": "snapshot",
+                    "payload": {"cursor": cursor, "sessions": sessions},
+                }
+            )
+        else:
+            seq = events[-1]["seq"] if events else board_stream.seq
+            for event in events:
+                await self.send_json(event)
+
+        # Events published while the snapshot was built.
+        while self.pending:
+            event = self.pending.pop(0)
+            if event["seq"] > seq:
+                await self.send_json(event)
+
+        self.synced = True
+
+    async def disconnect(self, code):
+        board_stream.unsubscribe(self)
+
+    async def receive_json(self, content, **kwargs):
+        action = content.get("action") if isinstance(content, dict) else None
+        topics = content.get("topics") if action else None
+        if not isinstance(topics, list):
+            return
+
+        topics = parse_topics([str(topic) for topic in topics])
+        cursor = board_stream.cursor
+        sessions = []
+
+        if action == "subscribe":
+            added = topics - self.topics
+            self.topics |= topics
+            await board_stream.subscribe(self)
+            if added:
+                sessions = await database_sync_to_async(self.get_board)(added)
+        elif action == "unsubscribe":
+            self.topics -= topics
+        else:
+            return
+
+        await self.send_json(
+            {
+                "type": "subscriptions",
+                "payload": {
+                    "topics": sorted(self.topics),
+                    "cursor": cursor,
+                    "sessions": sessions,
+                },
+            }
+        )
+
+    async def send_event(self, event: dict):
+        if not self.synced:
+            self.pending.append(event)
+            return
 
-    async def user_avatar_changed(self, event: dict[str, dict]):
         await self.send_json(event)
+
+    def get_board(self, topics: set[str]) -> list[dict]:
+        board, _ = board_cache.get()
+
+        user_ids = topic_user_ids(topics)
+        if user_ids is not None:
+            board = [item for item in board if item["user"].id in user_ids]
+
+        return user_session_representation.many(
+            board, context={"request": ScopeUriBuilder(self.scope)}
+        )
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from channels.db import database_sync_to_async
+from channels.layers import InMemoryChannelLayer
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import ChannelMessage
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseChannelLayer(InMemoryChannelLayer):
+    """
+    Channel layer that fans group messages out across processes and hosts
+    through the application database, without an external broker.
+
+    Channels and group membership stay in process memory as in
+    InMemoryChannelLayer. `group_send` stores the message as a ChannelMessage,
+    and every process with local group members polls new messages and
+    delivers them to its own channels.
+    """
+
+    def __init__(
+        self,
+        poll_interval: float = 0.1,
+        retention: int = 60,
+        gap_timeout: float = 30.0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        # Ids below the high-water mark that were not visible yet belong to
+        # transactions still running, or rolled back. They are looked up
+        # again for `gap_timeout` seconds.
+        self.gap_timeout = gap_timeout
+
+        self._poller: asyncio.Task | None = None
+        self._last_id: int | None = None
+        self._gaps: dict[int, float] = {}
+        self._last_cleanup = 0.0
+
+    async def group_add(self, group, channel):
+        await super().group_add(group, channel)
+        if self._last_id is None:
+            # Messages sent after this point are delivered to the group.
+            await database_sync_to_async(self._start_cursor)()
+        self._ensure_poller()
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+
+        # Runs in the caller thread, so the message shares its transaction.
+        await sync_to_async(ChannelMessage.objects.create)(group=group, message=message)
+
+    async def flush(self):
+        await super().flush()
+        await self.close()
+
+    async def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+
+    def _ensure_poller(self):
+        loop = asyncio.get_running_loop()
+        if (
+            self._poller is None
+            or self._poller.done()
+            or self._poller.get_loop() is not loop
+        ):
+            self._poller = loop.create_task(self._poll())
+
+    async def _poll(self):
+        while True:
+            try:
+                await self._deliver_new_messages()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Channel messages polling failed: {e}")
+
+            await asyncio.sleep(self.poll_interval)
+
+    async def _deliver_new_messages(self):
+        groups = list(self.groups)
+        if not groups:
+            return
+
+        rows = await database_sync_to_async(self._fetch_new_messages)(groups)
+        for id, group, message in rows:
+            await InMemoryChannelLayer.group_send(self, group, message)
+
+    def _start_cursor(self):
+        self._last_id = ChannelMessage.objects.aggregate(last=Max("id"))["last"] or 0
+
+    def _fetch_new_messages(self, groups: list[str]) -> list[tuple[int, str, dict]]:
+        """
+        Messages of `groups` stored since the last poll, in id order.
+
+        Progress is tracked with the id of the newest row seen instead of
+        timestamps, so late commits and clock skew between hosts do not
+        lose messages.
+        """
+        if self._last_id is None:
+            self._start_cursor()
+
+        now = time.monotonic()
+        found = dict(
+            ChannelMessage.objects.filter(
+                Q(id__gt=self._last_id) | Q(id__in=list(self._gaps))
+            ).values_list("id", "group")
+        )
+
+        newest = max(found, default=self._last_id)
+        for id in range(self._last_id + 1, newest):
+            if id not in found:
+                self._gaps[id] = now
+        self._last_id = max(newest, self._last_id)
+
+        for id in found:
+            self._gaps.pop(id, None)
+        self._gaps = {
+            id: seen for id, seen in self._gaps.items() if now - seen < self.gap_timeout
+        }
+
+        ids = [id for id, group in found.items() if group in groups]
+        rows = (
+            list(
+                ChannelMessage.objects.filter(id__in=ids)
+                .order_by("id")
+                .values_list("id", "group", "message")
+            )
+            if ids
+            else []
+        )
+
+        if now - self._last_cleanup > self.retention:
+            self._last_cleanup = now
+            ChannelMessage.objects.filter(
+                created_at__lt=timezone.now() - timedelta(seconds=self.retention)
+            ).delete()
+
+        return rows
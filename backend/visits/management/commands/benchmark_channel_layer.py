@@ -0,0 +1,104 @@
+import asyncio
+import multiprocessing
+import statistics
+import time
+from typing import Any
+
+import django
+from asgiref.sync import async_to_sync
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from django.core.management.base import BaseCommand, CommandParser
+
+GROUP = "benchmark"
+
+
+def _subscriber(ready, results, messages: int, timeout: float):
+    """
+    Worker process: join the benchmark group and report delivery latencies.
+    """
+    django.setup()
+
+    async def run():
+        layer = get_channel_layer()
+        channel = await layer.new_channel()  # type: ignore
+        await layer.group_add(GROUP, channel)  # type: ignore
+        ready.set()
+
+        latencies = []
+        deadline = time.monotonic() + timeout
+        while len(latencies) < messages and time.monotonic() < deadline:
+            try:
+                message = await asyncio.wait_for(
+                    layer.receive(channel), deadline - time.monotonic()  # type: ignore
+                )
+            except asyncio.TimeoutError:
+                break
+            latencies.append(time.time() - message["sent_at"])
+
+        await layer.close()  # type: ignore
+        results.put(latencies)
+
+    asyncio.run(run())
+
+
+class Command(BaseCommand):
+    help = "Measure channel layer group fan-out latency across worker processes"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0.01,
+            help="Seconds between two group_send calls.",
+        )
+        parser.add_argument("--timeout", type=float, default=30.0)
+
+    def handle(self, *args: Any, **options: Any):
+        layer = get_channel_layer()
+        if type(layer) is InMemoryChannelLayer:
+            self.stderr.write("InMemoryChannelLayer does not fan out across processes.")
+
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        workers = []
+        for _ in range(options["workers"]):
+            ready = context.Event()
+            process = context.Process(
+                target=_subscriber,
+                args=(ready, results, options["messages"], options["timeout"]),
+            )
+            process.start()
+            workers.append((process, ready))
+
+        for _, ready in workers:
+            ready.wait(options["timeout"])
+
+        send = async_to_sync(layer.group_send)  # type: ignore
+        started = time.perf_counter()
+        for i in range(options["messages"]):
+            send(GROUP, {"type": "benchmark.message", "n": i, "sent_at": time.time()})
+            time.sleep(options["interval"])
+        elapsed = time.perf_counter() - started
+
+        latencies: list[float] = []
+        for _ in workers:
+            latencies.extend(results.get(timeout=options["timeout"] + 5))
+        for process, _ in workers:
+            process.join()
+
+        expected = options["messages"] * options["workers"]
+        self.stdout.write(f"Layer: {type(layer).__module__}.{type(layer).__name__}")
+        self.stdout.write(f"Sent {options['messages']} messages in {elapsed:.2f}s")
+        self.stdout.write(f"Delivered {len(latencies)} of {expected}")
+
+        if len(latencies) < 2:
+            return
+
+        quantiles = statistics.quantiles(latencies, n=100)
+        self.stdout.write(
+            f"Latency ms: p50={quantiles[49] * 1000:.1f} "
+            f"p95={quantiles[94] * 1000:.1f} p99={quantiles[98] * 1000:.1f} "
+            f"max={max(latencies) * 1000:.1f}"
+        )
@@ -0,0 +1,168 @@
+import json
+import time
+from datetime import timedelta
+from typing import Any, Callable
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from main.renderers import ORJSONRenderer
+from session.cards import get_full_name, get_gravatar_url
+from session.models import UserCard
+from visits import serializers
+from visits.models import Session, SessionEntry
+from visits.registry.store import get_statistics_extra_callbacks
+from visits.representation import (
+    CompiledSerializer,
+    session_representation,
+    user_month_statistics_representation,
+    user_session_representation,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare DRF serializers and JSON rendering with the compiled "
+        "representations and orjson on synthetic rows. Does not touch the "
+        "database."
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument(
+            "--entries",
+            type=int,
+            default=8,
+            help="Session entries per session.",
+        )
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args: Any, **options: Any):
+        rows, entries = options["rows"], options["entries"]
+        benchmarks = [
+            (
+                "current",
+                serializers.SessionModelSerializer,
+                session_representation,
+                [self.make_session(i, entries) for i in range(rows)],
+            ),
+            (
+                "today",
+                serializers.UserSessionSerializer,
+                user_session_representation,
+                [self.make_board_item(i) for i in range(rows)],
+            ),
+            (
+                "statistics",
+                serializers.UserMonthStatisticsResponseSerializer,
+                user_month_statistics_representation,
+                [self.make_statistics_day(i, entries) for i in range(rows)],
+            ),
+        ]
+
+        self.stdout.write(
+            f"{'endpoint':<12} {'drf, us/row':>12} {'fast, us/row':>13} {'speedup':>8}"
+        )
+        for name, serializer_class, representation, data in benchmarks:
+            drf_time, drf_body = self.measure(
+                lambda: self.render_drf(serializer_class, data), options["repeat"]
+            )
+            fast_time, fast_body = self.measure(
+                lambda: self.render_fast(representation, data), options["repeat"]
+            )
+
+            if json.loads(drf_body) != json.loads(fast_body):
+                raise AssertionError(f"Representations of {name} differ")
+
+            self.stdout.write(
+                f"{name:<12} {drf_time / rows * 1e6:>12.1f} "
+                f"{fast_time / rows * 1e6:>13.1f} {drf_time / fast_time:>7.1f}x"
+            )
+
+    def measure(self, func: Callable[[], bytes], repeat: int) -> tuple[float, bytes]:
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            body = func()
+            best = min(best, time.perf_counter() - started)
+
+        return best, body
+
+    def render_drf(self, serializer_class, data: list) -> bytes:
+        return JSONRenderer().render(serializer_class(data, many=True).data)
+
+    def render_fast(self, representation: CompiledSerializer, data: list) -> bytes:
+        return ORJSONRenderer().render(representation.many(data))
+
+    def make_user(self, i: int) -> User:
+        user = User(
+            id=i + 1,
+            username=f"user{i}",
+            first_name="first",
+            last_name="last",
+            email=f"user{i}@example.com",
+        )
+        # Card cached on the user, as select_related("card") does.
+        user._state.fields_cache["card"] = UserCard(
+            user=user,
+            full_name=get_full_name(user),
+            avatar_url=get_gravatar_url(user.email),
+        )
+        return user
+
+    def make_session(self, i: int, entries: int) -> Session:
+        start = timezone.localtime().replace(hour=8, minute=0, microsecond=0)
+        session = Session(
+            id=i + 1,
+            user_id=i + 1,
+            date=start.date() - timedelta(days=i % 30),
+            status=Session.SessionStatus.ACTIVE,
+        )
+
+        types = list(SessionEntry.SessionEntryType)
+        session._prefetched_objects_cache = {
+            "entries": [
+                SessionEntry(
+                    id=i * entries + j + 1,
+                    session=session,
+                    start=start + timedelta(minutes=30 * j),
+                    end=start + timedelta(minutes=30 * j + 25),
+                    type=types[j % len(types)],
+                    comment="",
+                    created_at=start,
+                    updated_at=start,
+                )
+                for j in range(entries)
+            ]
+        }
+        return session
+
+    def make_board_item(self, i: int) -> dict:
+        return {
+            "user": self.make_user(i),
+            "session": {
+                "status": Session.SessionStatus.ACTIVE,
+                "comment": "",
+                "time": timezone.now() - timedelta(minutes=i % 600),
+            },
+        }
+
+    def make_statistics_day(self, i: int, entries: int) -> dict:
+        session = self.make_session(i, entries)
+        extra = [
+            {"type": callback._type, "payload": {}}  # type: ignore
+            for callback in get_statistics_extra_callbacks()
+        ]
+
+        return {
+            "date": session.date,
+            "session": session if i % 7 < 5 else None,
+            "statistics": {
+                "work_time": 3600.0 * (i % 9),
+                "break_time": 600.0,
+                "lunch_time": 1800.0,
+            },
+            "extra": extra,
+        }
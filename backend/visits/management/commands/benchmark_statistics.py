@@ -0,0 +1,95 @@
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from visits.models import SessionEntry, calculate_entries_statistics
+from visits.statistics import EntryColumns
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-entry statistics loop with the vectorized engine "
+        "on synthetic entries. Does not touch the database."
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[10_000, 100_000, 1_000_000],
+            help="Numbers of entries to benchmark.",
+        )
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=300,
+            help="Number of synthetic users entries are spread across.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args: Any, **options: Any):
+        rnd = random.Random(options["seed"])
+        self.stdout.write(
+            f"{'entries':>10} {'loop, s':>10} {'engine, s':>10} {'speedup':>8}"
+        )
+
+        for size in options["sizes"]:
+            rows = self.generate_rows(rnd, size, options["users"])
+
+            loop_time, loop_result = self.measure(self.run_loop, rows)
+            engine_time, engine_result = self.measure(self.run_engine, rows)
+            self.check(loop_result, engine_result)
+
+            self.stdout.write(
+                f"{size:>10} {loop_time:>10.3f} {engine_time:>10.3f} "
+                f"{loop_time / engine_time:>7.1f}x"
+            )
+
+    def generate_rows(self, rnd: random.Random, size: int, users: int) -> list:
+        types = [t.value for t in SessionEntry.SessionEntryType]
+        first_day = date(2025, 1, 1)
+        rows = []
+
+        for _ in range(size):
+            key = (rnd.randrange(users), first_day + timedelta(days=rnd.randrange(365)))
+            start = datetime(
+                key[1].year, key[1].month, key[1].day, tzinfo=dt_timezone.utc
+            ) + timedelta(seconds=rnd.randrange(12 * 3600))
+            end = start + timedelta(seconds=rnd.randrange(3 * 3600))
+            rows.append(
+                (key, rnd.choice(types), start, end if rnd.random() > 0.01 else None)
+            )
+
+        return rows
+
+    def measure(self, func, rows):
+        started = time.perf_counter()
+        result = func(rows)
+        return time.perf_counter() - started, result
+
+    def run_loop(self, rows) -> dict:
+        """
+        Current path: model instances grouped by day and summed one by one.
+        """
+        grouped = defaultdict(list)
+        for key, type, start, end in rows:
+            grouped[key].append(SessionEntry(type=type, start=start, end=end))
+
+        return {
+            key: calculate_entries_statistics(entries)
+            for key, entries in grouped.items()
+        }
+
+    def run_engine(self, rows) -> dict:
+        return EntryColumns.from_rows(rows).statistics()
+
+    def check(self, expected: dict, actual: dict):
+        for key, statistics in expected.items():
+            for field, value in statistics.items():
+                if abs(actual[key][field] - value) > 1e-3:
+                    raise AssertionError(f"Mismatch for {key} {field}")
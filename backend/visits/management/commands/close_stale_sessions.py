@@ -0,0 +1,46 @@
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.utils import timezone
+
+from visits.broadcast import dispatcher
+from visits.models import StaleSessionsRun
+from visits.services import SessionService
+
+
+class Command(BaseCommand):
+    help = (
+        "Flag CHEATER the sessions whose last entry was left open across the "
+        "day rollover"
+    )
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Seconds between two runs, run once when 0.",
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        service = SessionService()
+
+        while True:
+            started_at = timezone.now()
+            sessions = service.flag_stale_sessions()
+
+            StaleSessionsRun.objects.create(
+                started_at=started_at,
+                finished_at=timezone.now(),
+                flagged=len(sessions),
+                session_ids=[session.pk for session in sessions],
+            )
+            self.stdout.write(f"Flagged {len(sessions)} stale sessions")
+
+            if not options["interval"]:
+                # Status events are sent by a background thread.
+                dispatcher.drain()
+                return
+
+            time.sleep(options["interval"])
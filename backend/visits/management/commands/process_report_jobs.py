@@ -0,0 +1,55 @@
+import logging
+import time
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+
+from visits.services import ReportExportService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Process pending bulk report export jobs"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=settings.REPORT_EXPORT_WORKERS,
+            help="Number of worker processes generating reports.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between checks for pending jobs.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process pending jobs and exit.",
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        service = ReportExportService()
+
+        while True:
+            job = service.claim_job()
+
+            if job is None:
+                if options["once"]:
+                    return
+
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Processing report export job {job.pk}")
+            try:
+                service.run_job(job, options["workers"])
+            except Exception as e:
+                logger.error(f"Report export job {job.pk} failed: {e}")
+                continue
+
+            self.stdout.write(f"Report export job {job.pk} done")
@@ -0,0 +1,107 @@
+from datetime import date
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import connection, transaction
+
+from visits.models import DailyStatistics, Session, SessionEntry
+from visits.statistics import EntryColumns
+
+
+class Command(BaseCommand):
+    help = "Backfill or rebuild daily statistics rollups from session entries"
+
+    def add_arguments(self, parser: CommandParser):
+        parser.add_argument(
+            "--start",
+            type=date.fromisoformat,
+            required=False,
+            help="First date to rebuild. Example: 2025-01-01",
+        )
+        parser.add_argument(
+            "--end",
+            type=date.fromisoformat,
+            required=False,
+            help="Last date to rebuild. Example: 2025-12-31",
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="users",
+            help="Rebuild only for given user id. Can be repeated.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of sessions processed per batch.",
+        )
+
+    def handle(self, *args: Any, **options: Any):
+        sessions = Session.objects.order_by("id")
+        rollups = DailyStatistics.objects.all()
+
+        if options["start"]:
+            sessions = sessions.filter(date__gte=options["start"])
+            rollups = rollups.filter(date__gte=options["start"])
+        if options["end"]:
+            sessions = sessions.filter(date__lte=options["end"])
+            rollups = rollups.filter(date__lte=options["end"])
+        if options["users"]:
+            sessions = sessions.filter(user_id__in=options["users"])
+            rollups = rollups.filter(user_id__in=options["users"])
+
+        batch_size: int = options["batch_size"]
+        processed = 0
+
+        with transaction.atomic():
+            rollups.delete()
+
+            last_id = 0
+            while True:
+                batch = list(
+                    sessions.filter(id__gt=last_id).values_list("id", flat=True)[
+                        :batch_size
+                    ]
+                )
+                if not batch:
+                    break
+
+                self.save_batch(batch)
+                processed += len(batch)
+                last_id = batch[-1]
+
+        self.stdout.write(f"Rebuilt daily statistics for {processed} sessions")
+
+    def save_batch(self, session_ids: list[int]):
+        columns = EntryColumns.from_queryset(
+            SessionEntry.objects.filter(session_id__in=session_ids),
+            ("session__user_id", "session__date"),
+        )
+
+        objs = [
+            DailyStatistics(user_id=user_id, date=day_date, **day)
+            for (user_id, day_date), day in columns.daily_statistics().items()
+        ]
+
+        update_fields = [
+            "work_time",
+            "break_time",
+            "lunch_time",
+            "first_start",
+            "last_end",
+            "updated_at",
+        ]
+        unique_fields = (
+            ["user", "date"]
+            if connection.features.supports_update_conflicts_with_target
+            else None
+        )
+
+        DailyStatistics.objects.bulk_create(
+            objs,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
+        )
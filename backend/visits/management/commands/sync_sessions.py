@@ -112,6 +112,7 @@ class Command(BaseCommand):
 
         session.save()
         SessionEntry.objects.bulk_create(entries)
+        session.refresh_aggregates()
         return True
 
     def create_entries(
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2025-08-12 10:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_session_status(apps, schema_editor):
+    Session = apps.get_model("visits", "Session")
+    SessionEntry = apps.get_model("visits", "SessionEntry")
+
+    now = timezone.localtime()
+    sessions = Session.objects.all().iterator(chunk_size=1000)
+
+    for session in sessions:
+        entries = list(SessionEntry.objects.filter(session=session).order_by("start"))
+        status = "inactive"
+
+        for i in range(1, len(entries)):
+            prev_end = entries[i - 1].end
+            if prev_end is None or prev_end.replace(
+                microsecond=0
+            ) > entries[i].start.replace(microsecond=0):
+                status = "cheater"
+                break
+        else:
+            last = entries[-1] if entries else None
+            if last is not None and last.end is None:
+                if now.date() != session.date and now.hour > 8:
+                    status = "cheater"
+                elif last.type == "WORK":
+                    status = "active"
+
+        Session.objects.filter(pk=session.pk).update(
+            status=status, last_entry=entries[-1] if entries else None
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0003_alter_session_date_alter_session_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='session',
+            name='status',
+            field=models.CharField(choices=[('active', 'Active'), ('inactive', 'Inactive'), ('cheater', 'Cheater'), ('holiday', 'Holiday'), ('vacation', 'Vacation'), ('sick', 'Sick')], db_index=True, default='inactive', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='session',
+            name='last_entry',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='visits.sessionentry'),
+        ),
+        migrations.RunPython(populate_session_status, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2025-08-14 08:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0004_session_status_session_last_entry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Date')),
+                ('work_time', models.FloatField(default=0.0)),
+                ('break_time', models.FloatField(default=0.0)),
+                ('lunch_time', models.FloatField(default=0.0)),
+                ('first_start', models.DateTimeField(blank=True, null=True)),
+                ('last_end', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_statistics', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'date'), name='unique_daily_statistics_user_date')],
+            },
+        ),
+    ]
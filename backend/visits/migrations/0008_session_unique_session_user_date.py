@@ -0,0 +1,87 @@
+# Generated by Django 5.2.4 on 2025-08-26 10:12
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+from django.utils import timezone
+
+
+def session_status(session, entries, now):
+    for i in range(1, len(entries)):
+        prev_end = entries[i - 1].end
+        if prev_end is None or prev_end.replace(
+            microsecond=0
+        ) > entries[i].start.replace(microsecond=0):
+            return "cheater"
+
+    last = entries[-1] if entries else None
+    if last is not None and last.end is None:
+        if now.date() != session.date and now.hour > 8:
+            return "cheater"
+        if last.type == "WORK":
+            return "active"
+
+    return "inactive"
+
+
+def merge_duplicate_sessions(apps, schema_editor):
+    """
+    Merge sessions of the same user and date into the oldest one, so the
+    unique constraint can be created.
+    """
+    Session = apps.get_model("visits", "Session")
+    SessionEntry = apps.get_model("visits", "SessionEntry")
+    DailyStatistics = apps.get_model("visits", "DailyStatistics")
+
+    now = timezone.localtime()
+    duplicates = (
+        Session.objects.values("user_id", "date")
+        .annotate(count=Count("id"), keep_id=Min("id"))
+        .filter(count__gt=1)
+    )
+
+    for duplicate in duplicates:
+        others = Session.objects.filter(
+            user_id=duplicate["user_id"], date=duplicate["date"]
+        ).exclude(id=duplicate["keep_id"])
+
+        SessionEntry.objects.filter(session__in=others).update(
+            session_id=duplicate["keep_id"]
+        )
+        others.delete()
+
+        session = Session.objects.get(id=duplicate["keep_id"])
+        entries = list(SessionEntry.objects.filter(session=session).order_by("start"))
+        Session.objects.filter(pk=session.pk).update(
+            status=session_status(session, entries, now),
+            last_entry=entries[-1] if entries else None,
+        )
+
+        durations = {"WORK": 0.0, "BREAK": 0.0, "LUNCH": 0.0}
+        for entry in entries:
+            if entry.end and entry.type in durations:
+                durations[entry.type] += (entry.end - entry.start).total_seconds()
+
+        DailyStatistics.objects.filter(
+            user_id=session.user_id, date=session.date
+        ).update(
+            work_time=durations["WORK"],
+            break_time=durations["BREAK"],
+            lunch_time=durations["LUNCH"],
+            first_start=entries[0].start if entries else None,
+            last_end=entries[-1].end if entries else None,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0007_channelmessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='session',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_session_user_date'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2025-08-30 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0008_session_unique_session_user_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleSessionsRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField()),
+                ('flagged', models.PositiveIntegerField(default=0)),
+                ('session_ids', models.JSONField(default=list)),
+            ],
+        ),
+    ]
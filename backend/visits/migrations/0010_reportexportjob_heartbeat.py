@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2025-08-31 09:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('visits', '0009_stalesessionsrun'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportexportjob',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='reportexportjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
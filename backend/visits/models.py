@@ -1,9 +1,10 @@
 from typing import Optional
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils.translation import gettext as _
 from django.utils import timezone
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
 
 class SessionEntry(models.Model):
@@ -30,6 +31,13 @@ class SessionEntry(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the loaded session to refresh it when the entry is moved.
+        instance._loaded_session_id = instance.__dict__.get("session_id")
+        return instance
+
     @property
     def is_open(self) -> bool:
         return self.end is None
@@ -44,6 +52,7 @@ class SessionManager(models.Manager["Session"]):
         return (
             super()
             .get_queryset()
+            .select_related("last_entry")
             .prefetch_related(
                 models.Prefetch(
                     "entries", queryset=SessionEntry.objects.order_by("start")
@@ -51,6 +60,20 @@ class SessionManager(models.Manager["Session"]):
             )
         )
 
+    def overdue(self, now: datetime | None = None) -> models.QuerySet["Session"]:
+        """
+        Sessions not flagged yet whose last entry was left open across the
+        day rollover. Filters with a subquery instead of a join, the rows
+        can be locked on any backend.
+        """
+        open_entries = SessionEntry.objects.filter(end__isnull=True).values("pk")
+        return (
+            self.select_related(None)
+            .prefetch_related(None)
+            .filter(date__lt=get_overdue_date(now), last_entry__in=open_entries)
+            .exclude(status=Session.SessionStatus.CHEATER)
+        )
+
     def get_last_user_session(self, user) -> Optional["Session"]:
         today = timezone.localdate()
         return (
@@ -62,11 +85,6 @@ class SessionManager(models.Manager["Session"]):
 
 
 class Session(models.Model):
-    user = models.ForeignKey(
-        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="sessions"
-    )
-    date = models.DateField(_("Date"), default=timezone.localdate)
-    objects: SessionManager = SessionManager()
 
     class SessionStatus(models.TextChoices):
         ACTIVE = "active", _("Active")
@@ -76,6 +94,32 @@ class Session(models.Model):
         VACATION = "vacation", _("Vacation")
         SICK = "sick", _("Sick")
 
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="sessions"
+    )
+    date = models.DateField(_("Date"), default=timezone.localdate)
+    status = models.CharField(
+        max_length=10,
+        choices=SessionStatus.choices,
+        default=SessionStatus.INACTIVE,
+        db_index=True,
+    )
+    last_entry = models.ForeignKey(
+        SessionEntry,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    objects: SessionManager = SessionManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "date"], name="unique_session_user_date"
+            )
+        ]
+
     def get_last_entry(self) -> SessionEntry | None:
         return self.entries.order_by("-start").first()  # type: ignore
 
@@ -104,34 +148,221 @@ class Session(models.Model):
         entry.type = type
         entry.save()
 
-    @property
-    def status(self):
-        entries: list[SessionEntry] = list(self.entries.order_by("start"))  # type: ignore
+    def refresh_status(self, entries: list[SessionEntry] | None = None):
+        """
+        Recalculate and persist `status` and `last_entry` from the session entries.
+        """
+        if entries is None:
+            entries = list(SessionEntry.objects.filter(session=self).order_by("start"))
+
+        self.last_entry = entries[-1] if entries else None
+        self.status = calculate_session_status(self, entries)
+
+        Session.objects.filter(pk=self.pk).update(
+            status=self.status, last_entry=self.last_entry
+        )
+
+    def refresh_aggregates(self):
+        """
+        Refresh the materialized status and the daily statistics rollup
+        with a single entries query.
+        """
+        entries = list(SessionEntry.objects.filter(session=self).order_by("start"))
+        self.refresh_status(entries)
+        DailyStatistics.objects.refresh_for_session(self, entries)
+
+
+def get_overdue_date(now: datetime | None = None) -> date:
+    """
+    Sessions dated before the returned day must not have open entries
+    anymore, entries may stay open until 8:00 of the next day.
+    """
+    now = now or timezone.localtime()
+    return now.date() if now.hour > 8 else now.date() - timedelta(days=1)
+
+
+def calculate_session_status(
+    session: Session, entries: list[SessionEntry]
+) -> Session.SessionStatus:
+    """
+    Calculate session status from its entries ordered by start.
+    """
+    if len(entries) == 0:
+        return Session.SessionStatus.INACTIVE
+
+    for i in range(1, len(entries)):
+        if entries[i - 1].end is None:
+            return Session.SessionStatus.CHEATER
+
+        prev_end = entries[i - 1].end.replace(microsecond=0)  # type: ignore
+        next_start = entries[i].start.replace(microsecond=0)
+
+        if prev_end > next_start:
+            return Session.SessionStatus.CHEATER
+
+    last = entries[-1]
+    if last.end is None:
+        # Unsaved sessions may hold a datetime.
+        session_date = (
+            session.date.date() if isinstance(session.date, datetime) else session.date
+        )
+        if session_date < get_overdue_date():
+            return Session.SessionStatus.CHEATER
 
-        if len(entries) == 0:
-            return Session.SessionStatus.INACTIVE
+        return (
+            Session.SessionStatus.ACTIVE
+            if last.type == SessionEntry.SessionEntryType.WORK
+            else Session.SessionStatus.INACTIVE
+        )
+
+    return Session.SessionStatus.INACTIVE
+
+
+def calculate_entries_statistics(entries: list[SessionEntry]) -> dict[str, float]:
+    """
+    Sum closed entries durations in seconds by entry type.
+    """
+    result = {
+        "work_time": 0.0,
+        "break_time": 0.0,
+        "lunch_time": 0.0,
+    }
+
+    for entry in entries:
+        if not entry.end:
+            continue
+
+        delta = (entry.end - entry.start).total_seconds()
+
+        if entry.type == SessionEntry.SessionEntryType.WORK:
+            result["work_time"] += delta
+        elif entry.type == SessionEntry.SessionEntryType.BREAK:
+            result["break_time"] += delta
+        elif entry.type == SessionEntry.SessionEntryType.LUNCH:
+            result["lunch_time"] += delta
+
+    return result
 
-        for i in range(1, len(entries)):
-            if entries[i - 1].end is None:
-                return Session.SessionStatus.CHEATER
 
-            prev_end = entries[i - 1].end.replace(microsecond=0)
-            next_start = entries[i].start.replace(microsecond=0)
+class DailyStatisticsManager(models.Manager["DailyStatistics"]):
+    def refresh_for_session(self, session: Session, entries: list[SessionEntry]):
+        """
+        Recalculate the user day rollup from the session entries ordered by start.
+        """
+        if not entries:
+            self.filter(user_id=session.user_id, date=session.date).delete()
+            return
+
+        self.update_or_create(
+            user_id=session.user_id,
+            date=session.date,
+            defaults=DailyStatistics.defaults_from_entries(entries),
+        )
 
-            if prev_end > next_start:
-                return Session.SessionStatus.CHEATER
 
-        last = entries[-1]
-        if last.end is None:
-            now = timezone.localtime()
+class DailyStatistics(models.Model):
+    """
+    Per user, per day rollup of session entries durations.
+    """
 
-            if now.date() != self.date and now.hour > 8:
-                return Session.SessionStatus.CHEATER
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_statistics",
+    )
+    date = models.DateField(_("Date"))
+    work_time = models.FloatField(default=0.0)
+    break_time = models.FloatField(default=0.0)
+    lunch_time = models.FloatField(default=0.0)
+    first_start = models.DateTimeField(null=True, blank=True)
+    last_end = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
-            return (
-                Session.SessionStatus.ACTIVE
-                if last.type == SessionEntry.SessionEntryType.WORK
-                else Session.SessionStatus.INACTIVE
+    objects: DailyStatisticsManager = DailyStatisticsManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "date"], name="unique_daily_statistics_user_date"
             )
+        ]
 
-        return Session.SessionStatus.INACTIVE
+    @staticmethod
+    def defaults_from_entries(entries: list[SessionEntry]) -> dict:
+        return {
+            **calculate_entries_statistics(entries),
+            "first_start": entries[0].start if entries else None,
+            "last_end": entries[-1].end if entries else None,
+        }
+
+    def as_statistics(self) -> dict[str, float]:
+        return {
+            "work_time": self.work_time,
+            "break_time": self.break_time,
+            "lunch_time": self.lunch_time,
+        }
+
+
+class ReportExportJob(models.Model):
+    """
+    Bulk XLSX export of many users statistics, processed by the
+    `process_report_jobs` worker into a single ZIP archive.
+    """
+
+    class JobStatus(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        DONE = "done", _("Done")
+        FAILED = "failed", _("Failed")
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="report_export_jobs",
+    )
+    users = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="+")
+    start = models.DateField()
+    end = models.DateField()
+    status = models.CharField(
+        max_length=10,
+        choices=JobStatus.choices,
+        default=JobStatus.PENDING,
+        db_index=True,
+    )
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    file = models.FileField(upload_to="reports", blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    # Refreshed by the worker while the job runs, see `claim_job`.
+    heartbeat_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    @property
+    def progress(self) -> float:
+        return self.processed / self.total if self.total else 0.0
+
+
+class ChannelMessage(models.Model):
+    """
+    Group message fanned out across processes by DatabaseChannelLayer.
+    """
+
+    group = models.CharField(max_length=100, db_index=True)
+    message = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+
+class StaleSessionsRun(models.Model):
+    """
+    Result of a `close_stale_sessions` run.
+    """
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    flagged = models.PositiveIntegerField(default=0)
+    session_ids = models.JSONField(default=list)
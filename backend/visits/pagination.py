@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class UsersCursorPagination(CursorPagination):
+    """
+    Users ordered by name. The queryset is expected to annotate a non null
+    `search_name`, cursors are built from instance attributes and can not
+    follow relations.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = ("search_name", "id")
@@ -2,12 +2,16 @@ from typing import Callable
 from rest_framework.serializers import Serializer
 from django.contrib.admin.options import InlineModelAdmin
 
-from .types import StatisticsExtraDataCallback
-from .store import _statistics_extra_registry, _user_admin_inline_registry
+from .types import StatisticsExtraDataCallback, StatisticsExtraRangeCallback
+from .store import (
+    _statistics_extra_registry,
+    _user_admin_inline_registry,
+    as_range_callback,
+)
 
 
 def register_statistics_extra(
-    *, type: str, serializer_class: type[Serializer]
+    *, type: str, serializer_class: type[Serializer], timeout: float | None = None
 ) -> Callable[[StatisticsExtraDataCallback], StatisticsExtraDataCallback]:
     """
     Registers handlers that provide extra parameters to statistics.
@@ -15,14 +19,50 @@ def register_statistics_extra(
     Args:
         stat_type: A string identifier for the type of extra statistics.
         serializer_class: DRF Serializer class used for validating extra data.
+        timeout: Seconds the plugin may take per statistics request,
+            `STATISTICS_EXTRA_TIMEOUT` by default.
 
     Returns:
         A decorator that registers a callback.
     """
 
     def decorator(callback: StatisticsExtraDataCallback) -> StatisticsExtraDataCallback:
+        range_callback = as_range_callback(callback)
+        setattr(range_callback, "_type", type)
+        setattr(range_callback, "_serializer_class", serializer_class)
+        setattr(range_callback, "_timeout", timeout)
+        _statistics_extra_registry.append(range_callback)
+        return callback
+
+    return decorator
+
+
+def register_statistics_extra_range(
+    *, type: str, serializer_class: type[Serializer], timeout: float | None = None
+) -> Callable[[StatisticsExtraRangeCallback], StatisticsExtraRangeCallback]:
+    """
+    Registers handlers that provide extra parameters to statistics for a
+    whole date range in one call.
+
+    The callback receives the user and the inclusive `start` and `end` dates
+    and returns a payload by date, days without extra data can be left out.
+
+    Args:
+        stat_type: A string identifier for the type of extra statistics.
+        serializer_class: DRF Serializer class used for validating extra data.
+        timeout: Seconds the plugin may take per statistics request,
+            `STATISTICS_EXTRA_TIMEOUT` by default.
+
+    Returns:
+        A decorator that registers a callback.
+    """
+
+    def decorator(
+        callback: StatisticsExtraRangeCallback,
+    ) -> StatisticsExtraRangeCallback:
         setattr(callback, "_type", type)
         setattr(callback, "_serializer_class", serializer_class)
+        setattr(callback, "_timeout", timeout)
         _statistics_extra_registry.append(callback)
         return callback
 
@@ -0,0 +1,260 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import AbstractUser
+from django.db import close_old_connections
+
+from .types import StatisticsExtraRangeCallback
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Stops calling a plugin after `threshold` consecutive failures.
+
+    Once open, calls are rejected for `cooldown` seconds, then a single trial
+    call is let through. Its success closes the breaker, its failure opens it
+    again.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class PluginMetrics:
+    """
+    Call counters and latencies of a plugin in this process.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+
+    def record(self, elapsed: float, failed: bool):
+        self.calls += 1
+        self.failures += failed
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "avg_time": self.total_time / self.calls if self.calls else 0.0,
+            "max_time": self.max_time,
+        }
+
+
+class StatisticsExtraExecutor:
+    """
+    Runs statistics extra callbacks concurrently on a bounded thread pool.
+
+    Every plugin has a deadline, the callback `_timeout` attribute or
+    `STATISTICS_EXTRA_TIMEOUT` seconds. Plugins that fail, miss their
+    deadline or have an open circuit breaker are left out of the result and
+    reported as unavailable. A callback that missed its deadline keeps its
+    worker until it returns, repeated timeouts open the breaker so slow
+    plugins can not take over the pool.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+        self._pid: int | None = None
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._metrics: dict[str, PluginMetrics] = {}
+
+    def run(
+        self,
+        callbacks: list[StatisticsExtraRangeCallback],
+        user: AbstractUser,
+        start: date,
+        end: date,
+    ) -> tuple[dict[str, dict], set[str]]:
+        """
+        Results by plugin type and the types of the plugins left out.
+        """
+        results, unavailable = self.run_many(callbacks, [user], start, end)
+        return results.get(user.pk, {}), unavailable
+
+    def run_many(
+        self,
+        callbacks: list[StatisticsExtraRangeCallback],
+        users: list[AbstractUser],
+        start: date,
+        end: date,
+    ) -> tuple[dict[int, dict[str, dict]], set[str]]:
+        """
+        Results by user id and plugin type, and the types of the plugins left
+        out for some of the users.
+
+        The calls of all users are submitted at once and the calls of a plugin
+        share its deadline, so the wait does not grow with the number of users.
+        """
+        pool = self._get_pool()
+        started = time.monotonic()
+        futures: list[tuple[int, str, Future, float]] = []
+        unavailable = set()
+
+        for callback in callbacks:
+            type = getattr(callback, "_type")
+            if not self._breaker(type).allow():
+                self._record_rejected(type)
+                unavailable.add(type)
+                continue
+
+            deadline = started + self._timeout_of(callback)
+            for user in users:
+                future = pool.submit(self._call, type, callback, user, start, end)
+                futures.append((user.pk, type, future, deadline))
+
+        results: dict[int, dict[str, dict]] = defaultdict(dict)
+        timed_out = set()
+        for user_id, type, future, deadline in futures:
+            try:
+                results[user_id][type] = future.result(
+                    max(deadline - time.monotonic(), 0)
+                )
+            except FutureTimeoutError:
+                # Calls still waiting for a worker are not run anymore.
+                future.cancel()
+                self._record_timeout(type)
+                timed_out.add(type)
+            except Exception:
+                unavailable.add(type)
+
+        for type in timed_out:
+            logger.warning(f"Statistics extra '{type}' missed its deadline")
+
+        return results, unavailable | timed_out
+
+    def metrics(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                type: {
+                    **metrics.as_dict(),
+                    "circuit_open": self._breaker(type).is_open,
+                }
+                for type, metrics in self._metrics.items()
+            }
+
+    def _call(
+        self,
+        type: str,
+        callback: StatisticsExtraRangeCallback,
+        user: AbstractUser,
+        start: date,
+        end: date,
+    ) -> dict:
+        started = time.monotonic()
+        failed = True
+
+        try:
+            result = callback(user, start, end)
+            failed = False
+            return result
+        except Exception:
+            logger.exception(f"Statistics extra '{type}' failed")
+            raise
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._get_metrics(type).record(elapsed, failed)
+
+            breaker = self._breaker(type)
+            if failed:
+                breaker.record_failure()
+            elif elapsed > self._timeout_of(callback):
+                # Finished, but too late to be part of the response.
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            close_old_connections()
+
+    def _timeout_of(self, callback: StatisticsExtraRangeCallback) -> float:
+        timeout = getattr(callback, "_timeout", None)
+        return settings.STATISTICS_EXTRA_TIMEOUT if timeout is None else timeout
+
+    def _record_timeout(self, type: str):
+        with self._lock:
+            self._get_metrics(type).timeouts += 1
+
+    def _record_rejected(self, type: str):
+        with self._lock:
+            self._get_metrics(type).rejected += 1
+
+    def _get_metrics(self, type: str) -> PluginMetrics:
+        return self._metrics.setdefault(type, PluginMetrics())
+
+    def _breaker(self, type: str) -> CircuitBreaker:
+        breaker = self._breakers.get(type)
+        if breaker is None:
+            breaker = self._breakers.setdefault(
+                type, CircuitBreaker(self.failure_threshold, self.cooldown)
+            )
+
+        return breaker
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Worker threads do not survive a fork of the process.
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._pool = ThreadPoolExecutor(
+                    max_workers=settings.STATISTICS_EXTRA_WORKERS,
+                    thread_name_prefix="statistics-extra",
+                )
+
+            return self._pool
+
+
+statistics_extra_executor = StatisticsExtraExecutor()
@@ -1,16 +1,26 @@
+from datetime import date, timedelta
+from functools import wraps
 from typing import Sequence, Union
 from django.contrib.admin.options import InlineModelAdmin
+from django.contrib.auth.models import AbstractUser
 from django.urls import URLPattern, URLResolver, include, path
-from .types import StatisticsExtraDataCallback
+from .executor import statistics_extra_executor
+from .types import StatisticsExtraDataCallback, StatisticsExtraRangeCallback
 
 # Internal mutable registries
-_statistics_extra_registry: list[StatisticsExtraDataCallback] = []
+_statistics_extra_registry: list[StatisticsExtraRangeCallback] = []
 _user_admin_inline_registry: list[type[InlineModelAdmin]] = []
 _urlpatterns_registry: dict[str, Sequence[Union[URLPattern, URLResolver]]] = {}
 
 
 # Registration methods
 def register_statistics_extra_callback(callback: StatisticsExtraDataCallback) -> None:
+    _statistics_extra_registry.append(as_range_callback(callback))
+
+
+def register_statistics_extra_range_callback(
+    callback: StatisticsExtraRangeCallback,
+) -> None:
     _statistics_extra_registry.append(callback)
 
 
@@ -23,10 +33,42 @@ def register_urlpatterns(prefix: str, urlpatterns: Sequence[Union[URLPattern, UR
 
 
 # Accessors
-def get_statistics_extra_callbacks() -> list[StatisticsExtraDataCallback]:
+def get_statistics_extra_callbacks() -> list[StatisticsExtraRangeCallback]:
     return _statistics_extra_registry.copy()
 
 
+def run_statistics_extra_callbacks(
+    user: AbstractUser, start: date, end: date
+) -> tuple[dict[str, dict], set[str]]:
+    """
+    Run every statistics extra callback concurrently for the range.
+
+    Returns the results by plugin type and the types of the plugins left out
+    because they failed, missed their deadline or their circuit is open.
+    """
+    return statistics_extra_executor.run(
+        get_statistics_extra_callbacks(), user, start, end
+    )
+
+
+def run_users_statistics_extra_callbacks(
+    users: list[AbstractUser], start: date, end: date
+) -> tuple[dict[int, dict[str, dict]], set[str]]:
+    """
+    Run every statistics extra callback for every user at once.
+
+    Returns the results by user id and plugin type and the types of the
+    plugins left out for some of the users.
+    """
+    return statistics_extra_executor.run_many(
+        get_statistics_extra_callbacks(), users, start, end
+    )
+
+
+def get_statistics_extra_metrics() -> dict[str, dict]:
+    return statistics_extra_executor.metrics()
+
+
 def get_user_admin_inlines() -> list[type[InlineModelAdmin]]:
     return _user_admin_inline_registry.copy()
 
@@ -37,3 +79,24 @@ def get_registered_urlpatterns() -> list[URLPattern | URLResolver]:
         result.append(path(f"plugins/{prefix}/", include((patterns, prefix))))
 
     return result
+
+
+def as_range_callback(
+    callback: StatisticsExtraDataCallback,
+) -> StatisticsExtraRangeCallback:
+    """
+    Adapt a per-day callback to the range signature, calling it for every day.
+    """
+
+    @wraps(callback)
+    def range_callback(user: AbstractUser, start: date, end: date) -> dict:
+        result = {}
+        current_date = start
+        while current_date <= end:
+            if data := callback(user, current_date):
+                result[current_date] = data
+            current_date += timedelta(days=1)
+
+        return result
+
+    return range_callback
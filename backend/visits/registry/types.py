@@ -11,3 +11,4 @@ class StatisticsExtraDataResult(TypedDict, Generic[T]):
 
 
 StatisticsExtraDataCallback = Callable[[AbstractUser, date], T]
+StatisticsExtraRangeCallback = Callable[[AbstractUser, date, date], dict[date, T]]
@@ -0,0 +1,197 @@
+from collections.abc import Mapping
+from datetime import date, datetime
+from typing import Any, Callable, Iterable
+
+from django.db.models.manager import BaseManager
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty, is_simple_callable
+from rest_framework.settings import api_settings
+
+from . import serializers as visits_serializers
+
+Converter = Callable[[Any, dict], Any]
+
+
+class CompiledSerializer:
+    """
+    Plain dict rendering of a serializer's fields for hot read endpoints.
+
+    The serializer fields are compiled once into a list of attribute getters
+    and converters, rendering then skips the per-field dispatch, the ordered
+    dicts and the `Return*` wrappers of DRF. The output matches
+    `serializer_class(instance).data`, fields without a fast converter fall
+    back to their own `to_representation`.
+
+    Views keep declaring `serializer_class` in their schema, which therefore
+    does not change.
+    """
+
+    def __init__(self, serializer_class: type[serializers.Serializer]):
+        self.serializer_class = serializer_class
+        self._render: Converter | None = None
+
+    def to_representation(self, instance: Any, context: dict | None = None) -> dict:
+        return self._compiled()(instance, {"context": context or {}, "holders": {}})
+
+    def many(self, instances: Iterable, context: dict | None = None) -> list[dict]:
+        render = self._compiled()
+        state = {"context": context or {}, "holders": {}}
+        return [render(instance, state) for instance in instances]
+
+    def _compiled(self) -> Converter:
+        # Fields are built on first use, serializers may reference models and
+        # plugin registries that are not ready at import time.
+        if self._render is None:
+            self._render = _compile_serializer(self.serializer_class())
+
+        return self._render
+
+
+def _compile_serializer(serializer: serializers.Serializer) -> Converter:
+    plan = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        plan.append((name, _compile_getter(field), _compile_field(field)))
+
+    def render(instance: Any, state: dict) -> dict:
+        data = {}
+        for name, getter, convert in plan:
+            try:
+                value = getter(instance)
+            except SkipField:
+                continue
+            data[name] = None if value is None else convert(value, state)
+
+        return data
+
+    return render
+
+
+def _compile_getter(field: serializers.Field) -> Callable[[Any], Any]:
+    if isinstance(field, serializers.SerializerMethodField):
+        return lambda instance: instance
+    if isinstance(field, serializers.RelatedField):
+        # Keeps the primary key only optimization of related fields.
+        return field.get_attribute
+
+    attrs = field.source_attrs
+
+    def get(instance: Any) -> Any:
+        try:
+            for attr in attrs:
+                if isinstance(instance, (dict, Mapping)):
+                    instance = instance[attr]
+                else:
+                    instance = getattr(instance, attr)
+                if callable(instance) and is_simple_callable(instance):
+                    instance = instance()
+        except (KeyError, AttributeError):
+            if field.default is not empty:
+                return field.get_default()
+            if field.allow_null:
+                return None
+            if not field.required:
+                raise SkipField()
+            raise
+
+        return instance
+
+    return get
+
+
+def _compile_field(field: serializers.Field) -> Converter:
+    if isinstance(field, serializers.ListSerializer):
+        child = _compile_field(field.child)
+
+        def convert_list(value: Any, state: dict) -> list:
+            if isinstance(value, BaseManager):
+                value = value.all()
+            return [child(item, state) for item in value]
+
+        return convert_list
+
+    if isinstance(field, serializers.Serializer):
+        return _compile_serializer(field)
+
+    if isinstance(field, serializers.SerializerMethodField):
+        serializer_class = type(field.parent)
+        method_name = field.method_name
+
+        def convert_method(value: Any, state: dict) -> Any:
+            holder = state["holders"].get(serializer_class)
+            if holder is None:
+                holder = serializer_class(context=state["context"])
+                state["holders"][serializer_class] = holder
+            return getattr(holder, method_name)(value)
+
+        return convert_method
+
+    if isinstance(field, serializers.ChoiceField):
+        choices = field.choice_strings_to_values
+        return lambda value, state: (
+            value if value == "" else choices.get(str(value), value)
+        )
+
+    if isinstance(field, (serializers.ReadOnlyField, serializers.JSONField)):
+        return lambda value, state: value
+
+    if isinstance(field, serializers.IntegerField):
+        return lambda value, state: int(value)
+
+    if isinstance(field, serializers.FloatField):
+        return lambda value, state: float(value)
+
+    if isinstance(field, serializers.CharField):
+        return lambda value, state: str(value)
+
+    if isinstance(field, serializers.DateTimeField):
+        return _compile_datetime(field)
+
+    if isinstance(field, serializers.DateField):
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if output_format and output_format.lower() == "iso-8601":
+            return lambda value, state: (
+                value if isinstance(value, str) else value.isoformat()
+            )
+
+    return lambda value, state: field.to_representation(value)
+
+
+def _compile_datetime(field: serializers.DateTimeField) -> Converter:
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != "iso-8601":
+        return lambda value, state: field.to_representation(value)
+
+    field_timezone = getattr(field, "timezone", None)
+
+    def convert_datetime(value: datetime | date | str, state: dict) -> str | None:
+        if not value:
+            return None
+        if isinstance(value, str):
+            return value
+
+        # The current timezone lookup goes through a context local, it is
+        # resolved once per rendering instead of once per value.
+        tz = field_timezone or state.get("timezone")
+        if tz is None:
+            tz = state["timezone"] = field.default_timezone()
+
+        if tz is not None and value.utcoffset() is not None:  # type: ignore
+            value = value.astimezone(tz)  # type: ignore
+        else:
+            value = field.enforce_timezone(value)  # type: ignore
+
+        iso = value.isoformat()
+        return iso[:-6] + "Z" if iso.endswith("+00:00") else iso
+
+    return convert_datetime
+
+
+session_representation = CompiledSerializer(visits_serializers.SessionModelSerializer)
+user_session_representation = CompiledSerializer(
+    visits_serializers.UserSessionSerializer
+)
+user_month_statistics_representation = CompiledSerializer(
+    visits_serializers.UserMonthStatisticsResponseSerializer
+)
@@ -4,7 +4,7 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from session.serializers import UserModelSerializer
-from .models import Session, SessionEntry
+from .models import ReportExportJob, Session, SessionEntry
 from .registry.store import get_statistics_extra_callbacks
 
 User = get_user_model()
@@ -72,6 +72,29 @@ class UserMonthStatisticsRequestSerializer(serializers.Serializer):
     user_id = serializers.IntegerField(required=False)
 
 
+class UsersRequestSerializer(serializers.Serializer):
+    search = serializers.CharField(
+        required=False,
+        allow_blank=True,
+        max_length=150,
+        help_text="Prefix of the full name or the username.",
+    )
+    fields = serializers.CharField(
+        required=False,
+        help_text="Comma separated user fields to return, all when omitted.",
+    )
+
+    def validate_fields(self, value: str) -> list[str]:
+        fields = [name.strip() for name in value.split(",") if name.strip()]
+        unknown = set(fields) - set(UserModelSerializer.Meta.fields)
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown fields: {', '.join(sorted(unknown))}."
+            )
+
+        return fields
+
+
 class UserMonthStatisticsResponseSerializer(serializers.Serializer):
 
     class StatisticsFieldSerializer(serializers.Serializer):
@@ -105,3 +128,78 @@ class UserMonthStatisticsResponseSerializer(serializers.Serializer):
     session = SessionModelSerializer(allow_null=True)
     statistics = StatisticsFieldSerializer()
     extra = ExtraFieldBaseSerializer(many=True)
+
+
+class UsersStatisticsRequestSerializer(serializers.Serializer):
+    start = serializers.DateField(default=lambda: timezone.localdate().replace(day=1))
+    end = serializers.DateField(default=lambda: timezone.localdate())
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=True
+    )
+    extra = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+
+        return attrs
+
+
+class UsersStatisticsResponseSerializer(serializers.Serializer):
+
+    class DayStatisticsSerializer(serializers.Serializer):
+        date = serializers.DateField()
+        first_start = serializers.DateTimeField(allow_null=True)
+        last_end = serializers.DateTimeField(allow_null=True)
+        statistics = UserMonthStatisticsResponseSerializer.StatisticsFieldSerializer()
+        extra = UserMonthStatisticsResponseSerializer.ExtraFieldBaseSerializer(
+            many=True
+        )
+
+    user = UserModelSerializer()
+    statistics = UserMonthStatisticsResponseSerializer.StatisticsFieldSerializer()
+    days = DayStatisticsSerializer(many=True)
+
+
+class ReportExportJobCreateSerializer(serializers.Serializer):
+    start = serializers.DateField(default=lambda: timezone.localdate().replace(day=1))
+    end = serializers.DateField(default=lambda: timezone.localdate())
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, allow_empty=True
+    )
+
+    def validate(self, attrs):
+        if attrs["start"] > attrs["end"]:
+            raise serializers.ValidationError("start must not be after end.")
+
+        return attrs
+
+
+class ReportExportJobModelSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportExportJob
+        fields = [
+            "id",
+            "status",
+            "start",
+            "end",
+            "total",
+            "processed",
+            "progress",
+            "download_url",
+            "error",
+            "created_at",
+            "finished_at",
+        ]
+
+    def get_download_url(self, obj: ReportExportJob) -> str | None:
+        if obj.status != ReportExportJob.JobStatus.DONE:
+            return None
+
+        url = f"/api/v1/visits/stats/export/jobs/{obj.pk}/download"
+        request = self.context.get("request")
+
+        return request.build_absolute_uri(url) if request else url
@@ -1,17 +1,39 @@
 from time import localtime
+import os
 import pytz
 import math
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from tempfile import TemporaryDirectory
+from uuid import uuid4
+from zipfile import ZIP_DEFLATED, ZipFile
+import django
+from typing import IO, Iterable
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import PatternFill
 from datetime import date, datetime, timedelta, tzinfo
+from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.models import User
-from django.db.models import Subquery, OuterRef, Q
+from django.db.models import Exists, Subquery, OuterRef, Q
 from django.db.models.functions import Trunc
 from django.db import transaction
 
-from .models import Session, SessionEntry
-from .registry.store import get_statistics_extra_callbacks
+from .models import (
+    DailyStatistics,
+    ReportExportJob,
+    Session,
+    SessionEntry,
+    calculate_entries_statistics,
+)
+from .broadcast import broadcast_on_commit
+from .statistics import STATISTICS_TYPES, EntryColumns
+from .registry.store import (
+    run_statistics_extra_callbacks,
+    run_users_statistics_extra_callbacks,
+)
 from .registry.types import StatisticsExtraDataResult
 from .helpers import to_utc
 
@@ -22,8 +44,13 @@ class SessionService:
     It provides methods to enter, exit, update entries, and retrieve session information.
     """
 
+    @transaction.atomic
     def enter(self, user: User, type: SessionEntry.SessionEntryType, time: datetime):
-        session, _ = Session.objects.get_or_create(user=user, date=timezone.localdate())
+        self.lock_user(user)
+        session, _ = Session.objects.get_or_create(
+            user=user, date=timezone.localdate(time)
+        )
+        session = self.lock_session(session)
         last_entry = session.get_last_entry()
 
         if not last_entry:
@@ -61,6 +88,7 @@ class SessionService:
         last_entry.comment = comment
         last_entry.save()
 
+    @transaction.atomic
     def handle_leave(
         self,
         user: User,
@@ -79,6 +107,7 @@ class SessionService:
         last_entry.close(time)
         session.add_enter(start=time, type=type, comment=comment)
 
+    @transaction.atomic
     def handle_cheater_leave(self, user: User, entry: SessionEntry, end: datetime):
         session: Session = entry.session
         last_entry = session.get_last_entry()
@@ -189,22 +218,81 @@ class SessionService:
                 session=session, start=start, end=end, type=type, comment=comment
             )
 
+    def lock_user(self, user: User):
+        """
+        Serialize session changes of `user` until the end of the transaction.
+
+        The user row always exists, so locking it never falls back to a gap
+        lock, and reads that follow see the rows committed by the previous
+        lock holder.
+        """
+        list(User.objects.select_for_update().filter(pk=user.pk).values_list("pk"))
+
+    def lock_session(self, session: Session) -> Session:
+        """
+        Reload `session` with its row locked until the end of the transaction.
+        """
+        return (
+            Session.objects.select_related(None)
+            .prefetch_related(None)
+            .select_for_update()
+            .get(pk=session.pk)
+        )
+
     def get_current_session(self, user: User) -> Session | None:
         session = Session.objects.get_last_user_session(user)
 
         if not session:
             return None
 
-        if session.date == timezone.localdate() or session.get_open_entries().exists():
+        last_entry = session.last_entry
+        if session.date == timezone.localdate() or (last_entry and last_entry.is_open):
             return session
 
         return None
 
+    @transaction.atomic
+    def flag_stale_sessions(self, now: datetime | None = None) -> list[Session]:
+        """
+        Mark CHEATER the sessions left open across the day rollover, with
+        one query and one bulk update. Their users are notified once the
+        transaction commits.
+
+        The bulk update skips the entry signals, the board snapshots of the
+        web processes catch up within BOARD_CACHE_TTL.
+        """
+        sessions = list(Session.objects.overdue(now).select_for_update())
+        if not sessions:
+            return []
+
+        for session in sessions:
+            session.status = Session.SessionStatus.CHEATER
+        Session.objects.bulk_update(sessions, ["status"])
+
+        comments = dict(
+            SessionEntry.objects.filter(
+                pk__in=[session.last_entry_id for session in sessions]  # type: ignore
+            ).values_list("pk", "comment")
+        )
+        for session in sessions:
+            message = {
+                "type": "session_status_updated",
+                "payload": {
+                    "session_id": session.id,  # type: ignore
+                    "status": session.status,
+                    "user_id": session.user_id,  # type: ignore
+                    "comment": comments.get(session.last_entry_id),  # type: ignore
+                },
+            }
+            broadcast_on_commit(("session", session.id), session.user_id, message)  # type: ignore
+
+        return sessions
+
     def get_session_last_comment(self, session: Session | None) -> str | None:
         if session is None:
             return None
 
-        last_entry = session.get_last_entry()
+        last_entry = session.last_entry
         return last_entry.comment if last_entry else None
 
     def get_session_status(self, session: Session | None) -> Session.SessionStatus:
@@ -218,18 +306,47 @@ class SessionService:
         users = (
             User.objects.filter(is_active=True)
             .annotate(current_session=Subquery(current_sessions.values("id")[:1]))
-            .prefetch_related("avatar")
+            .select_related("card")
         )
 
         session_ids = [u.current_session for u in users if u.current_session]
-        sessions = Session.objects.filter(id__in=session_ids).select_related("user")
-        sessions_by_id = {s.id: s for s in sessions}
+        sessions = (
+            Session.objects.filter(id__in=session_ids)
+            .select_related("user")
+            .prefetch_related(None)
+        )
+        sessions_by_id = {session.id: session for session in sessions}
 
         return [
             {"user": user, "session": sessions_by_id.get(user.current_session)}
             for user in users
         ]
 
+    def get_board(
+        self, active_users_with_sessions: list[dict] | None = None
+    ) -> list[dict]:
+        """
+        Today's presence board: every active user with their session state.
+        """
+        if active_users_with_sessions is None:
+            active_users_with_sessions = self.get_active_user_with_sessions()
+
+        board = []
+        for us in active_users_with_sessions:
+            session: Session | None = us.get("session")
+            last_entry = session.last_entry if session else None
+
+            board.append({
+                "user": us["user"],
+                "session": {
+                    "status": self.get_session_status(session),
+                    "comment": getattr(last_entry, "comment", ""),
+                    "time": getattr(last_entry, "start", None),
+                },
+            })
+
+        return board
+
 
 class StatisticsService:
     """
@@ -237,68 +354,195 @@ class StatisticsService:
     It provides methods to retrieve statistics for a user over a specified date range.
     """
 
+    def __init__(self):
+        # Types of the plugins left out of the extra data of the last calls.
+        self.unavailable_extra: set[str] = set()
+
     def get_user_date_range_statistics(
-        self, user: User, start_date: date, end_date: date
+        self, user: User, start_date: date, end_date: date, with_sessions: bool = True
     ) -> list[dict]:
+        """
+        Statistics are read from the daily rollups. Sessions with their entries
+        are loaded only when `with_sessions` is set.
+        """
         result = []
 
-        sessions = Session.objects.filter(
+        daily_statistics = DailyStatistics.objects.filter(
             user=user, date__range=(start_date, end_date)
-        ).prefetch_related("entries")
+        )
+        statistics_date_map = {d.date: d.as_statistics() for d in daily_statistics}
+        missing = self._calculate_missing_daily_statistics(
+            [user.id], start_date, end_date
+        )
+        for (_, missing_date), day in missing.items():
+            statistics_date_map[missing_date] = self._pick_statistics(day)
+
+        session_date_map = {}
+        if with_sessions:
+            sessions = Session.objects.filter(
+                user=user, date__range=(start_date, end_date)
+            )
+            session_date_map = {s.date: s for s in sessions}
 
-        session_date_map = {s.date: s for s in sessions}
+        extra_date_map = self._collect_extra(user, start_date, end_date)
 
         current_date = start_date
         while current_date <= end_date:
             session: Session | None = session_date_map.get(current_date)
-            entries = session.entries.all() if session else []
-            statistics = self._calculate_statistics(entries)
-            extra = self._collect_extra(user, current_date)
+            statistics = statistics_date_map.get(
+                current_date, self._calculate_statistics([])
+            )
+
             result.append(
                 {
                     "date": current_date,
                     "session": session,
                     "statistics": statistics,
-                    "extra": extra,
+                    "extra": extra_date_map.get(current_date, []),
                 }
             )
             current_date += timedelta(days=1)
 
         return result
 
-    def _calculate_statistics(self, entries: list[SessionEntry]) -> dict[str, float]:
-        result = {
-            "work_time": 0.0,
-            "break_time": 0.0,
-            "lunch_time": 0.0,
-        }
+    def get_users_date_range_statistics(
+        self,
+        users: list[User],
+        start_date: date,
+        end_date: date,
+        with_extra: bool = False,
+    ) -> list[dict]:
+        """
+        Statistics for many users over a date range. Rollups of all users are
+        read in one query, days without a rollup are calculated from entries
+        loaded in one batch, so the number of queries does not depend on the
+        number of users or days. Extra data is collected by plugins for all
+        users at once and only when `with_extra` is set.
+        """
+        user_ids = [user.id for user in users]
+        days_map: dict[int, dict[date, dict]] = defaultdict(dict)
+
+        daily_statistics = DailyStatistics.objects.filter(
+            user_id__in=user_ids, date__range=(start_date, end_date)
+        )
+        for daily in daily_statistics:
+            days_map[daily.user_id][daily.date] = {
+                "statistics": daily.as_statistics(),
+                "first_start": daily.first_start,
+                "last_end": daily.last_end,
+            }
+
+        missing = self._calculate_missing_daily_statistics(
+            user_ids, start_date, end_date
+        )
+        for (user_id, missing_date), day in missing.items():
+            days_map[user_id][missing_date] = {
+                "statistics": self._pick_statistics(day),
+                "first_start": day["first_start"],
+                "last_end": day["last_end"],
+            }
 
-        for entry in entries:
-            if not entry.end:
-                continue
+        result = []
+        users_extra = (
+            self._collect_users_extra(users, start_date, end_date) if with_extra else {}
+        )
+
+        for user in users:
+            user_days = days_map.get(user.id, {})
+            extra_date_map = users_extra.get(user.id, {})
+            total = self._calculate_statistics([])
+            days = []
+
+            current_date = start_date
+            while current_date <= end_date:
+                day = user_days.get(current_date) or {
+                    "statistics": self._calculate_statistics([]),
+                    "first_start": None,
+                    "last_end": None,
+                }
+                for key, value in day["statistics"].items():
+                    total[key] += value
 
-            delta = (entry.end - entry.start).total_seconds()
+                days.append(
+                    {
+                        "date": current_date,
+                        **day,
+                        "extra": extra_date_map.get(current_date, []),
+                    }
+                )
+                current_date += timedelta(days=1)
 
-            if entry.type == "WORK":
-                result["work_time"] += delta
-            elif entry.type == "BREAK":
-                result["break_time"] += delta
-            elif entry.type == "LUNCH":
-                result["lunch_time"] += delta
+            result.append({"user": user, "statistics": total, "days": days})
 
         return result
 
-    def _collect_extra(self, user: User, date: date):
-        results: list[StatisticsExtraDataResult] = []
-        for callback in get_statistics_extra_callbacks():
-            data = callback(user, date)
-            if data:
-                results.append(
-                    {
-                        "type": getattr(callback, "_type"),
-                        "payload": data,
-                    }
+    def _calculate_statistics(self, entries: list[SessionEntry]) -> dict[str, float]:
+        return calculate_entries_statistics(entries)
+
+    def _calculate_missing_daily_statistics(
+        self, user_ids: list[int], start_date: date, end_date: date
+    ) -> dict[tuple[int, date], dict]:
+        """
+        Calculate days that have sessions but no rollup yet with the
+        vectorized engine, keyed by `(user_id, date)`.
+        """
+        entries = SessionEntry.objects.filter(
+            session__user_id__in=user_ids,
+            session__date__range=(start_date, end_date),
+        ).filter(
+            ~Exists(
+                DailyStatistics.objects.filter(
+                    user_id=OuterRef("session__user_id"),
+                    date=OuterRef("session__date"),
                 )
+            )
+        )
+
+        return EntryColumns.from_queryset(
+            entries, ("session__user_id", "session__date")
+        ).daily_statistics()
+
+    def _pick_statistics(self, day: dict) -> dict[str, float]:
+        return {key: day[key] for key in STATISTICS_TYPES.values()}
+
+    def _collect_extra(
+        self, user: User, start_date: date, end_date: date
+    ) -> dict[date, list[StatisticsExtraDataResult]]:
+        """
+        Extra data of every plugin by date, one plugin call for the whole range.
+        Plugins run concurrently, the ones that fail or miss their deadline are
+        added to `unavailable_extra`.
+        """
+        extra, unavailable = run_statistics_extra_callbacks(user, start_date, end_date)
+        self.unavailable_extra |= unavailable
+
+        return self._group_extra_by_date(extra)
+
+    def _collect_users_extra(
+        self, users: list[User], start_date: date, end_date: date
+    ) -> dict[int, dict[date, list[StatisticsExtraDataResult]]]:
+        """
+        Extra data of every plugin by user id and date. The calls of all users
+        run concurrently under the deadline of their plugin.
+        """
+        extra, unavailable = run_users_statistics_extra_callbacks(
+            users, start_date, end_date
+        )
+        self.unavailable_extra |= unavailable
+
+        return {
+            user_id: self._group_extra_by_date(user_extra)
+            for user_id, user_extra in extra.items()
+        }
+
+    def _group_extra_by_date(
+        self, extra: dict[str, dict]
+    ) -> dict[date, list[StatisticsExtraDataResult]]:
+        results: dict[date, list[StatisticsExtraDataResult]] = defaultdict(list)
+        for type, date_map in extra.items():
+            for extra_date, data in date_map.items():
+                if data:
+                    results[extra_date].append({"type": type, "payload": data})
 
         return results
 
@@ -309,8 +553,18 @@ class XlsxService:
     """
 
     def user_date_period_statistics_xlsx(
-        self, user: User, start: date, end: date, data: list[dict]
-    ) -> Workbook:
+        self,
+        user: User,
+        start: date,
+        end: date,
+        data: Iterable[dict],
+        file: str | IO[bytes],
+    ) -> None:
+        """
+        Write the report into `file` with a write-only workbook. Rows are
+        flushed to a temporary file as they are appended, so memory usage does
+        not depend on the length of the period.
+        """
 
         def format_timedelta(td: timedelta) -> str:
             total_minutes = int(td.total_seconds() // 60)
@@ -319,12 +573,10 @@ class XlsxService:
 
             return f"{hours}:{minutes:02d}"
 
-        wb = Workbook()
-        ws = wb.active
-        if not ws:
-            raise Exception
-
-        ws.title = f"Report {user.username} {start.strftime('%Y-%m-%d')} - {end.strftime('%Y-%m-%d')}"
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(
+            f"Report {user.username} {start.strftime('%Y-%m-%d')} - {end.strftime('%Y-%m-%d')}"
+        )
 
         ws.column_dimensions["A"].width = 12
         ws.column_dimensions["B"].width = 15
@@ -337,12 +589,37 @@ class XlsxService:
             start_color="CACACA", end_color="CACACA", fill_type="solid"
         )
 
-        ws.append(
-            ["Date", "Start Time", "End Time", "Work Time", "Break Time", "Lunch Time"]
+        def filled(values: list) -> list[WriteOnlyCell]:
+            cells = []
+            for value in values:
+                cell = WriteOnlyCell(ws, value=value)
+                cell.fill = gray_fill
+                cells.append(cell)
+
+            return cells
+
+        current_idx = 0
+
+        def append(values: list, hidden: bool = False):
+            nonlocal current_idx
+            current_idx += 1
+
+            if not hidden:
+                ws.append(values)
+                return
+
+            # Row dimensions are read when the row is written, drop them
+            # afterwards to keep memory flat.
+            ws.row_dimensions[current_idx].outline_level = 1
+            ws.row_dimensions[current_idx].hidden = True
+            ws.append(values)
+            del ws.row_dimensions[current_idx]
+
+        append(
+            filled(
+                ["Date", "Start Time", "End Time", "Work Time", "Break Time", "Lunch Time"]
+            )
         )
-        current_idx = 1
-        for cell in ws[current_idx]:
-            cell.fill = gray_fill
 
         for row in data:
             entries: list[SessionEntry] = (
@@ -350,8 +627,7 @@ class XlsxService:
             )
 
             if not entries:
-                ws.append([row["date"], "--", "--", "--", "--", "--"])
-                current_idx += 1
+                append([row["date"], "--", "--", "--", "--", "--"])
                 continue
 
             first_entry, last_entry = entries[0], entries[-1]
@@ -381,37 +657,163 @@ class XlsxService:
                 ),
             ]
 
-            ws.append(summary)
-            current_idx += 1
-
-            for cell in ws[current_idx]:
-                cell.fill = gray_fill
-
-            if len(entries) == 0:
-                continue
-
-            ws.append(["", "Start Time", "End Time", "Type", "Comment"])
-            current_idx += 1
+            append(filled(summary))
+            append(["", "Start Time", "End Time", "Type", "Comment"], hidden=True)
 
-            ws.row_dimensions[current_idx].outline_level = 1
-            ws.row_dimensions[current_idx].hidden = True
-
-            group_start = group_end = current_idx + 1
             for entry in entries:
-                ws.append(
+                append(
                     [
                         "",
                         (entry.start.strftime("%H:%M:%S") if entry.start else ""),
                         entry.end.strftime("%H:%M:%S") if entry.end else "",
                         entry.type if entry.type else "",
                         entry.comment if entry.comment else "",
-                    ]
+                    ],
+                    hidden=True,
                 )
-                current_idx += 1
-                group_end = current_idx
 
-            for i in range(group_start, group_end + 1):
-                ws.row_dimensions[i].outline_level = 1
-                ws.row_dimensions[i].hidden = True
+        wb.save(file)
+
+
+def build_user_report_file(
+    user_id: int, start: date, end: date, directory: str
+) -> tuple[int, str]:
+    """
+    Generate one user XLSX report into `directory`. Runs in report worker
+    processes, so it takes only picklable arguments.
+    """
+    user = User.objects.get(pk=user_id)
+    data = StatisticsService().get_user_date_range_statistics(user, start, end)
+
+    path = os.path.join(directory, f"{user.pk}.xlsx")
+    XlsxService().user_date_period_statistics_xlsx(user, start, end, data, path)
+
+    return user.pk, path
+
+
+class ReportExportService:
+    """
+    Service for bulk XLSX reports generated outside of the request cycle.
+    """
+
+    def create_job(
+        self, created_by: User, users: list[User], start: date, end: date
+    ) -> ReportExportJob:
+        with transaction.atomic():
+            job = ReportExportJob.objects.create(
+                created_by=created_by, start=start, end=end, total=len(users)
+            )
+            job.users.set(users)
+
+        return job
+
+    def claim_job(self) -> ReportExportJob | None:
+        """
+        Lock the oldest pending job and mark it as running. Jobs abandoned
+        by a crashed worker are recovered first.
+        """
+        self.recover_stale_jobs()
+
+        with transaction.atomic():
+            job = (
+                ReportExportJob.objects.select_for_update(skip_locked=True)
+                .filter(status=ReportExportJob.JobStatus.PENDING)
+                .order_by("id")
+                .first()
+            )
+            if job is None:
+                return None
+
+            job.status = ReportExportJob.JobStatus.RUNNING
+            job.started_at = job.heartbeat_at = timezone.now()
+            job.attempts += 1
+            job.save(update_fields=["status", "started_at", "heartbeat_at", "attempts"])
+
+        return job
+
+    def recover_stale_jobs(self) -> int:
+        """
+        Requeue running jobs without a heartbeat for REPORT_EXPORT_STALE_AFTER
+        seconds, or fail them once they used REPORT_EXPORT_MAX_ATTEMPTS.
+        """
+        now = timezone.now()
+        cutoff = now - timedelta(seconds=settings.REPORT_EXPORT_STALE_AFTER)
+        stale = ReportExportJob.objects.filter(
+            Q(heartbeat_at__lt=cutoff)
+            | Q(heartbeat_at__isnull=True, started_at__lt=cutoff),
+            status=ReportExportJob.JobStatus.RUNNING,
+        )
+
+        failed = stale.filter(attempts__gte=settings.REPORT_EXPORT_MAX_ATTEMPTS).update(
+            status=ReportExportJob.JobStatus.FAILED,
+            error="The report worker stopped responding.",
+            finished_at=now,
+        )
+        requeued = stale.update(
+            status=ReportExportJob.JobStatus.PENDING, processed=0, heartbeat_at=None
+        )
 
-        return wb
+        return failed + requeued
+
+    def run_job(self, job: ReportExportJob, workers: int) -> None:
+        """
+        Generate reports of all job users in parallel worker processes
+        and pack them into a ZIP archive under MEDIA_ROOT.
+        """
+        users = {u.pk: u for u in job.users.all()}
+        name = f"{ReportExportJob._meta.get_field('file').upload_to}/{uuid4().hex}.zip"
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        try:
+            with (
+                TemporaryDirectory() as directory,
+                ZipFile(path, "w", ZIP_DEFLATED) as archive,
+                ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=django.setup,
+                ) as executor,
+            ):
+                futures = [
+                    executor.submit(
+                        build_user_report_file, user_id, job.start, job.end, directory
+                    )
+                    for user_id in users
+                ]
+
+                # The heartbeat is refreshed even while a slow report keeps
+                # every worker busy.
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(
+                        pending,
+                        timeout=settings.REPORT_EXPORT_STALE_AFTER / 5,
+                        return_when=FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        user_id, report_path = future.result()
+                        archive.write(
+                            report_path,
+                            arcname=f"{users[user_id].username} {job.start.strftime('%Y-%m-%d')} {job.end.strftime('%Y-%m-%d')}.xlsx",
+                        )
+                        os.remove(report_path)
+                        job.processed += 1
+
+                    ReportExportJob.objects.filter(pk=job.pk).update(
+                        processed=job.processed, heartbeat_at=timezone.now()
+                    )
+        except Exception as e:
+            if os.path.exists(path):
+                os.remove(path)
+
+            job.status = ReportExportJob.JobStatus.FAILED
+            job.error = str(e)
+            job.finished_at = timezone.now()
+            job.save(update_fields=["status", "error", "finished_at"])
+            raise
+
+        job.file.name = name
+        job.status = ReportExportJob.JobStatus.DONE
+        job.finished_at = timezone.now()
+        job.save(update_fields=["file", "status", "finished_at"])
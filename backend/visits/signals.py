@@ -1,12 +1,12 @@
 from django.dispatch import receiver
 from django_auth_ldap.backend import populate_user, LDAPBackend, _LDAPUser
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.contrib.auth.models import User
 from ldap.cidict import cidict
-from channels.layers import get_channel_layer, BaseChannelLayer
-from asgiref.sync import async_to_sync
 
-from .models import SessionEntry
+from .board import board_cache
+from .broadcast import broadcast_on_commit
+from .models import Session, SessionEntry
 
 
 @receiver(populate_user, sender=LDAPBackend)
@@ -40,20 +40,36 @@ def user_populated(user: User, ldap_user: _LDAPUser, **kwargs):
 
 
 @receiver(post_save, sender=SessionEntry)
-def session_updated(sender, instance: SessionEntry, **kwargs):
-    channel_layer: BaseChannelLayer | None = get_channel_layer()
+@receiver(post_delete, sender=SessionEntry)
+def session_entries_changed(sender, instance: SessionEntry, **kwargs):
+    """
+    Keep the materialized session status, last entry and daily statistics
+    in sync with entries.
+    """
+    instance.session.refresh_aggregates()
+    board_cache.update_session_on_commit(instance.session)
+
+    loaded_session_id = getattr(instance, "_loaded_session_id", None)
+    if loaded_session_id and loaded_session_id != instance.session_id:
+        previous = Session.objects.filter(pk=loaded_session_id).first()
+        if previous:
+            previous.refresh_aggregates()
+            board_cache.update_session_on_commit(previous)
+
+    instance._loaded_session_id = instance.session_id
 
-    if channel_layer is None:
-        return
 
+@receiver(post_save, sender=SessionEntry)
+def session_updated(sender, instance: SessionEntry, **kwargs):
+    session = instance.session
     message = {
         "type": "session_status_updated",
         "payload": {
-            "session_id": instance.session.id,
-            "status": instance.session.status,
-            "user_id": instance.session.user.id,
+            "session_id": session.id,
+            "status": session.status,
+            "user_id": session.user_id,
             "comment": instance.comment,
         },
     }
 
-    async_to_sync(channel_layer.group_send)("visits", message)
+    broadcast_on_commit(("session", session.id), session.user_id, message)
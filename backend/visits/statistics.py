@@ -0,0 +1,155 @@
+"""
+Vectorized statistics engine.
+
+Entries are pulled from the database as flat `(key, type, start, end)` value
+tuples instead of model instances and reduced with grouped NumPy operations.
+"""
+
+from datetime import datetime, timezone as dt_timezone
+from typing import Hashable, Iterable
+
+import numpy as np
+
+from .models import SessionEntry
+
+STATISTICS_TYPES: dict[str, str] = {
+    SessionEntry.SessionEntryType.WORK.value: "work_time",
+    SessionEntry.SessionEntryType.BREAK.value: "break_time",
+    SessionEntry.SessionEntryType.LUNCH.value: "lunch_time",
+}
+
+EntryRow = tuple[Hashable, str, datetime, datetime | None]
+
+
+class EntryColumns:
+    """
+    Array backed columns of session entries.
+
+    `groups` holds the group index of every entry into `keys`, `types` the
+    index into `STATISTICS_TYPES` (-1 for types without statistics), `starts`
+    and `ends` POSIX timestamps, with NaN for entries that are still open.
+    """
+
+    def __init__(
+        self,
+        keys: list[Hashable],
+        groups: np.ndarray,
+        types: np.ndarray,
+        starts: np.ndarray,
+        ends: np.ndarray,
+    ):
+        self.keys = keys
+        self.groups = groups
+        self.types = types
+        self.starts = starts
+        self.ends = ends
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[EntryRow]) -> "EntryColumns":
+        rows = rows if isinstance(rows, list) else list(rows)
+        count = len(rows)
+
+        key_index: dict[Hashable, int] = {}
+        groups = np.fromiter(
+            (key_index.setdefault(row[0], len(key_index)) for row in rows),
+            dtype=np.int64,
+            count=count,
+        )
+
+        type_index = {type: i for i, type in enumerate(STATISTICS_TYPES)}
+        types = np.fromiter(
+            (type_index.get(row[1], -1) for row in rows), dtype=np.int64, count=count
+        )
+        starts = np.fromiter(
+            (row[2].timestamp() for row in rows), dtype=np.float64, count=count
+        )
+        ends = np.fromiter(
+            (row[3].timestamp() if row[3] else np.nan for row in rows),
+            dtype=np.float64,
+            count=count,
+        )
+
+        return cls(list(key_index), groups, types, starts, ends)
+
+    @classmethod
+    def from_queryset(cls, queryset, key_fields: Iterable[str]) -> "EntryColumns":
+        """
+        Load columns from a SessionEntry queryset grouped by `key_fields`,
+        e.g. `("session__user_id", "session__date")`.
+        """
+        key_fields = list(key_fields)
+        values = queryset.values_list(*key_fields, "type", "start", "end")
+
+        if len(key_fields) == 1:
+            return cls.from_rows(values)
+
+        width = len(key_fields)
+        return cls.from_rows(
+            (row[:width], row[width], row[width + 1], row[width + 2]) for row in values
+        )
+
+    def durations(self) -> np.ndarray:
+        """
+        Sum closed entries durations in seconds, shaped `(groups, types)`.
+        """
+        size = len(self.keys) * len(STATISTICS_TYPES)
+        mask = (self.types >= 0) & ~np.isnan(self.ends)
+        bins = self.groups[mask] * len(STATISTICS_TYPES) + self.types[mask]
+        weights = self.ends[mask] - self.starts[mask]
+
+        return np.bincount(bins, weights=weights, minlength=size).reshape(
+            len(self.keys), len(STATISTICS_TYPES)
+        )
+
+    def bounds(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Start of the first entry and end of the last entry (ordered by start)
+        of every group. The end is NaN when the last entry is open.
+        """
+        first_start = np.full(len(self.keys), np.nan)
+        last_end = np.full(len(self.keys), np.nan)
+        if not len(self):
+            return first_start, last_end
+
+        order = np.lexsort((self.starts, self.groups))
+        sorted_groups = self.groups[order]
+        boundaries = np.flatnonzero(np.diff(sorted_groups)) + 1
+        firsts = np.concatenate(([0], boundaries))
+        lasts = np.concatenate((boundaries - 1, [len(order) - 1]))
+
+        first_start[sorted_groups[firsts]] = self.starts[order[firsts]]
+        last_end[sorted_groups[lasts]] = self.ends[order[lasts]]
+
+        return first_start, last_end
+
+    def statistics(self) -> dict[Hashable, dict[str, float]]:
+        durations = self.durations()
+        fields = list(STATISTICS_TYPES.values())
+
+        return {
+            key: dict(zip(fields, row))
+            for key, row in zip(self.keys, durations.tolist())
+        }
+
+    def daily_statistics(self) -> dict[Hashable, dict]:
+        """
+        Statistics of every group in the DailyStatistics fields shape.
+        """
+        first_start, last_end = self.bounds()
+        result = self.statistics()
+
+        for i, key in enumerate(self.keys):
+            result[key]["first_start"] = _to_datetime(first_start[i])
+            result[key]["last_end"] = _to_datetime(last_end[i])
+
+        return result
+
+
+def _to_datetime(timestamp: float) -> datetime | None:
+    if np.isnan(timestamp):
+        return None
+
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import re
+from collections import deque
+from typing import Protocol
+from uuid import uuid4
+
+from channels.layers import get_channel_layer
+from django.contrib.auth.models import Group, User
+
+logger = logging.getLogger(__name__)
+
+ALL_TOPIC = "all"
+TOPIC_PATTERN = re.compile(r"^(all|user\.\d+|team\.\d+)$")
+# Channel layer group of all board events, topics are filtered per process.
+BOARD_GROUP = "visits"
+
+
+def parse_topics(values: list[str]) -> set[str]:
+    """
+    Valid topics among `values`: "all", "user.<user id>" or "team.<group id>".
+    """
+    return {value for value in values if TOPIC_PATTERN.match(value)}
+
+
+def user_topics(user_id: int) -> list[str]:
+    """
+    Topics an event about the user is routed to, its teams are auth groups.
+    """
+    teams = Group.objects.filter(user__id=user_id).values_list("id", flat=True)
+    return [ALL_TOPIC, f"user.{user_id}", *(f"team.{id}" for id in teams)]
+
+
+def topic_user_ids(topics: set[str]) -> set[int] | None:
+    """
+    Users whose events belong to `topics`, None for all users.
+    """
+    if ALL_TOPIC in topics:
+        return None
+
+    user_ids = {int(t.split(".")[1]) for t in topics if t.startswith("user.")}
+    teams = [int(t.split(".")[1]) for t in topics if t.startswith("team.")]
+    if teams:
+        user_ids.update(
+            User.objects.filter(groups__id__in=teams).values_list("id", flat=True)
+        )
+
+    return user_ids
+
+
+class StreamSubscriber(Protocol):
+    topics: set[str]
+
+    async def send_event(self, event: dict): ...
+
+
+class BoardStream:
+    """
+    Process-level subscription to the board events.
+
+    The stream joins the board group while it has local subscribers and
+    leaves it once nobody is left. Every event is sent to the group once,
+    with the topics it belongs to. It gets a sequence number, is kept in a
+    bounded log and is passed to the subscribers of its topics.
+
+    A client reconnecting with the cursor of its last event gets only the
+    events it missed. The epoch changes with every process start, so a cursor
+    from another process, one older than the log or than the group
+    subscription, requires a fresh snapshot.
+    """
+
+    def __init__(self, size: int = 1000, refresh: int = 3600):
+        self.epoch = uuid4().hex[:12]
+        self.seq = 0
+        # Group membership expires in the channel layer, re-join periodically.
+        self.refresh = refresh
+
+        self._log: deque[dict] = deque(maxlen=size)
+        # Sequence number the board group was joined at.
+        self._joined_at: int | None = None
+        self._subscribers: set[StreamSubscriber] = set()
+        self._channel: str | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def cursor(self) -> str:
+        return f"{self.epoch}:{self.seq}"
+
+    async def subscribe(self, subscriber: StreamSubscriber):
+        self._ensure_task()
+        self._subscribers.add(subscriber)
+
+        channel_layer = get_channel_layer()
+        if self._channel is None:
+            self._channel = await channel_layer.new_channel()
+
+        if self._joined_at is None:
+            self._joined_at = self.seq
+            await channel_layer.group_add(BOARD_GROUP, self._channel)
+
+    def unsubscribe(self, subscriber: StreamSubscriber):
+        self._subscribers.discard(subscriber)
+
+    def since(self, cursor: str | None, topics: set[str]) -> list[dict] | None:
+        """
+        Events of `topics` after `cursor`, or None if they are no longer
+        available.
+        """
+        if not cursor:
+            return None
+
+        epoch, _, seq = cursor.partition(":")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+
+        seq = int(seq)
+        if seq > self.seq:
+            return None
+
+        if self._joined_at is None or self._joined_at > seq:
+            return None
+
+        if seq == self.seq:
+            return []
+
+        if not self._log or self._log[0]["seq"] > seq + 1:
+            return None
+
+        return [
+            event
+            for event in self._log
+            if event["seq"] > seq and topics & set(event["topics"])
+        ]
+
+    def _ensure_task(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        channel_layer = get_channel_layer()
+        if self._channel is None:
+            self._channel = await channel_layer.new_channel()
+
+        while True:
+            await self._refresh_group()
+            refresh_at = loop.time() + self.refresh
+
+            while (timeout := refresh_at - loop.time()) > 0:
+                try:
+                    message = await asyncio.wait_for(
+                        channel_layer.receive(self._channel), timeout
+                    )
+                except TimeoutError:
+                    break
+
+                await self._publish(message)
+
+    async def _refresh_group(self):
+        if self._joined_at is None:
+            return
+
+        channel_layer = get_channel_layer()
+        if self._subscribers:
+            await channel_layer.group_add(BOARD_GROUP, self._channel)
+        else:
+            self._joined_at = None
+            await channel_layer.group_discard(BOARD_GROUP, self._channel)
+
+    async def _publish(self, message: dict):
+        self.seq += 1
+        event = {
+            "type": message["type"],
+            "payload": message.get("payload", {}),
+            "topics": message.get("topics", [ALL_TOPIC]),
+            "seq": self.seq,
+            "cursor": self.cursor,
+        }
+        self._log.append(event)
+
+        topics = set(event["topics"])
+        for subscriber in list(self._subscribers):
+            if not subscriber.topics & topics:
+                continue
+
+            try:
+                await subscriber.send_event(event)
+            except Exception as e:
+                logger.error(f"Failed to deliver board event: {e}")
+
+
+board_stream = BoardStream()
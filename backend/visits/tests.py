@@ -1,11 +1,47 @@
+import time
 from datetime import timedelta
+from io import BytesIO, StringIO
+from tempfile import TemporaryDirectory
 from urllib import response
-from django.test import TestCase
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
 from django.contrib.auth.models import User
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from django.utils import timezone
+from openpyxl import load_workbook
+from PIL import Image
+from asgiref.sync import async_to_sync
 
-from .models import Session, SessionEntry
+from main.renderers import ORJSONRenderer
+from session.cards import refresh_user_card
+from session.models import Avatar, UserCard
+from session.thumbnails import generate_avatar_thumbnails
+
+from .board import board_cache
+from .broadcast import dispatcher
+from .consumers import NotificationsConsumer
+from .layers import DatabaseChannelLayer
+from .models import (
+    ChannelMessage,
+    DailyStatistics,
+    ReportExportJob,
+    Session,
+    SessionEntry,
+    StaleSessionsRun,
+)
+from .registry import store
+from .registry.executor import StatisticsExtraExecutor
+from .representation import (
+    session_representation,
+    user_month_statistics_representation,
+)
+from .serializers import SessionModelSerializer, UserMonthStatisticsResponseSerializer
+from .services import ReportExportService, SessionService, StatisticsService
+from .statistics import EntryColumns
+from .stream import BoardStream, board_stream
 
 
 class SessionServiceTestCase(TestCase):
@@ -104,3 +140,565 @@ class SessionServiceTestCase(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(session.id, response.data["id"])
+
+    def test_session_status_materialized(self):
+        start = timezone.localtime().replace(microsecond=0)
+        session = Session.objects.create(user=self.user, date=start.date())
+        self.assertEqual(session.status, Session.SessionStatus.INACTIVE)
+
+        session.add_enter(start=start, type=SessionEntry.SessionEntryType.WORK)
+        session.refresh_from_db()
+        entry = session.get_last_entry()
+        self.assertEqual(session.status, Session.SessionStatus.ACTIVE)
+        self.assertEqual(session.last_entry, entry)
+
+        entry.close(start + timedelta(hours=1))  # type: ignore
+        session.refresh_from_db()
+        self.assertEqual(session.status, Session.SessionStatus.INACTIVE)
+
+        entry.delete()  # type: ignore
+        session.refresh_from_db()
+        self.assertEqual(session.status, Session.SessionStatus.INACTIVE)
+        self.assertIsNone(session.last_entry)
+
+    def test_daily_statistics_rollup(self):
+        start = timezone.localtime().replace(microsecond=0)
+        session = Session.objects.create(user=self.user, date=start.date())
+        session.add_enter(start=start, type=SessionEntry.SessionEntryType.WORK)
+        entry = session.get_last_entry()
+        entry.close(start + timedelta(hours=2))  # type: ignore
+
+        SessionEntry.objects.create(
+            session=session,
+            start=start + timedelta(hours=2),
+            end=start + timedelta(hours=3),
+            type=SessionEntry.SessionEntryType.LUNCH,
+        )
+
+        rollup = DailyStatistics.objects.get(user=self.user, date=session.date)
+        self.assertEqual(rollup.work_time, 2 * 3600)
+        self.assertEqual(rollup.lunch_time, 3600)
+        self.assertEqual(rollup.first_start, start)
+        self.assertEqual(rollup.last_end, start + timedelta(hours=3))
+
+        response = self.client.get(
+            "/api/v1/visits/stats/me",
+            {"start": session.date.isoformat(), "end": session.date.isoformat()},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]["statistics"]["work_time"], 2 * 3600)
+
+        session.entries.all().delete()  # type: ignore
+        self.assertFalse(
+            DailyStatistics.objects.filter(user=self.user, date=session.date).exists()
+        )
+
+    def test_users_statistics(self):
+        response = self.client.get("/api/v1/visits/stats/users")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_superuser = True
+        self.user.save()
+
+        start = timezone.localtime().replace(microsecond=0)
+        session = Session.objects.create(user=self.user, date=start.date())
+        SessionEntry.objects.create(
+            session=session,
+            start=start,
+            end=start + timedelta(hours=1),
+            type=SessionEntry.SessionEntryType.WORK,
+        )
+
+        response = self.client.get(
+            "/api/v1/visits/stats/users",
+            {
+                "start": session.date.isoformat(),
+                "end": session.date.isoformat(),
+                "user_ids": [self.user.id],
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["user"]["id"], self.user.id)
+        self.assertEqual(response.data[0]["statistics"]["work_time"], 3600)
+        self.assertEqual(len(response.data[0]["days"]), 1)
+
+    def test_statistics_extra_deadline(self):
+        today = timezone.localdate()
+
+        def slow(user, start, end):
+            time.sleep(0.3)
+            return {}
+
+        def fast(user, start, end):
+            return {start: {"hours": 1.0}}
+
+        for callback in (slow, fast):
+            setattr(callback, "_type", callback.__name__)
+            setattr(callback, "_timeout", 0.1)
+
+        executor = StatisticsExtraExecutor(failure_threshold=1)
+        results, unavailable = executor.run([slow, fast], self.user, today, today)
+        self.assertEqual(results, {"fast": {today: {"hours": 1.0}}})
+        self.assertEqual(unavailable, {"slow"})
+
+        # The late call opens the breaker, the plugin is not called again.
+        time.sleep(0.3)
+        results, unavailable = executor.run([slow, fast], self.user, today, today)
+        self.assertEqual(unavailable, {"slow"})
+
+        metrics = executor.metrics()
+        self.assertEqual(metrics["slow"]["calls"], 1)
+        self.assertEqual(metrics["slow"]["timeouts"], 1)
+        self.assertEqual(metrics["slow"]["rejected"], 1)
+        self.assertTrue(metrics["slow"]["circuit_open"])
+        self.assertEqual(metrics["fast"]["calls"], 2)
+
+    def test_statistics_extra_users_deadline(self):
+        today = timezone.localdate()
+        users = [self.user] + [
+            User.objects.create_user(username=f"user_{i}") for i in range(3)
+        ]
+
+        def hours(user, start, end):
+            time.sleep(0.1)
+            return {start: {"hours": float(user.pk)}}
+
+        setattr(hours, "_type", "hours")
+        setattr(hours, "_timeout", 0.3)
+
+        store.register_statistics_extra_range_callback(hours)
+        self.addCleanup(store._statistics_extra_registry.remove, hours)
+
+        # The calls of all users run at once, not one user after the other.
+        started = time.monotonic()
+        result = StatisticsService().get_users_date_range_statistics(
+            users, today, today, with_extra=True
+        )
+        self.assertLess(time.monotonic() - started, 0.3)
+
+        for item in result:
+            [day] = item["days"]
+            self.assertEqual(
+                day["extra"],
+                [{"type": "hours", "payload": {"hours": float(item["user"].pk)}}],
+            )
+
+    def test_export_user_report(self):
+        start = timezone.localtime().replace(microsecond=0)
+        session = Session.objects.create(user=self.user, date=start.date())
+        SessionEntry.objects.create(
+            session=session,
+            start=start,
+            end=start + timedelta(hours=1),
+            type=SessionEntry.SessionEntryType.WORK,
+        )
+
+        response = self.client.get(
+            "/api/v1/visits/stats/export",
+            {
+                "start": session.date.isoformat(),
+                "end": session.date.isoformat(),
+                "user_id": self.user.id,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+
+        wb = load_workbook(BytesIO(b"".join(response.streaming_content)))  # type: ignore
+        ws = wb.active
+        self.assertEqual(ws.max_row, 4)  # type: ignore
+        self.assertTrue(ws.row_dimensions[3].hidden)  # type: ignore
+        self.assertEqual(ws["B2"].value, start.strftime("%H:%M:%S"))  # type: ignore
+
+    def test_create_report_export_job(self):
+        response = self.client.post("/api/v1/visits/stats/export/jobs", {})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_superuser = True
+        self.user.save()
+
+        response = self.client.post(
+            "/api/v1/visits/stats/export/jobs",
+            {"user_ids": [self.user.id]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["status"], ReportExportJob.JobStatus.PENDING)
+        self.assertEqual(response.data["total"], 1)
+        self.assertIsNone(response.data["download_url"])
+
+        job = ReportExportJob.objects.get(pk=response.data["id"])
+        self.assertEqual(list(job.users.all()), [self.user])
+
+    def test_recover_stale_report_jobs(self):
+        service = ReportExportService()
+        today = timezone.localdate()
+        job = service.create_job(self.user, [self.user], today, today)
+        stale = timezone.now() - timedelta(hours=1)
+
+        for attempt in range(1, settings.REPORT_EXPORT_MAX_ATTEMPTS + 1):
+            self.assertEqual(service.claim_job(), job)
+            job.refresh_from_db()
+            self.assertEqual(job.status, ReportExportJob.JobStatus.RUNNING)
+            self.assertEqual(job.attempts, attempt)
+
+            # Not stale yet, another worker does not take it over.
+            self.assertEqual(service.recover_stale_jobs(), 0)
+
+            # The worker crashed.
+            ReportExportJob.objects.filter(pk=job.pk).update(heartbeat_at=stale)
+            self.assertEqual(service.recover_stale_jobs(), 1)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ReportExportJob.JobStatus.FAILED)
+        self.assertIsNone(service.claim_job())
+
+    def test_board_stream_resume(self):
+        stream = BoardStream(size=2)
+        stream._joined_at = 0
+        cursor = stream.cursor
+
+        for user_id in (1, 2):
+            async_to_sync(stream._publish)(
+                {
+                    "type": "session_status_updated",
+                    "payload": {},
+                    "topics": ["all", f"user.{user_id}"],
+                }
+            )
+
+        events = stream.since(cursor, {"all"})
+        self.assertEqual([e["seq"] for e in events], [1, 2])  # type: ignore
+        events = stream.since(cursor, {"user.1"})
+        self.assertEqual([e["seq"] for e in events], [1])  # type: ignore
+        self.assertEqual(stream.since(stream.cursor, {"all"}), [])
+
+        # Joined the board group after the cursor.
+        stream._joined_at = 1
+        self.assertIsNone(stream.since(cursor, {"user.2"}))
+        stream._joined_at = 0
+
+        async_to_sync(stream._publish)({"type": "session_status_updated", "payload": {}})
+        self.assertIsNone(stream.since(cursor, {"all"}))
+        self.assertIsNone(stream.since(f"other:{stream.seq}", {"all"}))
+
+    def test_today_board_etag(self):
+        board_cache.invalidate()
+        start = timezone.localtime().replace(microsecond=0) - timedelta(hours=1)
+        session = Session.objects.create(user=self.user, date=start.date())
+        session.add_enter(start=start, type=SessionEntry.SessionEntryType.WORK)
+
+        response = self.client.get("/api/v1/visits/today")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+
+        response = self.client.get("/api/v1/visits/today", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.put(
+            "/api/v1/visits/exit",
+            {"end": start + timedelta(minutes=30)},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        session.refresh_from_db()
+        board_cache.update_session(session)
+
+        response = self.client.get("/api/v1/visits/today", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+        [item] = [i for i in response.data if i["user"]["id"] == self.user.id]  # type: ignore
+        self.assertEqual(item["session"]["status"], session.status)
+
+    def test_orjson_renderer_scope(self):
+        response = self.client.get("/api/v1/visits/today")
+        self.assertIsInstance(response.accepted_renderer, ORJSONRenderer)  # type: ignore
+
+        # Other endpoints keep the DRF defaults.
+        response = self.client.get("/api/v1/visits/users")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIs(type(response.accepted_renderer), JSONRenderer)  # type: ignore
+
+    def test_compiled_representation(self):
+        start = timezone.localtime().replace(microsecond=0) - timedelta(hours=2)
+        session = Session.objects.create(user=self.user, date=start.date())
+        SessionEntry.objects.create(
+            session=session,
+            start=start,
+            end=start + timedelta(hours=1),
+            type=SessionEntry.SessionEntryType.WORK,
+        )
+        session.refresh_from_db()
+
+        self.assertEqual(
+            session_representation.to_representation(session),
+            SessionModelSerializer(session).data,
+        )
+
+        result = StatisticsService().get_user_date_range_statistics(
+            self.user, session.date - timedelta(days=1), session.date
+        )
+        self.assertEqual(
+            user_month_statistics_representation.many(result),
+            UserMonthStatisticsResponseSerializer(result, many=True).data,
+        )
+
+    def test_user_card(self):
+        self.user.first_name = "first"
+        self.user.last_name = "last"
+        self.user.email = "user@example.com"
+        self.user.save()
+
+        card = self.user.card  # type: ignore
+        self.assertEqual(card.full_name, "First Last")
+        self.assertTrue(card.avatar_url.startswith("https://www.gravatar.com/avatar/"))
+
+        response = self.client.get("/api/v1/visits/users")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [user] = [u for u in response.data["results"] if u["id"] == self.user.id]  # type: ignore
+        self.assertEqual(user["full_name"], "First Last")
+        self.assertEqual(user["avatar"], card.avatar_url)
+        self.assertIsNone(user["avatar_fallback"])
+
+    def test_avatar_fallback(self):
+        image = BytesIO()
+        Image.new("RGBA", (64, 32), (255, 0, 0, 128)).save(image, "PNG")
+
+        with TemporaryDirectory() as media_root, self.settings(MEDIA_ROOT=media_root):
+            avatar = Avatar.objects.get(user=self.user)
+            avatar.avatar = SimpleUploadedFile("avatar.png", image.getvalue())  # type: ignore
+            avatar.save()
+            generate_avatar_thumbnails(avatar, size=16)
+            refresh_user_card(self.user)
+
+            response = self.client.get(
+                "/api/v1/visits/users?fields=id,avatar,avatar_fallback"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        [user] = [u for u in response.data["results"] if u["id"] == self.user.id]  # type: ignore
+        self.assertTrue(user["avatar"].endswith(".webp"))
+        self.assertTrue(user["avatar_fallback"].endswith(".jpg"))
+
+    def test_users_pagination(self):
+        for i in range(5):
+            User.objects.create_user(
+                username=f"user{i}", first_name="anna", last_name=f"smith{i}"
+            )
+        User.objects.create_user(username="boris")
+
+        response = self.client.get(
+            "/api/v1/visits/users",
+            {"search": "Anna", "page_size": 2, "fields": "id,full_name"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        names = []
+        while True:
+            data = response.data  # type: ignore
+            for user in data["results"]:
+                self.assertEqual(set(user), {"id", "full_name"})
+                names.append(user["full_name"])
+            if not data["next"]:
+                break
+            response = self.client.get(data["next"])
+
+        self.assertEqual(names, [f"Anna Smith{i}" for i in range(5)])
+
+        # A user without a card is ordered by the username.
+        User.objects.create_user(username="zed", first_name="1st", last_name="zed")
+        UserCard.objects.filter(user__username="boris").delete()
+        response = self.client.get(
+            "/api/v1/visits/users", {"page_size": 1, "fields": "id"}
+        )
+        ids = []
+        while True:
+            ids += [user["id"] for user in response.data["results"]]  # type: ignore
+            if not response.data["next"]:  # type: ignore
+                break
+            response = self.client.get(response.data["next"])  # type: ignore
+
+        self.assertEqual(
+            sorted(ids),
+            sorted(User.objects.filter(is_active=True).values_list("id", flat=True)),
+        )
+
+        response = self.client.get("/api/v1/visits/users", {"search": "bor"})
+        self.assertEqual(
+            [u["full_name"] for u in response.data["results"]], ["Boris"]  # type: ignore
+        )
+
+        response = self.client.get("/api/v1/visits/users", {"fields": "id,password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_close_stale_sessions(self):
+        start = timezone.localtime() - timedelta(days=2)
+        session = Session.objects.create(user=self.user, date=start.date())
+        entry = SessionEntry.objects.create(
+            session=session, start=start, type=SessionEntry.SessionEntryType.WORK
+        )
+        # Status written while the entry was still allowed to be open.
+        Session.objects.filter(pk=session.pk).update(
+            status=Session.SessionStatus.ACTIVE, last_entry=entry
+        )
+
+        call_command("close_stale_sessions", stdout=StringIO())
+        session.refresh_from_db()
+        self.assertEqual(session.status, Session.SessionStatus.CHEATER)
+
+        run = StaleSessionsRun.objects.get()
+        self.assertEqual((run.flagged, run.session_ids), (1, [session.pk]))
+
+        # Still current, its user has to close the entry.
+        self.assertEqual(SessionService().get_current_session(self.user), session)
+
+        call_command("close_stale_sessions", stdout=StringIO())
+        self.assertEqual(StaleSessionsRun.objects.latest("pk").flagged, 0)
+
+    def test_entry_columns_statistics(self):
+        start = timezone.localtime().replace(hour=8, minute=0, second=0, microsecond=0)
+        types = list(SessionEntry.SessionEntryType)
+        entries_by_date: dict = {}
+        for day in range(3):
+            day_start = start - timedelta(days=day)
+            entries_by_date[day_start.date()] = [
+                SessionEntry(
+                    start=day_start + timedelta(minutes=40 * i),
+                    end=(
+                        None
+                        if day == 0 and i == 5
+                        else day_start + timedelta(minutes=40 * i + 35)
+                    ),
+                    type=types[(i + day) % len(types)],
+                )
+                for i in range(6)
+            ]
+
+        columns = EntryColumns.from_rows(
+            (day, entry.type, entry.start, entry.end)
+            for day, entries in entries_by_date.items()
+            for entry in reversed(entries)
+        )
+        result = columns.daily_statistics()
+
+        self.assertEqual(set(result), set(entries_by_date))
+        for day, entries in entries_by_date.items():
+            expected = DailyStatistics.defaults_from_entries(entries)
+            for field in ("work_time", "break_time", "lunch_time"):
+                self.assertAlmostEqual(result[day][field], expected[field])
+            self.assertEqual(result[day]["first_start"], expected["first_start"])
+            self.assertEqual(result[day]["last_end"], expected["last_end"])
+
+
+class BoardBroadcastTestCase(TransactionTestCase):
+    # Broadcasting closes old connections like the dispatcher thread does.
+
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(username="test_user")
+
+    def test_broadcast_board_group(self):
+        dispatcher._send(
+            [(self.user.id, {"type": "session_status_updated", "payload": {}})]
+        )
+
+        # One message per event, subscribers are picked by its topics.
+        [message] = ChannelMessage.objects.all()
+        self.assertEqual(message.group, "visits")
+        self.assertEqual(message.message["topics"], ["all", f"user.{self.user.id}"])
+
+    def test_subscribe_board_slice(self):
+        board_cache.invalidate()
+        other = User.objects.create_user(username="other_user")
+        consumer = NotificationsConsumer()
+        consumer.scope = {"headers": []}
+        consumer.topics = {f"user.{self.user.id}"}
+        sent = []
+
+        async def send_json(content, close=False):
+            sent.append(content)
+
+        consumer.send_json = send_json
+        for _ in range(2):
+            async_to_sync(consumer.receive_json)(
+                {"action": "subscribe", "topics": [f"user.{other.id}"]}
+            )
+        board_stream.unsubscribe(consumer)
+
+        payload = sent[0]["payload"]
+        self.assertEqual(
+            payload["topics"], sorted([f"user.{self.user.id}", f"user.{other.id}"])
+        )
+        self.assertEqual(
+            [item["user"]["id"] for item in payload["sessions"]], [other.id]
+        )
+        # Nothing new to send for topics already subscribed to.
+        self.assertEqual(sent[1]["payload"]["sessions"], [])
+
+
+class DatabaseChannelLayerTestCase(TransactionTestCase):
+    # The layer reads committed messages and closes old connections between
+    # polls, as it does across processes.
+
+    def setUp(self) -> None:
+        # Polling is driven by the tests.
+        self.layer = DatabaseChannelLayer(poll_interval=3600)
+
+    def tearDown(self) -> None:
+        async_to_sync(self.layer.close)()
+
+    def test_send_receive(self):
+        async def send_receive():
+            channel = await self.layer.new_channel()
+            await self.layer.send(channel, {"type": "test.message", "text": "hi"})
+            return await self.layer.receive(channel)
+
+        message = async_to_sync(send_receive)()
+        self.assertEqual(message, {"type": "test.message", "text": "hi"})
+
+    def test_group_send(self):
+        async def group_send():
+            channel = await self.layer.new_channel()
+            await self.layer.group_add("board", channel)
+            await self.layer.group_send("other", {"type": "test.other"})
+            await self.layer.group_send("board", {"type": "test.board"})
+            await self.layer._deliver_new_messages()
+            return await self.layer.receive(channel)
+
+        self.assertEqual(async_to_sync(group_send)(), {"type": "test.board"})
+        self.assertEqual(ChannelMessage.objects.count(), 2)
+
+    def test_late_commit(self):
+        self.layer._start_cursor()
+        first, late, last = [
+            ChannelMessage.objects.create(group="board", message={"n": n})
+            for n in range(3)
+        ]
+        # The middle row is not committed yet when the layer polls.
+        late_id = late.pk
+        late.delete()
+
+        rows = self.layer._fetch_new_messages(["board"])
+        self.assertEqual([id for id, _, _ in rows], [first.pk, last.pk])
+
+        # Committed long after its creation time.
+        ChannelMessage.objects.create(
+            id=late_id,
+            group="board",
+            message={"n": 1},
+            created_at=timezone.now() - timedelta(seconds=10),
+        )
+        rows = self.layer._fetch_new_messages(["board"])
+        self.assertEqual(rows, [(late_id, "board", {"n": 1})])
+        self.assertEqual(self.layer._fetch_new_messages(["board"]), [])
+
+    def test_gap_timeout(self):
+        self.layer._start_cursor()
+        self.layer.gap_timeout = 0
+        rows = [
+            ChannelMessage.objects.create(group="board", message={}) for _ in range(2)
+        ]
+        rows[0].delete()
+
+        self.layer._fetch_new_messages(["board"])
+        self.assertEqual(self.layer._gaps, {})
@@ -30,7 +30,14 @@ urlpatterns = [
     path("today", views.UsersTodayView.as_view()),
     path("stats/me", views.UserMonthStatisticsView.as_view()),
     path("stats/<int:user_id>", views.UserMonthStatisticsView.as_view()),
+    path("stats/users", views.UsersStatisticsView.as_view()),
     path("stats/export", views.ExportUserReportView.as_view()),
+    path("stats/export/jobs", views.ReportExportJobCreateView.as_view()),
+    path("stats/export/jobs/<int:pk>", views.ReportExportJobView.as_view()),
+    path(
+        "stats/export/jobs/<int:pk>/download",
+        views.ReportExportJobDownloadView.as_view(),
+    ),
     path("users", views.UsersView.as_view()),
 ]
 
@@ -1,4 +1,4 @@
-from io import BytesIO
+from tempfile import TemporaryFile
 from datetime import date, datetime
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
@@ -15,17 +15,53 @@ from rest_framework.exceptions import (
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.request import Request
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiResponse
 from drf_spectacular.types import OpenApiTypes
 from django.utils.translation import gettext as _
 from django.contrib.auth.models import User
-from django.http import HttpResponse
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce, Lower
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
 
 
+from main.parsers import ORJSONParser
+from main.renderers import ORJSONRenderer
+
 from . import serializers, services
-from .models import Session, SessionEntry
+from .board import board_cache
+from .models import ReportExportJob, Session, SessionEntry
+from .pagination import UsersCursorPagination
+from .representation import (
+    session_representation,
+    user_month_statistics_representation,
+    user_session_representation,
+)
+from session.cards import get_search_name
 from session.serializers import UserModelSerializer
 
+# Hot read endpoints render and parse JSON with orjson, the rest of the API
+# keeps the DRF defaults.
+ORJSON_RENDERER_CLASSES = [ORJSONRenderer, BrowsableAPIRenderer]
+ORJSON_PARSER_CLASSES = [ORJSONParser, FormParser, MultiPartParser]
+
+
+def extra_unavailable_headers(statistics_service: services.StatisticsService) -> dict:
+    """
+    Marks responses missing the extra data of plugins that failed or timed out.
+    """
+    if not statistics_service.unavailable_extra:
+        return {}
+
+    return {
+        "X-Statistics-Extra-Unavailable": ", ".join(
+            sorted(statistics_service.unavailable_extra)
+        )
+    }
+
 
 @extend_schema(tags=["visits"])
 class EnterView(APIView):
@@ -221,6 +257,8 @@ class SessionEntryModelViewset(
 @extend_schema(tags=["visits"])
 class CurrentSessionView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = ORJSON_RENDERER_CLASSES
+    parser_classes = ORJSON_PARSER_CLASSES
 
     @extend_schema(
         "current",
@@ -236,49 +274,39 @@ class CurrentSessionView(APIView):
         if session is None:
             return Response({"status": Session.SessionStatus.INACTIVE, "entries": []})
 
-        serializer = serializers.SessionModelSerializer(session)
-
-        return Response(serializer.data)
+        return Response(session_representation.to_representation(session))
 
 
 @extend_schema(tags=["visits"])
 class UsersTodayView(APIView):
     permission_classes = [AllowAny]
+    renderer_classes = ORJSON_RENDERER_CLASSES
+    parser_classes = ORJSON_PARSER_CLASSES
 
     @extend_schema(
         "today",
         responses={status.HTTP_200_OK: serializers.UserSessionSerializer(many=True)},
     )
     def get(self, request: Request):
+        board, etag = board_cache.get()
 
-        session_service = services.SessionService()
-        active_users_with_sessions = session_service.get_active_user_with_sessions()
-
-        result = []
-        for us in active_users_with_sessions:
-            user: User = us["user"]
-            session: Session | None = us.get("session")
-            last_entry = session.get_last_entry() if session else None
-
-            result.append({
-                "user": user,
-                "session": {
-                    "status": getattr(session, "status", Session.SessionStatus.INACTIVE),
-                    "comment": getattr(last_entry, "comment", ""),
-                    "time": getattr(last_entry, "start", None),
-                },
-            })
-
-        serializer = serializers.UserSessionSerializer(
-            result, many=True, context={"request": request}
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
+
+        response = Response(
+            user_session_representation.many(board, context={"request": request})
         )
+        response["ETag"] = etag
 
-        return Response(serializer.data)
+        return response
 
 
 @extend_schema(tags=["statistics"])
 class UserMonthStatisticsView(APIView):
     permission_classes = [IsAuthenticated]
+    renderer_classes = ORJSON_RENDERER_CLASSES
+    parser_classes = ORJSON_PARSER_CLASSES
 
     def get_user(self, request: Request, user_id: int | None) -> User:
         if user_id is None or request.user.id == user_id:
@@ -306,11 +334,51 @@ class UserMonthStatisticsView(APIView):
         statistics_service = services.StatisticsService()
         result = statistics_service.get_user_date_range_statistics(user, start, end)
 
-        response_serializer = serializers.UserMonthStatisticsResponseSerializer(
-            result, many=True
+        return Response(
+            user_month_statistics_representation.many(result),
+            headers=extra_unavailable_headers(statistics_service),
+        )
+
+
+@extend_schema(tags=["statistics"])
+class UsersStatisticsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        "usersStatistics",
+        parameters=[serializers.UsersStatisticsRequestSerializer],
+        responses=serializers.UsersStatisticsResponseSerializer(many=True),
+    )
+    def get(self, request: Request):
+        if not request.user.is_superuser:
+            raise PermissionDenied("You are not allowed to view users statistics.")
+
+        request_serializer = serializers.UsersStatisticsRequestSerializer(
+            data=request.query_params
         )
+        request_serializer.is_valid(raise_exception=True)
+        start: date = request_serializer.validated_data["start"]  # type: ignore
+        end: date = request_serializer.validated_data["end"]  # type: ignore
+        user_ids: list[int] = request_serializer.validated_data.get("user_ids")  # type: ignore
+        with_extra: bool = request_serializer.validated_data["extra"]  # type: ignore
 
-        return Response(response_serializer.data)
+        users = User.objects.filter(is_active=True).select_related("card")
+        if user_ids:
+            users = users.filter(id__in=user_ids)
+
+        statistics_service = services.StatisticsService()
+        result = statistics_service.get_users_date_range_statistics(
+            list(users.order_by("id")), start, end, with_extra
+        )
+
+        response_serializer = serializers.UsersStatisticsResponseSerializer(
+            result, many=True, context={"request": request}
+        )
+
+        return Response(
+            response_serializer.data,
+            headers=extra_unavailable_headers(statistics_service),
+        )
 
 
 @extend_schema(tags=["statistics"])
@@ -350,28 +418,159 @@ class ExportUserReportView(APIView):
         statistics_service = services.StatisticsService()
         result = statistics_service.get_user_date_range_statistics(user, start, end)
         xlsx_service = services.XlsxService()
+        output = TemporaryFile()
 
         try:
-            wb = xlsx_service.user_date_period_statistics_xlsx(user, start, end, result)
+            xlsx_service.user_date_period_statistics_xlsx(
+                user, start, end, result, output
+            )
         except:
+            output.close()
             raise APIException()
 
-        output = BytesIO()
-        wb.save(output)
         output.seek(0)
 
-        response = HttpResponse(
-            output.getvalue(),
+        return FileResponse(
+            output,
+            as_attachment=True,
+            filename=f'{request.user.username} {str(start.strftime("%Y-%m-%d"))} {str(end.strftime("%Y-%m-%d"))}.xlsx',
             content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+
+
+@extend_schema(tags=["statistics"])
+class ReportExportJobCreateView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        "createExportJob",
+        request=serializers.ReportExportJobCreateSerializer,
+        responses={status.HTTP_201_CREATED: serializers.ReportExportJobModelSerializer},
+    )
+    def post(self, request: Request):
+        if not request.user.is_superuser:
+            raise PermissionDenied("You are not allowed to export users data.")
+
+        serializer = serializers.ReportExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        start: date = serializer.validated_data["start"]  # type: ignore
+        end: date = serializer.validated_data["end"]  # type: ignore
+        user_ids: list[int] = serializer.validated_data.get("user_ids")  # type: ignore
+
+        users = User.objects.filter(is_active=True)
+        if user_ids:
+            users = users.filter(id__in=user_ids)
+
+        export_service = services.ReportExportService()
+        job = export_service.create_job(request.user, list(users), start, end)
+
+        response_serializer = serializers.ReportExportJobModelSerializer(
+            job, context={"request": request}
+        )
+
+        return Response(response_serializer.data, status=status.HTTP_201_CREATED)
+
+
+@extend_schema(tags=["statistics"])
+class ReportExportJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_job(self, request: Request, pk: int) -> ReportExportJob:
+        if not request.user.is_superuser:
+            raise PermissionDenied("You are not allowed to export users data.")
+
+        return get_object_or_404(ReportExportJob, pk=pk)
+
+    @extend_schema(
+        "exportJob",
+        responses={status.HTTP_200_OK: serializers.ReportExportJobModelSerializer},
+    )
+    def get(self, request: Request, pk: int):
+        job = self.get_job(request, pk)
+        serializer = serializers.ReportExportJobModelSerializer(
+            job, context={"request": request}
+        )
+
+        return Response(serializer.data)
+
+
+@extend_schema(tags=["statistics"])
+class ReportExportJobDownloadView(ReportExportJobView):
+
+    @extend_schema(
+        "downloadExportJob",
+        responses={
+            status.HTTP_200_OK: OpenApiResponse(
+                response=OpenApiTypes.BINARY,
+                description="ZIP archive with users statistics",
+            )
+        },
+    )
+    def get(self, request: Request, pk: int):
+        job = self.get_job(request, pk)
+        if job.status != ReportExportJob.JobStatus.DONE or not job.file:
+            raise NotFound("Export is not ready.")
+
+        filename = f"reports {job.start.strftime('%Y-%m-%d')} {job.end.strftime('%Y-%m-%d')}.zip"
+
+        if not settings.USE_X_ACCEL_REDIRECT:
+            return FileResponse(job.file.open("rb"), as_attachment=True, filename=filename)
+
+        # nginx serves the archive from the internal media location.
+        return HttpResponse(
+            content_type="application/zip",
             headers={
-                "Content-Disposition": f'attachment; filename="{request.user.username} {str(start.strftime("%Y-%m-%d"))} {str(end.strftime("%Y-%m-%d"))}.xlsx"'
+                "X-Accel-Redirect": job.file.url,
+                "Content-Disposition": f'attachment; filename="{filename}"',
             },
         )
 
-        return response
-
 
 @extend_schema(tags=["users"])
 class UsersView(ListAPIView):
-    queryset = User.objects.filter(is_active=True)
+    """
+    Active users ordered by name, a page at a time.
+
+    Only the fields asked for are rendered. The user card columns are
+    selected only when those fields need them, the card name is always
+    joined as the ordering key. Users without a card are ordered by their
+    username.
+    """
+
     serializer_class = UserModelSerializer
+    pagination_class = UsersCursorPagination
+    search = ""
+    selected_fields: list[str] | None = None
+
+    @extend_schema(parameters=[serializers.UsersRequestSerializer])
+    def get(self, request: Request, *args, **kwargs):
+        request_serializer = serializers.UsersRequestSerializer(
+            data=request.query_params
+        )
+        request_serializer.is_valid(raise_exception=True)
+        search: str = request_serializer.validated_data.get("search", "")  # type: ignore
+        self.search = get_search_name(search)
+        self.selected_fields = request_serializer.validated_data.get("fields")  # type: ignore
+
+        return super().get(request, *args, **kwargs)
+
+    def get_queryset(self):
+        users = User.objects.filter(is_active=True).annotate(
+            search_name=Coalesce(F("card__search_name"), Lower("username"))
+        )
+
+        fields = self.selected_fields
+        if fields is None or {"full_name", "avatar", "avatar_fallback"} & set(fields):
+            users = users.select_related("card")
+
+        if self.search:
+            users = users.filter(
+                Q(card__search_name__istartswith=self.search)
+                | Q(username__istartswith=self.search)
+            )
+
+        return users
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.selected_fields)
+        return super().get_serializer(*args, **kwargs)
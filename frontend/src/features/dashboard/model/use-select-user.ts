@@ -1,7 +1,30 @@
 import { rqClient } from "@/shared/api/instance";
+import { useEffect, useMemo, useState } from "react";
+
+const SEARCH_DELAY = 300;
+
+const getCursor = (url?: string | null) => (url ? (new URL(url).searchParams.get("cursor") ?? undefined) : undefined);
 
 export const useSelectUser = () => {
-  const { data: users } = rqClient.useQuery("get", "/api/v1/visits/users");
+  const [search, setSearch] = useState("");
+  const [query, setQuery] = useState("");
+
+  useEffect(() => {
+    const timeout = setTimeout(() => setQuery(search.trim()), SEARCH_DELAY);
+    return () => clearTimeout(timeout);
+  }, [search]);
+
+  const { data, hasNextPage, fetchNextPage, isFetchingNextPage } = rqClient.useInfiniteQuery(
+    "get",
+    "/api/v1/visits/users",
+    { params: { query: { search: query || undefined, fields: "id,full_name" } } },
+    {
+      initialPageParam: undefined as string | undefined,
+      getNextPageParam: (page) => getCursor(page.next),
+    }
+  );
+
+  const users = useMemo(() => data?.pages.flatMap((page) => page.results), [data]);
 
-  return { users };
+  return { users, search, setSearch, hasNextPage, fetchNextPage, isFetchingNextPage };
 };
@@ -9,11 +9,13 @@ import {
   SelectTrigger,
   SelectValue,
 } from "@/shared/components/ui/select";
+import { Button } from "@/shared/components/ui/button";
+import { Input } from "@/shared/components/ui/input";
 import { useCallback, type FC } from "react";
 
 const SelectUser: FC = () => {
   const { user, setUser } = useDashboard();
-  const { users } = useSelectUser();
+  const { users, search, setSearch, hasNextPage, fetchNextPage, isFetchingNextPage } = useSelectUser();
   const [t] = useTranslation("dashboard");
 
   const onSelect = useCallback(
@@ -32,11 +34,30 @@ const SelectUser: FC = () => {
         <SelectValue defaultValue={user!.id} placeholder={t("user.select")} />
       </SelectTrigger>
       <SelectContent>
+        <Input
+          className="mb-1"
+          value={search}
+          placeholder={t("user.search")}
+          onChange={(e) => setSearch(e.target.value)}
+          // Keeps the select typeahead from taking over the input.
+          onKeyDown={(e) => e.stopPropagation()}
+        />
         <SelectGroup>
           {users?.map((user) => (
             <SelectItem key={user.id} value={user.id.toString()}>{user.full_name}</SelectItem>
           ))}
         </SelectGroup>
+        {hasNextPage && (
+          <Button
+            className="w-full"
+            variant="ghost"
+            size="sm"
+            disabled={isFetchingNextPage}
+            onClick={() => fetchNextPage()}
+          >
+            {t("user.more")}
+          </Button>
+        )}
       </SelectContent>
     </Select>
   );
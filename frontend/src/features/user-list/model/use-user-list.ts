@@ -2,18 +2,38 @@ import { publicRqClient } from "@/shared/api/instance";
 import type { ApiSchema } from "@/shared/api/schema";
 import { useWebSocket } from "@/shared/hooks/use-websocket";
 import { useSession } from "@/shared/model/session";
-import { useEffect, useState } from "react";
+import { useCallback, useEffect, useMemo, useRef, useState } from "react";
+
+const NOTIFICATIONS_URL = `ws://${window.location.host}/api/ws/visits/notifications`;
+const SOCKET_MAX_RETRIES = 3;
+// Polling of the board once the notifications socket can not deliver it.
+const FALLBACK_REFETCH_INTERVAL = 1000 * 30;
 
 export const useUserList = () => {
   const [sessions, setSessions] = useState<ApiSchema["UserSession"][]>([]);
+  const [hasSnapshot, setHasSnapshot] = useState(false);
+  const cursorRef = useRef<string | null>(null);
   const user = useSession((state) => state.user);
   const fetchUser = useSession((state) => state.fetchUser);
-  const { data, isLoading, error } = publicRqClient.useQuery("get", "/api/v1/visits/today");
 
-  useWebSocket({
-    url: `ws://${window.location.host}/api/ws/visits/notifications`,
-    handlers: {
-      session_status_updated: (payload) =>
+  // Resume from the last received event after a reconnect.
+  const url = useCallback(
+    () =>
+      cursorRef.current
+        ? `${NOTIFICATIONS_URL}?since=${encodeURIComponent(cursorRef.current)}`
+        : NOTIFICATIONS_URL,
+    []
+  );
+
+  const handlers = useMemo(
+    () => ({
+      snapshot: (payload: Record<string, any>) => {
+        cursorRef.current = payload.cursor;
+        setSessions(payload.sessions);
+        setHasSnapshot(true);
+      },
+      session_status_updated: (payload: Record<string, any>, message: { cursor?: string }) => {
+        cursorRef.current = message.cursor ?? cursorRef.current;
         setSessions((prev) =>
           prev.map((session) =>
             session.user.id === payload.user_id
@@ -27,8 +47,10 @@ export const useUserList = () => {
                 }
               : session
           )
-        ),
-      user_avatar_changed: (payload) => {
+        );
+      },
+      user_avatar_changed: (payload: Record<string, any>, message: { cursor?: string }) => {
+        cursorRef.current = message.cursor ?? cursorRef.current;
         setSessions((prev) =>
           prev.map((session) =>
             session.user.id === payload.user_id
@@ -37,6 +59,7 @@ export const useUserList = () => {
                   user: {
                     ...session.user,
                     avatar: payload.avatar_url,
+                    avatar_fallback: payload.avatar_fallback_url || null,
                   },
                 }
               : session
@@ -45,18 +68,36 @@ export const useUserList = () => {
 
         if (user?.id === payload.user_id) fetchUser();
       },
-    },
+    }),
+    [user?.id, fetchUser]
+  );
+
+  const { isConnected, failures } = useWebSocket({
+    url,
+    handlers,
+    maxRetries: SOCKET_MAX_RETRIES,
+  });
+
+  // The board comes from the socket snapshot and reconnects resume from the
+  // cursor. It is loaded over HTTP only when the socket never connected or
+  // gave up reconnecting, e.g. behind a proxy without websocket support.
+  const fallback = !isConnected && failures > 0 && (!hasSnapshot || failures > SOCKET_MAX_RETRIES);
+  const { data, isLoading, error } = publicRqClient.useQuery("get", "/api/v1/visits/today", undefined, {
+    enabled: fallback,
+    refetchInterval: fallback ? FALLBACK_REFETCH_INTERVAL : false,
   });
 
   useEffect(() => {
-    if (data) {
+    if (data && fallback) {
       setSessions(data);
+      // Events after the old cursor may be older than this board.
+      cursorRef.current = null;
     }
-  }, [data]);
+  }, [data, fallback]);
 
   return {
     sessions,
-    isLoading: isLoading,
-    error: error ?? undefined,
+    isLoading: !hasSnapshot && !data && (!fallback || isLoading),
+    error: fallback ? (error ?? undefined) : undefined,
   };
 };
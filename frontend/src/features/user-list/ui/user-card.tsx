@@ -10,7 +10,7 @@ const UserCard: FC<UserCardProps> = ({ user, session, className, ...props }) =>
   return (
     <Card {...props} className={cn(className, "p-3 relative group rounded-md overflow-hidden")}>
       <CardContent className="flex gap-3 items-center p-0">
-        <Avatar src={user.avatar} alt={user.full_name} />
+        <Avatar src={user.avatar} fallbackSrc={user.avatar_fallback} alt={user.full_name} />
         <div>
           {session.time && session.status !== "active" && (
             <p className="text-xs absolute top-3 right-3">{new Date(session.time).toLocaleString()}</p>
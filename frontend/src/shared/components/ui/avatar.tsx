@@ -4,9 +4,11 @@ import { useEffect, useState, type FC, type ImgHTMLAttributes } from "react";
 interface AvatarProps extends ImgHTMLAttributes<HTMLImageElement> {
   src: string;
   alt: string;
+  // JPEG version of a WebP `src`, for browsers without WebP support.
+  fallbackSrc?: string | null;
 }
 
-const Avatar: FC<AvatarProps> = ({ className, src, alt, ...props }) => {
+const Avatar: FC<AvatarProps> = ({ className, src, alt, fallbackSrc, ...props }) => {
   const [showImage, setShowImage] = useState(false);
 
   useEffect(() => {
@@ -15,8 +17,23 @@ const Avatar: FC<AvatarProps> = ({ className, src, alt, ...props }) => {
     const img = new Image();
     img.src = src;
     img.onload = () => setShowImage(true);
-    img.onerror = () => setShowImage(false);
-  }, [src]);
+    img.onerror = () => {
+      if (fallbackSrc && img.src !== fallbackSrc) {
+        img.src = fallbackSrc;
+      } else {
+        setShowImage(false);
+      }
+    };
+  }, [src, fallbackSrc]);
+
+  if (showImage && fallbackSrc) {
+    return (
+      <picture>
+        <source srcSet={src} type="image/webp" />
+        <img {...props} src={fallbackSrc} alt={alt} className={cn(className, "size-12 rounded-full object-center")} />
+      </picture>
+    );
+  }
 
   if (showImage) {
     return <img {...props} src={src} alt={alt} className={cn(className, "size-12 rounded-full object-center")} />;
@@ -1,16 +1,20 @@
-import { useEffect, useRef } from "react";
+import { useEffect, useRef, useState } from "react";
 
 type WebSocketMessage = {
   type: string;
   payload: Record<string, any>;
+  cursor?: string;
 };
 
 type HandlersMap = {
-  [eventType: WebSocketMessage["type"]]: (payload: WebSocketMessage["payload"]) => void;
+  [eventType: WebSocketMessage["type"]]: (
+    payload: WebSocketMessage["payload"],
+    message: WebSocketMessage
+  ) => void;
 };
 
 type UseWebSocketOptions = {
-  url: string;
+  url: string | (() => string);
   handlers: HandlersMap;
   maxRetries?: number;
 };
@@ -18,6 +22,9 @@ type UseWebSocketOptions = {
 export function useWebSocket({ url, handlers, maxRetries = 3 }: UseWebSocketOptions) {
   const socketRef = useRef<WebSocket | null>(null);
   const retryCountRef = useRef(0);
+  const [isConnected, setIsConnected] = useState(false);
+  // Connection attempts that failed in a row.
+  const [failures, setFailures] = useState(0);
 
   useEffect(() => {
     let ws: WebSocket;
@@ -28,22 +35,28 @@ export function useWebSocket({ url, handlers, maxRetries = 3 }: UseWebSocketOpti
         return;
       }
 
-      ws = new WebSocket(url);
+      ws = new WebSocket(typeof url === "function" ? url() : url);
       socketRef.current = ws;
 
-      ws.onopen = () => (retryCountRef.current = 0);
+      ws.onopen = () => {
+        retryCountRef.current = 0;
+        setIsConnected(true);
+        setFailures(0);
+      };
 
       ws.onmessage = (event) => {
         try {
           const data: WebSocketMessage = JSON.parse(event.data);
           if (data.type && handlers[data.type]) {
-            handlers[data.type](data.payload);
+            handlers[data.type](data.payload, data);
           }
         } catch {}
       };
 
       ws.onclose = () => {
+        setIsConnected(false);
         retryCountRef.current += 1;
+        setFailures(retryCountRef.current);
         reconnectTimeout = setTimeout(connect, 3000);
       };
 
@@ -54,7 +67,13 @@ export function useWebSocket({ url, handlers, maxRetries = 3 }: UseWebSocketOpti
 
     return () => {
       clearTimeout(reconnectTimeout);
-      ws?.close();
+      if (ws) {
+        // Closed on purpose, do not reconnect.
+        ws.onclose = null;
+        ws.close();
+      }
     };
   }, [url, handlers, maxRetries]);
+
+  return { isConnected, failures };
 }
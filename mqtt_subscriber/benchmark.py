@@ -0,0 +1,190 @@
+"""
+Throughput benchmark of the subscriber pipeline against a local stub webapp.
+
+Compares the batching pipeline with the previous behaviour, one request per
+tap over a new connection, and checks that taps of every card reach the
+webapp in order.
+
+    python benchmark.py --events 2000 --codes 200 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from tempfile import TemporaryDirectory
+
+import httpx
+
+from main import Event, Pipeline, create_http_client, make_record
+from spool import Spool
+
+
+class StubWebapp:
+    """
+    Minimal keep-alive HTTP server answering every request after `latency`.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.connections = 0
+        self.requests: dict[str, list[str]] = defaultdict(list)
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def reset(self):
+        self.connections = 0
+        self.requests.clear()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+
+        try:
+            while head := await reader.readuntil(b"\r\n\r\n"):
+                lines = head.decode().split("\r\n")
+                path = lines[0].split(" ")[1]
+                headers = dict(
+                    line.lower().split(": ", 1) for line in lines[1:] if ": " in line
+                )
+
+                length = int(headers.get("content-length", 0))
+                body = await reader.readexactly(length) if length else b""
+
+                if path == "/api/v1/rfid/batch":
+                    records = json.loads(body)["records"]
+                else:
+                    event = path.rsplit("/", 1)[1]
+                    records = [{"code": headers.get("x-rfid-key", ""), "event": event}]
+
+                for record in records:
+                    self.requests[record["code"]].append(record["event"])
+                await asyncio.sleep(self.latency)
+
+                results = [
+                    {"index": i, "status_code": 200, "detail": "ok"}
+                    for i in range(len(records))
+                ]
+                content = json.dumps({"results": results}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(content)}\r\n\r\n".encode()
+                    + content
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def make_events(count: int, codes: int) -> list[tuple[dict, Event]]:
+    # Every card alternates between entering and leaving.
+    events = []
+    for i in range(count):
+        code = i % codes
+        event = Event.EVENT_IN if (i // codes) % 2 == 0 else Event.EVENT_OUT
+        events.append(({"code": str(code)}, event))
+
+    return events
+
+
+def in_order(stub: StubWebapp) -> bool:
+    expected = {0: "enter", 1: "exit"}
+    return all(
+        event == expected[i % 2]
+        for events in stub.requests.values()
+        for i, event in enumerate(events)
+    )
+
+
+async def run_sequential(url: str, events: list[tuple[dict, Event]]):
+    for payload, event in events:
+        record = make_record(payload, event)
+        async with httpx.AsyncClient(base_url=url) as http:
+            await http.post(
+                f"/api/v1/rfid/{record['event']}",
+                headers={"X-Service-Key": "token", "X-RFID-Key": record["code"]},
+            )
+
+
+async def run_pipeline(
+    url: str, events: list[tuple[dict, Event]], workers: int, batch_size: int
+):
+    with TemporaryDirectory() as directory:
+        spool = Spool(os.path.join(directory, "spool.sqlite3"))
+
+        async with create_http_client(url, "token", workers) as http:
+            pipeline = Pipeline(http, spool, workers, batch_size=batch_size)
+            pipeline.start()
+
+            for payload, event in events:
+                pipeline.submit(payload, event)
+
+            await pipeline.join()
+            await pipeline.close()
+
+        spool.close()
+
+
+async def main(args):
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    stub = StubWebapp(args.latency)
+    url = await stub.start()
+    events = make_events(args.events, args.codes)
+
+    runs = [("sequential", lambda: run_sequential(url, events[: args.sequential]))]
+    runs += [
+        (
+            f"pipeline x{workers}",
+            lambda workers=workers: run_pipeline(url, events, workers, args.batch_size),
+        )
+        for workers in args.workers
+    ]
+
+    print(
+        f"{'mode':<16}{'events':>8}{'seconds':>10}{'events/s':>12}{'conns':>8}  ordered"
+    )
+    for name, run in runs:
+        stub.reset()
+        started = time.perf_counter()
+        await run()
+        elapsed = time.perf_counter() - started
+
+        count = sum(len(events) for events in stub.requests.values())
+        print(
+            f"{name:<16}{count:>8}{elapsed:>10.2f}{count / elapsed:>12.1f}"
+            f"{stub.connections:>8}  {in_order(stub)}"
+        )
+
+    await stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--codes", type=int, default=200)
+    parser.add_argument(
+        "--latency", type=float, default=0.01, help="Stub response delay in seconds."
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument(
+        "--sequential",
+        type=int,
+        default=200,
+        help="Events sent one by one for the baseline.",
+    )
+
+    asyncio.run(main(parser.parse_args()))
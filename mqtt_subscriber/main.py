@@ -1,14 +1,16 @@
 from enum import Enum
+import asyncio
+from datetime import datetime, timezone
 import json
 import logging
 import os
 import sys
-from typing import Any
+import zlib
 
-from paho.mqtt.client import Client, MQTTMessage
-from paho.mqtt.enums import CallbackAPIVersion
-import requests
-from requests import Response
+import aiomqtt
+import httpx
+
+from spool import Spool
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -20,8 +22,8 @@ class Event(str, Enum):
     EVENT_OUT = "rfid_out"
 
 
-def _get_env(name: str) -> str:
-    value = os.getenv(name)
+def _get_env(name: str, default: str | None = None) -> str:
+    value = os.getenv(name) or default
     if not value:
         logging.error(f"[env]: {name} is missing")
         sys.exit(2)
@@ -29,17 +31,22 @@ def _get_env(name: str) -> str:
     return value
 
 
-config = {
-    "MQTT_SERVER": _get_env("MQTT_SERVER"),
-    "MQTT_PORT": int(_get_env("MQTT_PORT")),
-    "MQTT_LOGIN": _get_env("MQTT_LOGIN"),
-    "MQTT_PASS": _get_env("MQTT_PASS"),
-    "MQTT_TOPIC": _get_env("MQTT_TOPIC"),
-    "WEBAPP_URL": _get_env("WEBAPP_URL"),
-    "AUTH_TOKEN": _get_env("AUTH_TOKEN"),
-}
-
-client = Client(callback_api_version=CallbackAPIVersion.VERSION2)
+def get_config() -> dict:
+    return {
+        "MQTT_SERVER": _get_env("MQTT_SERVER"),
+        "MQTT_PORT": int(_get_env("MQTT_PORT")),
+        "MQTT_LOGIN": _get_env("MQTT_LOGIN"),
+        "MQTT_PASS": _get_env("MQTT_PASS"),
+        "MQTT_TOPIC": _get_env("MQTT_TOPIC"),
+        "WEBAPP_URL": _get_env("WEBAPP_URL"),
+        "AUTH_TOKEN": _get_env("AUTH_TOKEN"),
+        "WORKERS": int(_get_env("WORKERS", "8")),
+        "QUEUE_SIZE": int(_get_env("QUEUE_SIZE", "1000")),
+        "BATCH_SIZE": int(_get_env("BATCH_SIZE", "100")),
+        "BATCH_INTERVAL": float(_get_env("BATCH_INTERVAL", "0.05")),
+        "SPOOL_PATH": _get_env("SPOOL_PATH", "spool.sqlite3"),
+        "SPOOL_STATS_INTERVAL": float(_get_env("SPOOL_STATS_INTERVAL", "60")),
+    }
 
 
 def get_event(topic: str) -> Event | None:
@@ -50,46 +57,265 @@ def get_event(topic: str) -> Event | None:
         return None
 
 
-def request_webapp(code: str, event: Event) -> Response:
+def create_http_client(
+    webapp_url: str, auth_token: str, workers: int
+) -> httpx.AsyncClient:
+    """
+    Keep-alive client with a connection per worker.
+    """
+    return httpx.AsyncClient(
+        base_url=webapp_url,
+        headers={"X-Service-Key": auth_token},
+        limits=httpx.Limits(max_connections=workers, max_keepalive_connections=workers),
+        timeout=httpx.Timeout(10.0),
+    )
+
+
+def make_record(payload: dict, event: Event) -> dict:
     match event:
         case Event.EVENT_IN:
             type = "enter"
         case Event.EVENT_OUT:
             type = "exit"
 
-    url = f"{config["WEBAPP_URL"]}/api/v1/rfid/{type}"
+    return {
+        "code": str(payload["code"]),
+        "event": type,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
 
-    return requests.post(
-        url, headers={"X-Service-Key": config["AUTH_TOKEN"], "X-RFID-Key": str(code)}
-    )
 
+async def request_webapp(
+    http: httpx.AsyncClient, records: list[dict]
+) -> httpx.Response:
+    return await http.post("/api/v1/rfid/batch", json={"records": records})
+
+
+class Pipeline:
+    """
+    Forwards spooled RFID records with a fixed number of workers.
+
+    Received records are appended to the spool first. A feeder moves pending
+    records from the spool into bounded per-worker queues, sharded by code, so
+    taps of one card are handled in order while different cards run
+    concurrently.
+
+    Workers send records in micro-batches: whatever is queued, up to
+    `batch_size`, waiting at most `batch_interval` seconds for more. A batch
+    is retried with exponential backoff until the webapp answers and is then
+    acknowledged in the spool.
+    """
+
+    def __init__(
+        self,
+        http: httpx.AsyncClient,
+        spool: Spool,
+        workers: int = 8,
+        queue_size: int = 1000,
+        batch_size: int = 100,
+        batch_interval: float = 0.05,
+        retry_delay: float = 0.5,
+        max_retry_delay: float = 60.0,
+    ):
+        self.http = http
+        self.spool = spool
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.queues: list[asyncio.Queue[dict]] = [
+            asyncio.Queue(maxsize=queue_size) for _ in range(workers)
+        ]
+        self.tasks: list[asyncio.Task] = []
+        self._appended = asyncio.Event()
+
+    def start(self):
+        self.tasks = [asyncio.create_task(self._work(queue)) for queue in self.queues]
+        self.tasks.append(asyncio.create_task(self._feed()))
+
+    def submit(self, payload: dict, event: Event):
+        self.spool.append(make_record(payload, event))
+        self._appended.set()
+
+    async def join(self):
+        while self.spool.stats()["depth"]:
+            await asyncio.sleep(0.05)
+
+    async def close(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def report(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            logging.info(json.dumps({"spool": self.spool.stats()}))
+
+    async def _feed(self):
+        # Starts from the first pending record, replaying what is left over
+        # from a previous run.
+        last_id = 0
+
+        while True:
+            self._appended.clear()
+            records = self.spool.pending(last_id)
+            if not records:
+                await self._appended.wait()
+                continue
+
+            for record in records:
+                shard = zlib.crc32(record["code"].encode()) % len(self.queues)
+                await self.queues[shard].put(record)
+                last_id = record["id"]
+
+    async def _work(self, queue: asyncio.Queue[dict]):
+        loop = asyncio.get_running_loop()
 
-@client.connect_callback()
-def on_connect(client: Client, userdata: Any, flags, reason_code, properties=None):
-    logging.info(f"Connected with result code {reason_code}")
-    client.subscribe(config["MQTT_TOPIC"])
+        while True:
+            records = [await queue.get()]
+            deadline = loop.time() + self.batch_interval
 
+            while len(records) < self.batch_size:
+                try:
+                    timeout = max(deadline - loop.time(), 0)
+                    records.append(await asyncio.wait_for(queue.get(), timeout))
+                except TimeoutError:
+                    break
 
-@client.message_callback()
-def on_message(client: Client, userdata: Any, msg: MQTTMessage):
-    payload_dict = json.loads(msg.payload.decode())
-    event = get_event(msg.topic)
-    if "code" not in payload_dict or not event:
+            ids = [record["id"] for record in records]
+            attempt = 0
+            while not await self._handle_safely(records):
+                self.spool.retry(ids)
+                delay = min(self.retry_delay * 2**attempt, self.max_retry_delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+            self.spool.ack(ids)
+            for _ in records:
+                queue.task_done()
+
+    async def _handle_safely(self, records: list[dict]) -> bool:
+        # An unexpected error retries the batch instead of stopping the worker.
+        try:
+            return await self.handle(records)
+        except Exception:
+            logging.exception("Failed to handle a batch of records")
+            return False
+
+    async def handle(self, records: list[dict]) -> bool:
+        """
+        Send `records`, False if they should be retried.
+        """
+        payload = [
+            {"code": r["code"], "event": r["event"], "timestamp": r["timestamp"]}
+            for r in records
+        ]
+
+        try:
+            res = await request_webapp(self.http, payload)
+        except httpx.HTTPError as e:
+            logging.error(json.dumps({"records": payload, "error": str(e)}, indent=2))
+            return False
+
+        if res.status_code >= 500 or res.status_code in (401, 403, 429):
+            log_record = {"records": payload, "status_code": res.status_code}
+            logging.error(json.dumps(log_record, indent=2))
+            return False
+
+        if res.status_code != 200:
+            # Retrying a rejected batch would block the shard forever.
+            log_record = {
+                "records": payload,
+                "response": res.text,
+                "status_code": res.status_code,
+            }
+            logging.error(json.dumps(log_record, indent=2))
+            return True
+
+        try:
+            log_records = [
+                {**result, "record": payload[result["index"]]}
+                for result in res.json()["results"]
+            ]
+        except (ValueError, TypeError, KeyError, IndexError) as e:
+            # Keep the records in the spool until the webapp answers properly.
+            log_record = {"records": payload, "response": res.text, "error": str(e)}
+            logging.error(json.dumps(log_record, indent=2))
+            return False
+
+        for log_record in log_records:
+            if log_record.get("status_code") == 200:
+                logging.info(json.dumps(log_record, indent=2))
+            else:
+                logging.warning(json.dumps(log_record, indent=2))
+
+        return True
+
+
+async def consume(config: dict, pipeline: Pipeline):
+    """
+    Feed MQTT messages into the pipeline, reconnecting on broker errors.
+    """
+    while True:
+        try:
+            async with aiomqtt.Client(
+                config["MQTT_SERVER"],
+                config["MQTT_PORT"],
+                username=config["MQTT_LOGIN"],
+                password=config["MQTT_PASS"],
+                keepalive=60,
+            ) as client:
+                logging.info("Connected")
+                await client.subscribe(config["MQTT_TOPIC"])
+
+                async for msg in client.messages:
+                    await on_message(pipeline, msg)
+        except aiomqtt.MqttError as e:
+            logging.error(f"Connection lost: {e}, reconnecting")
+            await asyncio.sleep(5)
+
+
+async def on_message(pipeline: Pipeline, msg: aiomqtt.Message):
+    try:
+        payload_dict = json.loads(bytes(msg.payload).decode())  # type: ignore
+    except (TypeError, ValueError):
+        logging.warning(f"Malformed payload on {msg.topic}")
+        return
+
+    event = get_event(str(msg.topic))
+    if not isinstance(payload_dict, dict) or "code" not in payload_dict or not event:
         log_record = {"payload": payload_dict, "event": event}
         logging.warning(json.dumps(log_record, indent=2))
         return
 
-    res = request_webapp(payload_dict["code"], event)
-    log_record = {
-        "payload": payload_dict,
-        "event": event,
-        "response": res.text,
-        "status_code": res.status_code,
-    }
-    logging.info(json.dumps(log_record, indent=2))
+    pipeline.submit(payload_dict, event)
+
+
+async def main():
+    config = get_config()
+
+    async with create_http_client(
+        config["WEBAPP_URL"], config["AUTH_TOKEN"], config["WORKERS"]
+    ) as http:
+        spool = Spool(config["SPOOL_PATH"])
+        pipeline = Pipeline(
+            http,
+            spool,
+            config["WORKERS"],
+            config["QUEUE_SIZE"],
+            config["BATCH_SIZE"],
+            config["BATCH_INTERVAL"],
+        )
+        pipeline.start()
+        reporter = asyncio.create_task(pipeline.report(config["SPOOL_STATS_INTERVAL"]))
+
+        try:
+            await consume(config, pipeline)
+        finally:
+            reporter.cancel()
+            await pipeline.close()
+            spool.close()
 
 
 if __name__ == "__main__":
-    client.username_pw_set(config["MQTT_LOGIN"], config["MQTT_PASS"])
-    client.connect(config["MQTT_SERVER"], config["MQTT_PORT"], 60)
-    client.loop_forever()
+    asyncio.run(main())
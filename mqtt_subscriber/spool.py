@@ -0,0 +1,79 @@
+import sqlite3
+import time
+
+
+class Spool:
+    """
+    Durable local queue of RFID records in SQLite WAL mode.
+
+    Every received record is appended before it is forwarded and deleted once
+    the webapp acknowledged it, so records still in the spool after a restart
+    are replayed in their original order.
+    """
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # WAL with synchronous=NORMAL survives process crashes without an
+        # fsync per append.
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                code TEXT NOT NULL,
+                event TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                received_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+
+    def append(self, record: dict) -> int:
+        cursor = self.connection.execute(
+            "INSERT INTO records (code, event, timestamp, received_at) VALUES (?, ?, ?, ?)",
+            (record["code"], record["event"], record["timestamp"], time.time()),
+        )
+        return cursor.lastrowid  # type: ignore
+
+    def pending(self, after_id: int = 0, limit: int = 1000) -> list[dict]:
+        """
+        Records not acknowledged yet, in the order they were received.
+        """
+        rows = self.connection.execute(
+            "SELECT id, code, event, timestamp FROM records"
+            " WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, limit),
+        )
+        return [
+            {"id": id, "code": code, "event": event, "timestamp": timestamp}
+            for id, code, event, timestamp in rows
+        ]
+
+    def ack(self, ids: list[int]):
+        self.connection.execute(
+            f"DELETE FROM records WHERE id IN ({', '.join('?' * len(ids))})", ids
+        )
+
+    def retry(self, ids: list[int]):
+        self.connection.execute(
+            "UPDATE records SET attempts = attempts + 1"
+            f" WHERE id IN ({', '.join('?' * len(ids))})",
+            ids,
+        )
+
+    def stats(self) -> dict:
+        """
+        Queue depth, age of the oldest pending record in seconds and the
+        most delivery attempts of a pending record.
+        """
+        depth, oldest, attempts = self.connection.execute(
+            "SELECT COUNT(*), MIN(received_at), MAX(attempts) FROM records"
+        ).fetchone()
+        return {
+            "depth": depth,
+            "lag": round(time.time() - oldest, 3) if oldest else 0.0,
+            "attempts": attempts or 0,
+        }
+
+    def close(self):
+        self.connection.close()